@@ -15,12 +15,12 @@ PROJECT_ID = 'arboreal-vision-339901'
 def get_chains_movement(current_start, current_end, previous_start, previous_end):
     """Get chains that entered or exited Recover between two periods"""
     
-    query = f"""
+    query = """
     WITH current_month_chains AS (
         SELECT DISTINCT sm.chain
         FROM `merchant_portal_export.chargeback_split_summary` cs
         JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date BETWEEN '{current_start}' AND '{current_end}'
+        WHERE cs.chargeback_date BETWEEN @current_start AND @current_end
             AND sm.chain IS NOT NULL
             AND sm.chain != ''
     ),
@@ -28,7 +28,7 @@ def get_chains_movement(current_start, current_end, previous_start, previous_end
         SELECT DISTINCT sm.chain
         FROM `merchant_portal_export.chargeback_split_summary` cs
         JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date BETWEEN '{previous_start}' AND '{previous_end}'
+        WHERE cs.chargeback_date BETWEEN @previous_start AND @previous_end
             AND sm.chain IS NOT NULL
             AND sm.chain != ''
     ),
@@ -79,8 +79,17 @@ def get_chains_movement(current_start, current_end, previous_start, previous_end
     ORDER BY s.segment, m.movement_type, s.location_count DESC
     """
     
+    # Dates as named parameters keep the SQL text fixed, so BigQuery's result cache can be reused
+    query_params = [
+        {'name': 'current_start', 'parameterType': {'type': 'DATE'}, 'parameterValue': {'value': str(current_start)}},
+        {'name': 'current_end', 'parameterType': {'type': 'DATE'}, 'parameterValue': {'value': str(current_end)}},
+        {'name': 'previous_start', 'parameterType': {'type': 'DATE'}, 'parameterValue': {'value': str(previous_start)}},
+        {'name': 'previous_end', 'parameterType': {'type': 'DATE'}, 'parameterValue': {'value': str(previous_end)}},
+    ]
+    
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=None, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=None, auth_local_webserver=False,
+                                 configuration={'query': {'parameterMode': 'NAMED', 'queryParameters': query_params}})
         return df
     except Exception as e:
         print(f"Error: {e}")
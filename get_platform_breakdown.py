@@ -14,7 +14,7 @@ PROJECT_ID = 'arboreal-vision-339901'
 def get_platform_breakdown(start_date, end_date, month_label):
     """Get platform-specific metrics"""
     
-    query = f"""
+    query = """
     WITH monthly_data AS (
         SELECT 
             cs.platform,
@@ -34,7 +34,7 @@ def get_platform_breakdown(start_date, end_date, month_label):
             END as dispute_status
         FROM `merchant_portal_export.chargeback_split_summary` cs
         JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date BETWEEN '{start_date}' AND '{end_date}'
+        WHERE cs.chargeback_date BETWEEN @start_date AND @end_date
             AND sm.chain IS NOT NULL
             AND sm.chain != ''
     )
@@ -54,8 +54,15 @@ def get_platform_breakdown(start_date, end_date, month_label):
     ORDER BY platform
     """
     
+    # Dates as named parameters keep the SQL text fixed, so BigQuery's result cache can be reused
+    query_params = [
+        {'name': 'start_date', 'parameterType': {'type': 'DATE'}, 'parameterValue': {'value': str(start_date)}},
+        {'name': 'end_date', 'parameterType': {'type': 'DATE'}, 'parameterValue': {'value': str(end_date)}},
+    ]
+    
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=None, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=None, auth_local_webserver=False,
+                                 configuration={'query': {'parameterMode': 'NAMED', 'queryParameters': query_params}})
         return df
     except Exception as e:
         print(f"Error: {e}")
@@ -6,12 +6,20 @@ Correct calculation: Total disputed amount vs what was won/lost/pending
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.colors import to_hex
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
+import threading
 from google.oauth2 import service_account
+from google.cloud import bigquery
 import pandas_gbq
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Page configuration
 st.set_page_config(
@@ -21,17 +29,34 @@ st.set_page_config(
 )
 
 # Authentication
-if 'gcp_service_account' in st.secrets:
-    credentials = service_account.Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"]
-    )
-else:
+@st.cache_resource
+def load_credentials():
+    """Service account credentials, parsed once per process rather than on every rerun"""
+    if 'gcp_service_account' in st.secrets:
+        return service_account.Credentials.from_service_account_info(
+            st.secrets["gcp_service_account"]
+        )
     os.environ['GOOGLE_AUTH_DISABLE_METADATA_SERVER'] = 'True'
     os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = ''
-    credentials = None
+    return None
+
+credentials = load_credentials()
 
 # Configuration
 PROJECT_ID = 'arboreal-vision-339901'
+PLATFORMS_PER_ROW = 5  # max metric columns per row in the on-time filing section
+
+@st.cache_resource
+def get_bigquery_client():
+    """Shared BigQuery client for parameterized queries"""
+    return bigquery.Client(project=PROJECT_ID, credentials=credentials)
+
+def run_query(query, params=None):
+    """Run a query with optional named BigQuery query parameters.
+    String columns come back Arrow-backed (string[pyarrow]) instead of object dtype."""
+    job_config = bigquery.QueryJobConfig(query_parameters=params or [])
+    job = get_bigquery_client().query(query, job_config=job_config)
+    return job.to_dataframe(string_dtype=pd.StringDtype(storage="pyarrow"))
 
 # Title
 st.title("📊 Inaccurate Orders Recovery Dashboard")
@@ -58,11 +83,12 @@ st.sidebar.header("🔍 Filters")
 # Date range filter
 default_start = date(2025, 1, 1)
 default_end = date.today()
+earliest_date = date(2024, 1, 1)  # also bounds the inaccurate category lookup
 
 date_range = st.sidebar.date_input(
     "Date Range",
     value=(default_start, default_end),
-    min_value=date(2024, 1, 1),
+    min_value=earliest_date,
     max_value=date.today(),
     key="date_range"
 )
@@ -72,13 +98,13 @@ def get_platforms():
     """Get list of unique platforms"""
     query = """
     SELECT DISTINCT platform
-    FROM `merchant_portal_export.chargeback_split_summary`
+    FROM `merchant_portal_export.chargeback_split_summary_partitioned`
     WHERE platform IS NOT NULL
         AND UPPER(COALESCE(error_category, '')) LIKE '%INACCURATE%'
     ORDER BY platform
     """
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df['platform'].tolist()
     except:
         return []
@@ -88,37 +114,72 @@ def get_chains():
     """Get list of restaurant chains"""
     query = """
     SELECT DISTINCT sm.chain
-    FROM `merchant_portal_export.chargeback_split_summary` cs
-    JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm
+    FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
+    JOIN (
+        SELECT slug, chain
+        FROM `restaurant_aggregate_metrics.slug_am_mapping`
+        WHERE chain IS NOT NULL
+    ) sm
         ON cs.slug = sm.slug
-    WHERE sm.chain IS NOT NULL
-        AND UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
+    WHERE UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
     ORDER BY sm.chain
     """
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df['chain'].tolist()
     except:
         return []
 
+@st.cache_data(ttl=3600)
+def get_inaccurate_categories():
+    """Get the exact error_category values that count as inaccurate orders"""
+    # Only the dates the dashboard can select, so the lookup prunes partitions instead of scanning the table
+    query = """
+    SELECT DISTINCT error_category
+    FROM `merchant_portal_export.chargeback_split_summary_partitioned`
+    WHERE chargeback_date >= @earliest_date
+        AND UPPER(error_category) LIKE '%INACCURATE%'
+    """
+    # No try/except: st.cache_data does not cache a failure, so the next rerun retries the lookup
+    df = run_query(query, [bigquery.ScalarQueryParameter('earliest_date', 'DATE', earliest_date)])
+    return sorted(df['error_category'].tolist())
+
+def inaccurate_match(column):
+    """SQL predicate for inaccurate orders: the exact category list when loaded, else the LIKE match"""
+    if inaccurate_categories:
+        return f"{column} IN UNNEST(@inaccurate_categories)"
+    return f"UPPER(COALESCE({column}, '')) LIKE '%INACCURATE%'"
+
+def inaccurate_category_params():
+    """Query parameters binding @inaccurate_categories; none when falling back to the LIKE match"""
+    if inaccurate_categories:
+        return [bigquery.ArrayQueryParameter('inaccurate_categories', 'STRING', inaccurate_categories)]
+    return []
+
 # Load filter options and create filters
 with st.spinner("Loading filter options..."):
     platforms = get_platforms()
     chains = get_chains()
+    # An empty list would bind an empty array and silently zero every inaccurate metric
+    try:
+        inaccurate_categories = get_inaccurate_categories()
+    except Exception as e:
+        st.error(f"Error loading inaccurate order categories, matching on the category name instead: {e}")
+        inaccurate_categories = []
 
 # Platform filter
-platform_filter = st.sidebar.multiselect(
+platform_filter = tuple(st.sidebar.multiselect(
     "Platform",
     options=["All Platforms"] + platforms,
     default=["All Platforms"]
-)
+))
 
 # Chain filter
-chain_filter = st.sidebar.multiselect(
+chain_filter = tuple(st.sidebar.multiselect(
     "Restaurant Chain",
     options=["All Chains"] + chains,
     default=["All Chains"]
-)
+))
 
 def build_filter_clause(date_range, platform_filter, chain_filter, table_alias='cs', include_chain=False):
     """Build WHERE clause for queries - ONLY INACCURATE ORDERS"""
@@ -143,45 +204,57 @@ def build_filter_clause(date_range, platform_filter, chain_filter, table_alias='
     
     return " AND ".join(filters)
 
-@st.cache_data(ttl=3600)
-def get_overall_recovery(date_range, platform_filter, chain_filter):
-    """Get overall recovery metrics for inaccurate orders using CORRECT calculation:
-    Won = ALL error categories, Settled = INACCURATE only"""
-    
-    # Build filters that apply to both queries
+def build_filtered_source(date_range, platform_filter, inaccurate_only=False):
+    """Pre-filtered subquery over the partitioned chargeback_split_summary copy: the date range prunes
+    partitions and the platform filter uses clustering, before the chain join"""
     filters = []
     
     if date_range and len(date_range) == 2:
-        filters.append(f"cs.chargeback_date BETWEEN '{date_range[0]}' AND '{date_range[1]}'")
+        filters.append(f"chargeback_date BETWEEN '{date_range[0]}' AND '{date_range[1]}'")
     
-    if platform_filter and platform_filter != ["All Platforms"] and platform_filter != "All Platforms":
-        if isinstance(platform_filter, list):
-            platform_list = "', '".join(platform_filter)
-        else:
-            platform_list = platform_filter
-        filters.append(f"cs.platform IN ('{platform_list}')")
+    if platform_filter and "All Platforms" not in platform_filter:
+        platform_list = "', '".join(platform_filter)
+        filters.append(f"platform IN ('{platform_list}')")
     
-    # Handle chain filter with join
-    chain_join = ""
-    chain_where = ""
-    if chain_filter and chain_filter != ["All Chains"] and chain_filter != "All Chains":
-        chain_join = "JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
-        if isinstance(chain_filter, list):
-            chain_list = "', '".join(chain_filter)
-        else:
-            chain_list = chain_filter
-        chain_where = f" AND sm.chain IN ('{chain_list}')"
+    if inaccurate_only:
+        filters.append("UPPER(COALESCE(error_category, '')) LIKE '%INACCURATE%'")
     
-    base_where = " AND ".join(filters) if filters else "1=1"
+    where_clause = " AND ".join(filters) if filters else "1=1"
+    return f"(SELECT * FROM `merchant_portal_export.chargeback_split_summary_partitioned` WHERE {where_clause})"
+
+def build_chain_source(chain_filter=None):
+    """slug_am_mapping projected to (slug, chain) and narrowed to the selected chains before joining"""
+    filters = ["chain IS NOT NULL"]
+    
+    if chain_filter and "All Chains" not in chain_filter:
+        chain_list = "', '".join(chain_filter)
+        filters.append(f"chain IN ('{chain_list}')")
+    
+    return f"(SELECT slug, chain FROM `restaurant_aggregate_metrics.slug_am_mapping` WHERE {' AND '.join(filters)})"
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_overall_recovery(date_range, platform_filter, chain_filter):
+    """Get overall recovery metrics for inaccurate orders using CORRECT calculation:
+    Won = ALL error categories, Settled = INACCURATE only"""
+    
+    # Date/platform filters are applied inside the source subqueries
+    all_source = build_filtered_source(date_range, platform_filter)
+    inaccurate_source = build_filtered_source(date_range, platform_filter, inaccurate_only=True)
+    
+    # Handle chain filter with join (chain list applied on the mapping side)
+    chain_join = ""
+    if chain_filter and "All Chains" not in chain_filter:
+        if isinstance(chain_filter, str):
+            chain_filter = [chain_filter]
+        chain_join = f"JOIN {build_chain_source(chain_filter)} sm ON cs.slug = sm.slug"
     
     query = f"""
     WITH won_all AS (
         -- Calculate Won from ALL error categories
         SELECT 
             SUM(COALESCE(cs.enabled_won_disputes, 0)) as total_won_all
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM {all_source} cs
         {chain_join}
-        WHERE {base_where}{chain_where}
     ),
     inaccurate_metrics AS (
         -- Calculate metrics from INACCURATE orders only
@@ -222,10 +295,8 @@ def get_overall_recovery(date_range, platform_filter, chain_filter):
                 ELSE 0 
             END) as pending_count
             
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM {inaccurate_source} cs
         {chain_join}
-        WHERE {base_where} 
-            AND UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'{chain_where}
     )
     SELECT 
         total_contested,
@@ -241,7 +312,7 @@ def get_overall_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         if not df.empty:
             row = df.iloc[0]
             # Calculate lost as Settled - Won
@@ -256,32 +327,18 @@ def get_overall_recovery(date_range, platform_filter, chain_filter):
         st.error(f"Error loading overall recovery: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_monthly_recovery(date_range, platform_filter, chain_filter):
     """Get monthly recovery trends using CORRECT calculation:
     Won = ALL error categories, Settled = INACCURATE only"""
     
-    # Build filters that apply to both queries
-    filters = []
-    
-    if date_range and len(date_range) == 2:
-        filters.append(f"cs.chargeback_date BETWEEN '{date_range[0]}' AND '{date_range[1]}'")
-    
-    if platform_filter and platform_filter != ["All Platforms"] and platform_filter != "All Platforms":
-        if isinstance(platform_filter, list):
-            platform_list = "', '".join(platform_filter)
-        else:
-            platform_list = platform_filter
-        filters.append(f"cs.platform IN ('{platform_list}')")
+    # Date/platform filters are applied inside the source subquery
+    source = build_filtered_source(date_range, platform_filter)
     
-    # Handle chain filter with JOIN
+    # Handle chain filter with JOIN (chain list applied on the mapping side)
     chain_join = ""
     if chain_filter and "All Chains" not in chain_filter:
-        chain_join = "JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
-        chain_list = "', '".join(chain_filter)
-        filters.append(f"sm.chain IN ('{chain_list}')")
-    
-    base_where = " AND ".join(filters) if filters else "1=1"
+        chain_join = f"JOIN {build_chain_source(chain_filter)} sm ON cs.slug = sm.slug"
     
     query = f"""
     WITH monthly_data AS (
@@ -324,9 +381,8 @@ def get_monthly_recovery(date_range, platform_filter, chain_filter):
                 THEN 1 ELSE NULL 
             END) as dispute_count
             
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM {source} cs
         {chain_join}
-        WHERE {base_where}
         GROUP BY month
     )
     SELECT 
@@ -341,7 +397,7 @@ def get_monthly_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         df['month'] = pd.to_datetime(df['month'])
         df['month_name'] = df['month'].dt.strftime('%B %Y')
         
@@ -358,7 +414,7 @@ def get_monthly_recovery(date_range, platform_filter, chain_filter):
         st.error(f"Error loading monthly data: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_platform_recovery(date_range, platform_filter, chain_filter):
     """Get recovery by platform using CORRECT calculation:
     Won = ALL error categories, Settled = INACCURATE only"""
@@ -369,8 +425,8 @@ def get_platform_recovery(date_range, platform_filter, chain_filter):
     if date_range and len(date_range) == 2:
         filters.append(f"cs.chargeback_date BETWEEN '{date_range[0]}' AND '{date_range[1]}'")
     
-    if platform_filter and platform_filter != ["All Platforms"] and platform_filter != "All Platforms":
-        if isinstance(platform_filter, list):
+    if platform_filter and "All Platforms" not in platform_filter:
+        if isinstance(platform_filter, (list, tuple)):
             platform_list = "', '".join(platform_filter)
         else:
             platform_list = platform_filter
@@ -412,7 +468,7 @@ def get_platform_recovery(date_range, platform_filter, chain_filter):
                 THEN 1 ELSE NULL 
             END) as dispute_count
             
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
         WHERE {base_where}
         GROUP BY cs.platform
     )
@@ -428,7 +484,7 @@ def get_platform_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         
         # Calculate lost as Settled - Won
         df['lost'] = df['settled'] - df['won']
@@ -443,23 +499,14 @@ def get_platform_recovery(date_range, platform_filter, chain_filter):
         st.error(f"Error loading platform data: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_chain_recovery(date_range, platform_filter, chain_filter):
     """Get recovery by restaurant chain for inaccurate orders"""
-    filter_clause = build_filter_clause(date_range, platform_filter, chain_filter, 'cs', include_chain=True)
-    
-    # Build filter for Won from ALL categories
-    won_filters = []
-    if date_range and len(date_range) == 2:
-        won_filters.append(f"cs.chargeback_date BETWEEN '{date_range[0]}' AND '{date_range[1]}'")
-    if platform_filter and "All Platforms" not in platform_filter:
-        platform_list = "', '".join(platform_filter)
-        won_filters.append(f"cs.platform IN ('{platform_list}')")
-    if chain_filter and "All Chains" not in chain_filter:
-        chain_list = "', '".join(chain_filter)
-        won_filters.append(f"sm.chain IN ('{chain_list}')")
+    # Won uses ALL categories, everything else INACCURATE only
+    all_source = build_filtered_source(date_range, platform_filter)
+    inaccurate_source = build_filtered_source(date_range, platform_filter, inaccurate_only=True)
     
-    won_filter = " AND ".join(won_filters) if won_filters else ""
+    chain_source = build_chain_source(chain_filter)
     
     query = f"""
     WITH won_by_chain AS (
@@ -467,11 +514,9 @@ def get_chain_recovery(date_range, platform_filter, chain_filter):
         SELECT 
             sm.chain,
             SUM(COALESCE(cs.enabled_won_disputes, 0)) as total_won
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm
+        FROM {all_source} cs
+        JOIN {chain_source} sm
             ON cs.slug = sm.slug
-        WHERE sm.chain IS NOT NULL
-            {f"AND {won_filter}" if won_filter else ""}
         GROUP BY sm.chain
     ),
     inaccurate_metrics AS (
@@ -499,11 +544,9 @@ def get_chain_recovery(date_range, platform_filter, chain_filter):
             COUNT(*) as dispute_count,
             COUNT(DISTINCT cs.slug) as location_count
             
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm
+        FROM {inaccurate_source} cs
+        JOIN {chain_source} sm
             ON cs.slug = sm.slug
-        WHERE {filter_clause}
-            AND sm.chain IS NOT NULL
         GROUP BY sm.chain
         HAVING dispute_count > 10
     )
@@ -522,7 +565,7 @@ def get_chain_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         
         # Calculate lost as Settled - Won
         df['lost'] = df['settled'] - df['won']
@@ -537,28 +580,17 @@ def get_chain_recovery(date_range, platform_filter, chain_filter):
         st.error(f"Error loading chain data: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_platform_win_rate_trend(date_range, platform_filter=None, chain_filter=None):
     """Get win rate trend by platform over time"""
     
-    # Build date filter
-    date_clause = ""
-    if date_range and len(date_range) == 2:
-        date_clause = f"AND cs.chargeback_date BETWEEN '{date_range[0]}' AND '{date_range[1]}'"
-    
-    # Build platform filter
-    platform_clause = ""
-    if platform_filter and "All Platforms" not in platform_filter:
-        platform_list = "', '".join(platform_filter)
-        platform_clause = f"AND cs.platform IN ('{platform_list}')"
+    # Date/platform filters are applied inside the source subquery
+    source = build_filtered_source(date_range, platform_filter)
     
-    # Build chain filter
-    chain_clause = ""
+    # Build chain filter (chain list applied on the mapping side)
     chain_join = ""
     if chain_filter and "All Chains" not in chain_filter:
-        chain_list = "', '".join(chain_filter)
-        chain_join = "JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
-        chain_clause = f"AND sm.chain IN ('{chain_list}')"
+        chain_join = f"JOIN {build_chain_source(chain_filter)} sm ON cs.slug = sm.slug"
     
     query = f"""
     WITH monthly_platform_rates AS (
@@ -574,12 +606,9 @@ def get_platform_win_rate_trend(date_range, platform_filter=None, chain_filter=N
                 THEN COALESCE(cs.enabled_customer_refunds, 0)
                 ELSE 0 
             END) as total_settled
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM {source} cs
         {chain_join}
         WHERE cs.platform IS NOT NULL
-            {date_clause}
-            {platform_clause}
-            {chain_clause}
         GROUP BY month, cs.platform
         HAVING total_settled > 0  -- Only include months with settled amounts
     )
@@ -598,38 +627,28 @@ def get_platform_win_rate_trend(date_range, platform_filter=None, chain_filter=N
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         if not df.empty:
             df['month'] = pd.to_datetime(df['month'])
             df['month_str'] = df['month'].dt.strftime('%b %Y')
+            df['platform'] = df['platform'].astype('category')
         return df
     except Exception as e:
         st.error(f"Error loading platform win rate trend: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_subcategory_recovery(date_range, platform_filter, chain_filter):
     """Get recovery rate by subcategory using CORRECT calculation:
     Won = ALL error categories, Settled = INACCURATE only"""
     
-    # Build filters manually to avoid parsing issues
-    filters = []
-    
-    if date_range and len(date_range) == 2:
-        filters.append(f"cs.chargeback_date BETWEEN '{date_range[0]}' AND '{date_range[1]}'")
-    
-    if platform_filter and "All Platforms" not in platform_filter:
-        platform_list = "', '".join(platform_filter)
-        filters.append(f"cs.platform IN ('{platform_list}')")
+    # Date/platform filters are applied inside the source subquery
+    source = build_filtered_source(date_range, platform_filter)
     
-    # Handle chain filter with join
+    # Handle chain filter with join (chain list applied on the mapping side)
     chain_join = ""
     if chain_filter and "All Chains" not in chain_filter:
-        chain_join = "JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
-        chain_list = "', '".join(chain_filter)
-        filters.append(f"sm.chain IN ('{chain_list}')")
-    
-    base_where = " AND ".join(filters) if filters else "1=1"
+        chain_join = f"JOIN {build_chain_source(chain_filter)} sm ON cs.slug = sm.slug"
     
     query = f"""
     WITH subcategory_data AS (
@@ -654,9 +673,8 @@ def get_subcategory_recovery(date_range, platform_filter, chain_filter):
             cs.slug,
             UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%' as is_inaccurate
             
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM {source} cs
         {chain_join}
-        WHERE {base_where}
     )
     SELECT 
         subcategory,
@@ -673,35 +691,24 @@ def get_subcategory_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading subcategory recovery: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_subcategory_recovery_monthly(date_range, platform_filter, chain_filter):
     """Get monthly recovery rate by subcategory using CORRECT calculation:
     Won = ALL error categories, Settled = INACCURATE only"""
     
-    # Build filters manually to avoid parsing issues
-    filters = []
-    
-    if date_range and len(date_range) == 2:
-        filters.append(f"cs.chargeback_date BETWEEN '{date_range[0]}' AND '{date_range[1]}'")
-    
-    if platform_filter and "All Platforms" not in platform_filter:
-        platform_list = "', '".join(platform_filter)
-        filters.append(f"cs.platform IN ('{platform_list}')")
+    # Date/platform filters are applied inside the source subquery
+    source = build_filtered_source(date_range, platform_filter)
     
-    # Handle chain filter with join
+    # Handle chain filter with join (chain list applied on the mapping side)
     chain_join = ""
     if chain_filter and "All Chains" not in chain_filter:
-        chain_join = "JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
-        chain_list = "', '".join(chain_filter)
-        filters.append(f"sm.chain IN ('{chain_list}')")
-    
-    base_where = " AND ".join(filters) if filters else "1=1"
+        chain_join = f"JOIN {build_chain_source(chain_filter)} sm ON cs.slug = sm.slug"
     
     query = f"""
     WITH monthly_subcategory_data AS (
@@ -726,9 +733,8 @@ def get_subcategory_recovery_monthly(date_range, platform_filter, chain_filter):
             
             UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%' as is_inaccurate
             
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM {source} cs
         {chain_join}
-        WHERE {base_where}
     )
     SELECT 
         month,
@@ -745,50 +751,32 @@ def get_subcategory_recovery_monthly(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
+        df['subcategory'] = df['subcategory'].astype('category')
         return df
     except Exception as e:
         st.error(f"Error loading monthly subcategory recovery: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_subcategory_volume_monthly(date_range, platform_filter, chain_filter):
     """Get monthly dispute volume percentage by subcategory for inaccurate orders"""
     
-    # Build filters manually to avoid parsing issues
-    filters = []
-    
-    if platform_filter and "All Platforms" not in platform_filter:
-        platform_list = [f"'{p}'" for p in platform_filter]
-        filters.append(f"cs.platform IN ({', '.join(platform_list)})")
-    
-    if chain_filter and "All Chains" not in chain_filter:
-        chain_list = [f"'{c}'" for c in chain_filter]
-        filters.append(f"sm.chain IN ({', '.join(chain_list)})")
-    
-    # Add date range filter
-    start_date, end_date = date_range
-    filters.append(f"cs.chargeback_date >= '{start_date}'")
-    filters.append(f"cs.chargeback_date <= '{end_date}'")
+    # Date/platform/inaccurate filters are applied inside the source subquery
+    source = build_filtered_source(date_range, platform_filter, inaccurate_only=True)
     
-    # Add inaccurate order filter
-    filters.append("UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'")
-    
-    where_clause = " AND ".join(filters)
-    
-    # Chain join if needed
+    # Chain join if needed (chain list applied on the mapping side)
     chain_join = ""
     if chain_filter and "All Chains" not in chain_filter:
-        chain_join = "LEFT JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
+        chain_join = f"JOIN {build_chain_source(chain_filter)} sm ON cs.slug = sm.slug"
     
     query = f"""
     WITH monthly_totals AS (
         SELECT 
             DATE_TRUNC(cs.chargeback_date, MONTH) as month,
             COUNT(*) as total_disputes_month
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM {source} cs
         {chain_join}
-        WHERE {where_clause}
         GROUP BY month
     ),
     subcategory_monthly AS (
@@ -796,10 +784,9 @@ def get_subcategory_volume_monthly(date_range, platform_filter, chain_filter):
             DATE_TRUNC(cs.chargeback_date, MONTH) as month,
             TRIM(UPPER(cs.error_subcategory)) as subcategory,
             COUNT(*) as disputes_count
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM {source} cs
         {chain_join}
-        WHERE {where_clause}
-            AND cs.error_subcategory IS NOT NULL
+        WHERE cs.error_subcategory IS NOT NULL
             AND TRIM(cs.error_subcategory) != ''
         GROUP BY month, subcategory
     )
@@ -815,7 +802,8 @@ def get_subcategory_volume_monthly(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
+        df['subcategory'] = df['subcategory'].astype('category')
         return df
     except Exception as e:
         st.error(f"Error loading monthly subcategory volume: {e}")
@@ -841,20 +829,20 @@ def get_status_breakdown(date_range, platform_filter, chain_filter):
         
         COUNT(*) as count
         
-    FROM `merchant_portal_export.chargeback_split_summary` cs
+    FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
     WHERE {filter_clause}
     GROUP BY external_status
     ORDER BY amount DESC
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading status breakdown: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=32)
 def get_cohort_analysis(date_range, platform_filter=None, chain_filter=None):
     """Get cohort analysis - recovery per location for top 20 chains over last 10 months"""
     
@@ -876,25 +864,23 @@ def get_cohort_analysis(date_range, platform_filter=None, chain_filter=None):
     chain_clause = ""
     if chain_filter and "All Chains" not in chain_filter:
         chain_list = "', '".join(chain_filter)
-        chain_clause = f"AND sm.chain IN ('{chain_list}')"
+        chain_clause = f"AND cs.chain IN ('{chain_list}')"
     
     query = f"""
     WITH monthly_chain_data AS (
         -- Get Won from ALL categories and location count by chain and month
         SELECT 
             DATE_TRUNC(cs.chargeback_date, MONTH) as month,
-            sm.chain,
+            cs.chain,
             SUM(COALESCE(cs.enabled_won_disputes, 0)) as total_won,
             COUNT(DISTINCT cs.slug) as active_locations
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm
-            ON cs.slug = sm.slug
+        FROM `merchant_portal_export.chargeback_split_with_chain` cs
         WHERE cs.chargeback_date >= '{start_date}'
             AND cs.chargeback_date <= '{end_date}'
-            AND sm.chain IS NOT NULL
+            AND cs.chain IS NOT NULL
             {platform_clause}
             {chain_clause}
-        GROUP BY month, sm.chain
+        GROUP BY month, cs.chain
     ),
     top_chains AS (
         -- Get top 20 chains by total volume
@@ -908,39 +894,34 @@ def get_cohort_analysis(date_range, platform_filter=None, chain_filter=None):
     )
     SELECT 
         m.chain,
-        m.month,
+        FORMAT_DATE('%b %Y', m.month) as month_label,
+        m.month as month_sort,
         m.total_won,
         m.active_locations,
-        ROUND(CASE 
+        CASE 
             WHEN m.active_locations > 0 
             THEN m.total_won / m.active_locations 
             ELSE 0 
-        END, 2) as recovery_per_location
+        END as recovery_per_location
     FROM monthly_chain_data m
     INNER JOIN top_chains t ON m.chain = t.chain
-    ORDER BY t.total_volume DESC, m.chain, m.month
+    ORDER BY t.total_volume DESC, m.chain, month_sort
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         
         if not df.empty:
-            # Pivot the data to create cohort matrix
-            df['month'] = pd.to_datetime(df['month'])
-            df['month_label'] = df['month'].dt.strftime('%b %Y')
-            
-            # Create pivot table with recovery per location
-            cohort_matrix = df.pivot_table(
+            # Pivot the data to create cohort matrix (one row per chain/month)
+            cohort_matrix = df.pivot(
                 index='chain',
                 columns='month_label',
-                values='recovery_per_location',
-                aggfunc='first'
+                values='recovery_per_location'
             )
             
             # Sort columns by date
-            date_order = sorted(df['month'].unique())
-            month_labels = [pd.to_datetime(d).strftime('%b %Y') for d in date_order]
-            cohort_matrix = cohort_matrix[month_labels]
+            month_labels = df.drop_duplicates('month_sort').sort_values('month_sort')['month_label']
+            cohort_matrix = cohort_matrix.reindex(columns=month_labels).round(2).astype('float32')
             
             return cohort_matrix
         
@@ -964,15 +945,13 @@ def get_ontime_dispute_analysis(date_range, platform_filter, chain_filter):
         platform_list = "', '".join(platform_filter)
         filters.append(f"cs.platform IN ('{platform_list}')")
     
-    # Handle chain filter with join
-    chain_join = ""
+    # Handle chain filter
     if chain_filter and "All Chains" not in chain_filter:
-        chain_join = "JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
         chain_list = "', '".join(chain_filter)
-        filters.append(f"sm.chain IN ('{chain_list}')")
+        filters.append(f"cs.chain IN ('{chain_list}')")
     
     # Add inaccurate filter
-    filters.append("UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'")
+    filters.append(inaccurate_match('cs.error_category'))
     
     where_clause = " AND ".join(filters) if filters else "1=1"
     
@@ -991,8 +970,7 @@ def get_ontime_dispute_analysis(date_range, platform_filter, chain_filter):
             cs.external_status,
             COUNT(*) as dispute_count,
             SUM(COALESCE(cs.enabled_customer_refunds, 0)) as total_amount
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        {chain_join}
+        FROM `merchant_portal_export.chargeback_split_with_chain` cs
         WHERE {where_clause}
         GROUP BY cs.platform, dispute_window, cs.external_status
     ),
@@ -1029,7 +1007,12 @@ def get_ontime_dispute_analysis(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = run_query(query, inaccurate_category_params())
+        # Narrow the percentages to float32 for the chart payload. Counts stay int64: they are summed
+        # downstream, and the nullable UInt8/UInt16 a downcast picks would wrap on addition.
+        df['on_time_percentage'] = df['on_time_percentage'].astype('float32')
+        count_cols = ['total_count', 'on_time_count', 'late_count']
+        df[count_cols] = df[count_cols].fillna(0).astype('int64')
         return df
     except Exception as e:
         st.error(f"Error loading on-time dispute analysis: {e}")
@@ -1039,27 +1022,13 @@ def get_ontime_dispute_analysis(date_range, platform_filter, chain_filter):
 def get_monthly_dispute_filing_status(date_range, platform_filter, chain_filter):
     """Get month-by-month dispute filing status analysis"""
     
-    # Build filters
-    filters = []
-    
-    if date_range and len(date_range) == 2:
-        filters.append(f"cs.chargeback_date BETWEEN '{date_range[0]}' AND '{date_range[1]}'")
-    
-    if platform_filter and "All Platforms" not in platform_filter:
-        platform_list = "', '".join(platform_filter)
-        filters.append(f"cs.platform IN ('{platform_list}')")
+    # Date/platform/inaccurate filters are applied inside the source subquery
+    source = build_filtered_source(date_range, platform_filter, inaccurate_only=True)
     
-    # Handle chain filter with join
+    # Handle chain filter with join (chain list applied on the mapping side)
     chain_join = ""
     if chain_filter and "All Chains" not in chain_filter:
-        chain_join = "JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
-        chain_list = "', '".join(chain_filter)
-        filters.append(f"sm.chain IN ('{chain_list}')")
-    
-    # Add inaccurate filter
-    filters.append("UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'")
-    
-    where_clause = " AND ".join(filters) if filters else "1=1"
+        chain_join = f"JOIN {build_chain_source(chain_filter)} sm ON cs.slug = sm.slug"
     
     query = f"""
     WITH monthly_disputes AS (
@@ -1068,9 +1037,8 @@ def get_monthly_dispute_filing_status(date_range, platform_filter, chain_filter)
             cs.external_status,
             COUNT(*) as dispute_count,
             SUM(COALESCE(cs.enabled_customer_refunds, 0)) as total_amount
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM {source} cs
         {chain_join}
-        WHERE {where_clause}
         GROUP BY month, cs.external_status
     ),
     monthly_summary AS (
@@ -1111,7 +1079,7 @@ def get_monthly_dispute_filing_status(date_range, platform_filter, chain_filter)
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         if not df.empty:
             df['month'] = pd.to_datetime(df['month'])
         return df
@@ -1133,15 +1101,13 @@ def get_expiry_analysis(date_range, platform_filter, chain_filter):
         platform_list = "', '".join(platform_filter)
         filters.append(f"cs.platform IN ('{platform_list}')")
     
-    # Handle chain filter with join
-    chain_join = ""
+    # Handle chain filter
     if chain_filter and "All Chains" not in chain_filter:
-        chain_join = "JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
         chain_list = "', '".join(chain_filter)
-        filters.append(f"sm.chain IN ('{chain_list}')")
+        filters.append(f"cs.chain IN ('{chain_list}')")
     
     # Add inaccurate filter
-    filters.append("UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'")
+    filters.append(inaccurate_match('cs.error_category'))
     
     where_clause = " AND ".join(filters) if filters else "1=1"
     
@@ -1156,12 +1122,11 @@ def get_expiry_analysis(date_range, platform_filter, chain_filter):
             CASE 
                 WHEN cs.platform = 'Doordash' THEN DATE_ADD(DATE(cs.order_placed_at), INTERVAL 14 DAY)
                 WHEN cs.platform = 'Grubhub' THEN DATE_ADD(DATE(cs.order_placed_at), INTERVAL 30 DAY)
-                WHEN cs.platform = 'UberEats' AND {f"sm.chain = 'mcdonalds'" if chain_join else "FALSE"} THEN DATE_ADD(DATE(cs.order_placed_at), INTERVAL 14 DAY)
+                WHEN cs.platform = 'UberEats' AND cs.chain = 'mcdonalds' THEN DATE_ADD(DATE(cs.order_placed_at), INTERVAL 14 DAY)
                 WHEN cs.platform = 'UberEats' THEN DATE_ADD(DATE(cs.order_placed_at), INTERVAL 30 DAY)
                 ELSE DATE_ADD(DATE(cs.order_placed_at), INTERVAL 30 DAY)  -- Default to 30 days
             END as calculated_expiry_date
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        {chain_join}
+        FROM `merchant_portal_export.chargeback_split_with_chain` cs
         WHERE {where_clause}
             AND cs.order_placed_at IS NOT NULL
             AND cs.chargeback_date IS NOT NULL
@@ -1182,20 +1147,20 @@ def get_expiry_analysis(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = run_query(query, inaccurate_category_params())
         return df
     except Exception as e:
         st.error(f"Error loading expiry analysis: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=300)
-def get_chains_requiring_attention(date_range, platform_filter=None, chain_filter=None):
-    """Identify chains where 3-month win rate is 20% below 12-month average"""
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_chains_requiring_attention(date_range, platform_filter, chain_filter, today_bucket):
+    """Identify chains where 3-month win rate is 20% below 12-month average.
+    today_bucket (a date) is part of the cache key so results roll over daily."""
     
     # Calculate dates for 12-month and 3-month periods
-    today = pd.to_datetime('today')
-    start_3m = today - pd.Timedelta(days=90)
-    start_12m = today - pd.Timedelta(days=365)
+    start_3m = today_bucket - timedelta(days=90)
+    start_12m = today_bucket - timedelta(days=365)
     
     # Build platform filter
     platform_clause = ""
@@ -1210,52 +1175,47 @@ def get_chains_requiring_attention(date_range, platform_filter=None, chain_filte
     chain_clause = ""
     if chain_filter and "All Chains" not in chain_filter:
         chain_list = "', '".join(chain_filter)
-        chain_clause = f"AND sm.chain IN ('{chain_list}')"
+        chain_clause = f"AND cs.chain IN ('{chain_list}')"
     
     query = f"""
     WITH monthly_performance AS (
         SELECT 
-            sm.chain,
+            cs.chain,
             cs.platform,
             DATE_TRUNC(cs.chargeback_date, MONTH) as month,
             SUM(COALESCE(cs.enabled_won_disputes, 0)) as won,
             SUM(CASE 
                 WHEN cs.external_status IN ('ACCEPTED', 'DENIED')
-                    AND UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
+                    AND {inaccurate_match('cs.error_category')}
                 THEN COALESCE(cs.enabled_customer_refunds, 0)
                 ELSE 0 
             END) as settled
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date >= '{start_12m.strftime('%Y-%m-%d')}'
-            AND cs.chargeback_date <= CURRENT_DATE()
+        FROM `merchant_portal_export.chargeback_split_with_chain` cs
+        WHERE cs.chargeback_date >= @start_12m
+            AND cs.chargeback_date <= @today
+            AND cs.chain IS NOT NULL
             {platform_clause}
             {chain_clause}
-            AND UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
-        GROUP BY sm.chain, cs.platform, month
+            AND {inaccurate_match('cs.error_category')}
+        GROUP BY cs.chain, cs.platform, month
         HAVING settled > 0
     ),
     chain_metrics AS (
         SELECT 
             chain,
             platform,
-            -- 12-month average (or since data available)
-            AVG(CASE 
-                WHEN month >= '{start_12m.strftime('%Y-%m-%d')}' 
-                THEN 100.0 * won / NULLIF(settled, 0)
-                ELSE NULL 
-            END) as avg_12m_win_rate,
-            -- 3-month average
-            AVG(CASE 
-                WHEN month >= '{start_3m.strftime('%Y-%m-%d')}' 
-                THEN 100.0 * won / NULLIF(settled, 0)
-                ELSE NULL 
-            END) as avg_3m_win_rate,
+            -- 12-month (or since data available) and 3-month averages in one pass
+            AVG(IF(month >= @start_12m, win_rate, NULL)) as avg_12m_win_rate,
+            AVG(IF(month >= @start_3m, win_rate, NULL)) as avg_3m_win_rate,
             -- Count months of data
             COUNT(DISTINCT month) as months_of_data,
             -- Total volume
             SUM(settled) as total_settled_12m
-        FROM monthly_performance
+        FROM (
+            -- Monthly win rate computed once per row
+            SELECT *, 100.0 * won / NULLIF(settled, 0) as win_rate
+            FROM monthly_performance
+        )
         GROUP BY chain, platform
         HAVING months_of_data >= 3  -- Need at least 3 months of data
     ),
@@ -1278,25 +1238,30 @@ def get_chains_requiring_attention(date_range, platform_filter=None, chain_filte
     SELECT 
         chain,
         platform,
-        ROUND(avg_12m_win_rate, 2) as avg_12m_win_rate,
-        ROUND(avg_3m_win_rate, 2) as avg_3m_win_rate,
-        ROUND(win_rate_decline, 2) as win_rate_decline,
-        ROUND(decline_percentage, 2) as decline_percentage,
+        avg_12m_win_rate,
+        avg_3m_win_rate,
+        win_rate_decline,
+        decline_percentage,
         months_of_data,
-        ROUND(total_settled_12m, 2) as total_settled_12m
+        total_settled_12m
     FROM flagged_chains
     WHERE decline_percentage >= 20  -- Flag chains with 20% or more decline
     ORDER BY decline_percentage DESC
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
-        return df
+        params = inaccurate_category_params() + [
+            bigquery.ScalarQueryParameter('start_12m', 'DATE', start_12m),
+            bigquery.ScalarQueryParameter('start_3m', 'DATE', start_3m),
+            bigquery.ScalarQueryParameter('today', 'DATE', today_bucket),
+        ]
+        df = run_query(query, params)
+        return df.round(2)
     except Exception as e:
         st.error(f"Error loading attention-required chains: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=32)
 def get_win_rate_cohort(date_range, platform_filter=None, chain_filter=None):
     """Get win rate cohort analysis for top 10 chains over last 10 months"""
     
@@ -1318,32 +1283,30 @@ def get_win_rate_cohort(date_range, platform_filter=None, chain_filter=None):
     chain_clause = ""
     if chain_filter and "All Chains" not in chain_filter:
         chain_list = "', '".join(chain_filter)
-        chain_clause = f"AND sm.chain IN ('{chain_list}')"
+        chain_clause = f"AND cs.chain IN ('{chain_list}')"
     
     query = f"""
     WITH monthly_win_rates AS (
         -- Calculate win rates by chain and month
         SELECT 
             DATE_TRUNC(cs.chargeback_date, MONTH) as month,
-            sm.chain,
+            cs.chain,
             -- Won from ALL categories
             SUM(COALESCE(cs.enabled_won_disputes, 0)) as total_won,
             -- Settled from INACCURATE only
             SUM(CASE 
                 WHEN cs.external_status IN ('ACCEPTED', 'DENIED')
-                    AND UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
+                    AND {inaccurate_match('cs.error_category')}
                 THEN COALESCE(cs.enabled_customer_refunds, 0)
                 ELSE 0 
             END) as total_settled
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm
-            ON cs.slug = sm.slug
+        FROM `merchant_portal_export.chargeback_split_with_chain` cs
         WHERE cs.chargeback_date >= '{start_date}'
             AND cs.chargeback_date <= '{end_date}'
-            AND sm.chain IS NOT NULL
+            AND cs.chain IS NOT NULL
             {platform_clause}
             {chain_clause}
-        GROUP BY month, sm.chain
+        GROUP BY month, cs.chain
     ),
     top_chains AS (
         -- Get top 10 chains by total settled volume
@@ -1357,40 +1320,35 @@ def get_win_rate_cohort(date_range, platform_filter=None, chain_filter=None):
     )
     SELECT 
         m.chain,
-        m.month,
+        FORMAT_DATE('%b %Y', m.month) as month_label,
+        m.month as month_sort,
         m.total_won,
         m.total_settled,
-        ROUND(CASE 
+        CASE 
             WHEN m.total_settled > 0 
             THEN (m.total_won / m.total_settled) * 100
             ELSE 0 
-        END, 2) as win_rate
+        END as win_rate
     FROM monthly_win_rates m
     INNER JOIN top_chains t ON m.chain = t.chain
     WHERE m.total_settled > 0  -- Only show months with settled amounts
-    ORDER BY t.total_volume DESC, m.chain, m.month
+    ORDER BY t.total_volume DESC, m.chain, month_sort
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = run_query(query, inaccurate_category_params())
         
         if not df.empty:
-            # Pivot the data to create win rate matrix
-            df['month'] = pd.to_datetime(df['month'])
-            df['month_label'] = df['month'].dt.strftime('%b %Y')
-            
-            # Create pivot table with win rates
-            win_rate_matrix = df.pivot_table(
+            # Pivot the data to create win rate matrix (one row per chain/month)
+            win_rate_matrix = df.pivot(
                 index='chain',
-                columns='month_label', 
-                values='win_rate',
-                aggfunc='first'
+                columns='month_label',
+                values='win_rate'
             )
             
             # Sort columns by date
-            date_order = sorted(df['month'].unique())
-            month_labels = [pd.to_datetime(d).strftime('%b %Y') for d in date_order]
-            win_rate_matrix = win_rate_matrix[month_labels]
+            month_labels = df.drop_duplicates('month_sort').sort_values('month_sort')['month_label']
+            win_rate_matrix = win_rate_matrix.reindex(columns=month_labels).round(2).astype('float32')
             
             return win_rate_matrix
         
@@ -1401,7 +1359,7 @@ def get_win_rate_cohort(date_range, platform_filter=None, chain_filter=None):
         return pd.DataFrame()
 
 # Get win rate by order value brackets
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_win_rate_by_order_value(date_range, platform_filter, chain_filter):
     """Analyze win rate by order value brackets using CORRECT calculation:
     Won = ALL error categories, Settled = INACCURATE only"""
@@ -1417,33 +1375,27 @@ def get_win_rate_by_order_value(date_range, platform_filter, chain_filter):
     
     # Add platform filter if specified
     platform_where = ""
-    if platform_filter and platform_filter != ["All Platforms"] and "All Platforms" not in platform_filter:
-        if isinstance(platform_filter, list):
+    if platform_filter and "All Platforms" not in platform_filter:
+        if isinstance(platform_filter, (list, tuple)):
             platform_list = "', '".join(platform_filter)
             platform_where = f" AND cs.platform IN ('{platform_list}')"
         else:
             platform_where = f" AND cs.platform = '{platform_filter}'"
     
     # Add chain filter if specified
-    chain_join = ""
     chain_where = ""
-    if chain_filter and chain_filter != ["All Chains"] and "All Chains" not in chain_filter:
-        chain_join = " INNER JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
-        if isinstance(chain_filter, list):
+    if chain_filter and "All Chains" not in chain_filter:
+        if isinstance(chain_filter, (list, tuple)):
             chain_list = "', '".join(chain_filter)
-            chain_where = f" AND sm.chain IN ('{chain_list}')"
+            chain_where = f" AND cs.chain IN ('{chain_list}')"
         else:
-            chain_where = f" AND sm.chain = '{chain_filter}'"
-    
-    # Build the SELECT fields dynamically
-    chain_field = "sm.chain," if chain_join else ""
+            chain_where = f" AND cs.chain = '{chain_filter}'"
     
     query = f"""
     WITH order_value_brackets AS (
         SELECT 
             cs.slug,
             cs.platform,
-            {chain_field}
             cs.error_category,
             COALESCE(cs.subtotal, 0) as order_value,
             CASE
@@ -1471,19 +1423,18 @@ def get_win_rate_by_order_value(date_range, platform_filter, chain_filter):
             COALESCE(cs.enabled_won_disputes, 0) as won_amount,
             -- Settled from INACCURATE only
             CASE 
-                WHEN UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
+                WHEN {inaccurate_match('cs.error_category')}
                     AND cs.external_status IN ('ACCEPTED', 'DENIED')
                 THEN COALESCE(cs.enabled_customer_refunds, 0)
                 ELSE 0
             END as settled_amount,
             -- Count only INACCURATE disputes
             CASE 
-                WHEN UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
+                WHEN {inaccurate_match('cs.error_category')}
                 THEN 1
                 ELSE 0
             END as is_inaccurate_dispute
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        {chain_join}
+        FROM `merchant_portal_export.chargeback_split_with_chain` cs
         WHERE {base_where}{platform_where}{chain_where}
     ),
     bracket_summary AS (
@@ -1496,11 +1447,11 @@ def get_win_rate_by_order_value(date_range, platform_filter, chain_filter):
             -- Calculate win rate
             CASE 
                 WHEN SUM(settled_amount) > 0 
-                THEN ROUND((SUM(won_amount) / SUM(settled_amount)) * 100, 2)
+                THEN (SUM(won_amount) / SUM(settled_amount)) * 100
                 ELSE 0
             END as win_rate,
             -- Average order value in bracket (for INACCURATE orders only)
-            ROUND(AVG(CASE WHEN is_inaccurate_dispute = 1 THEN order_value ELSE NULL END), 2) as avg_order_value
+            AVG(CASE WHEN is_inaccurate_dispute = 1 THEN order_value ELSE NULL END) as avg_order_value
         FROM order_value_brackets
         GROUP BY value_bracket, bracket_order
         HAVING SUM(settled_amount) > 0  -- Only show brackets with settled INACCURATE disputes
@@ -1518,14 +1469,14 @@ def get_win_rate_by_order_value(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
-        return df
+        df = run_query(query, inaccurate_category_params())
+        return df.round(2)
     except Exception as e:
         st.error(f"Error loading win rate by order value: {e}")
         return pd.DataFrame()
 
 # Get win rate by order value brackets monthly trend
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=32)
 def get_win_rate_by_order_value_monthly(date_range, platform_filter, chain_filter):
     """Analyze win rate by order value brackets with monthly breakdown using CORRECT calculation:
     Won = ALL error categories, Settled = INACCURATE only"""
@@ -1541,33 +1492,27 @@ def get_win_rate_by_order_value_monthly(date_range, platform_filter, chain_filte
     
     # Add platform filter if specified
     platform_where = ""
-    if platform_filter and platform_filter != ["All Platforms"] and "All Platforms" not in platform_filter:
-        if isinstance(platform_filter, list):
+    if platform_filter and "All Platforms" not in platform_filter:
+        if isinstance(platform_filter, (list, tuple)):
             platform_list = "', '".join(platform_filter)
             platform_where = f" AND cs.platform IN ('{platform_list}')"
         else:
             platform_where = f" AND cs.platform = '{platform_filter}'"
     
     # Add chain filter if specified
-    chain_join = ""
     chain_where = ""
-    if chain_filter and chain_filter != ["All Chains"] and "All Chains" not in chain_filter:
-        chain_join = " INNER JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug"
-        if isinstance(chain_filter, list):
+    if chain_filter and "All Chains" not in chain_filter:
+        if isinstance(chain_filter, (list, tuple)):
             chain_list = "', '".join(chain_filter)
-            chain_where = f" AND sm.chain IN ('{chain_list}')"
+            chain_where = f" AND cs.chain IN ('{chain_list}')"
         else:
-            chain_where = f" AND sm.chain = '{chain_filter}'"
-    
-    # Build the SELECT fields dynamically  
-    chain_field = "sm.chain," if chain_join else ""
+            chain_where = f" AND cs.chain = '{chain_filter}'"
     
     query = f"""
     WITH order_value_brackets AS (
         SELECT 
             DATE_TRUNC(cs.chargeback_date, MONTH) as month,
             cs.slug,
-            {chain_field}
             cs.error_category,
             COALESCE(cs.subtotal, 0) as order_value,
             CASE
@@ -1595,19 +1540,18 @@ def get_win_rate_by_order_value_monthly(date_range, platform_filter, chain_filte
             COALESCE(cs.enabled_won_disputes, 0) as won_amount,
             -- Settled from INACCURATE only
             CASE 
-                WHEN UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
+                WHEN {inaccurate_match('cs.error_category')}
                     AND cs.external_status IN ('ACCEPTED', 'DENIED')
                 THEN COALESCE(cs.enabled_customer_refunds, 0)
                 ELSE 0
             END as settled_amount,
             -- Count only INACCURATE disputes
             CASE 
-                WHEN UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
+                WHEN {inaccurate_match('cs.error_category')}
                 THEN 1
                 ELSE 0
             END as is_inaccurate_dispute
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        {chain_join}
+        FROM `merchant_portal_export.chargeback_split_with_chain` cs
         WHERE {base_where}{platform_where}{chain_where}
     ),
     monthly_bracket_summary AS (
@@ -1640,29 +1584,149 @@ def get_win_rate_by_order_value_monthly(date_range, platform_filter, chain_filte
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = run_query(query, inaccurate_category_params())
+        df['value_bracket'] = df['value_bracket'].astype('category')
         return df
     except Exception as e:
         st.error(f"Error loading monthly win rate by order value: {e}")
         return pd.DataFrame()
 
+def format_month_labels(months):
+    """'%b %Y' labels for pivot month columns (date, datetime or Timestamp values, no column-wide to_datetime)"""
+    return [m.strftime('%b %Y') for m in months]
+
+def gradient_css(df, cmap, vmin=None, vmax=None):
+    """Cell CSS for a whole-table colour gradient, for use with Styler.apply(axis=None).
+    vmin/vmax may be scalars or one value per column; text colour flips on dark cells like background_gradient."""
+    values = df.to_numpy(dtype=float, na_value=np.nan)
+    vmin = np.nanmin(values) if vmin is None else np.asarray(vmin, dtype=float)
+    vmax = np.nanmax(values) if vmax is None else np.asarray(vmax, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = np.clip((values - vmin) / (vmax - vmin), 0, 1)
+    rgba = colormaps[cmap](np.nan_to_num(scaled))
+    
+    # Relative luminance (WCAG), same threshold pandas uses for the text colour
+    linear = np.where(rgba[..., :3] <= 0.03928, rgba[..., :3] / 12.92, ((rgba[..., :3] + 0.055) / 1.055) ** 2.4)
+    dark = linear @ np.array([0.2126, 0.7152, 0.0722]) < 0.408
+    
+    css = np.array([f"background-color: {to_hex(c)};" for c in rgba.reshape(-1, 4)]).reshape(values.shape)
+    css = np.char.add(css, np.where(dark, "color: #f1f1f1;", "color: #000000;"))
+    return pd.DataFrame(np.where(np.isnan(values), '', css), index=df.index, columns=df.columns)
+
+# Figure builders return plotly JSON from st.cache_data (like weekly_scorecard.py's trend charts):
+# each rerun gets its own Figure via go.Figure(json.loads(...)), so no figure is shared across sessions.
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def build_filing_rate_bar_figure(ontime_df):
+    """Bar chart of filing rate by platform"""
+    fig_bar = px.bar(
+        ontime_df,
+        x='platform',
+        y='on_time_percentage',
+        title='Dispute Filing Rate by Platform',
+        labels={'on_time_percentage': 'Filing Rate %', 'platform': 'Platform'},
+        color='on_time_percentage',
+        color_continuous_scale='RdYlGn',
+        range_color=[0, 100],
+        text='on_time_percentage'
+    )
+    fig_bar.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig_bar.update_layout(showlegend=False)
+    return fig_bar.to_json()
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def build_filing_status_pie_figure(total_on_time, total_late):
+    """Pie chart of overall filed vs not filed disputes"""
+    pie_data = pd.DataFrame({
+        'status': ['Filed', 'Not Filed'],
+        'count': [total_on_time, total_late]
+    })
+    
+    fig_pie = px.pie(
+        pie_data,
+        values='count',
+        names='status',
+        title='Overall Filed vs Not Filed Disputes',
+        color_discrete_map={
+            'Filed': '#2ecc71',
+            'Not Filed': '#e74c3c'
+        }
+    )
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    return fig_pie.to_json()
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def build_win_rate_cohort_figure(win_rate_cohort_df):
+    """Chain x month win rate heatmap"""
+    win_rate_values = win_rate_cohort_df.to_numpy()
+    
+    # Cell labels formatted once here (blank for chain/months with no data), not by plotly on every redraw
+    win_rate_text = np.where(np.isnan(win_rate_values), '', np.char.mod('%.1f%%', np.nan_to_num(win_rate_values)))
+    
+    fig_wr = go.Figure(data=go.Heatmap(
+        z=win_rate_values,
+        x=win_rate_cohort_df.columns,
+        y=win_rate_cohort_df.index,
+        colorscale='RdYlGn',
+        text=win_rate_text,
+        texttemplate='%{text}',
+        textfont={"size": 10},
+        colorbar=dict(
+            title="Win Rate %"
+        ),
+        zmin=0,
+        zmax=100
+    ))
+    
+    fig_wr.update_layout(
+        title="Win Rate % by Chain and Month",
+        xaxis_title="Month",
+        yaxis_title="Restaurant Chain",
+        height=500,
+        xaxis={'side': 'top'},
+        yaxis={'autorange': 'reversed'}
+    )
+    return fig_wr.to_json()
+
 # Main dashboard
 def main():
-    # Load data
+    # Load data - the queries are independent, so run them concurrently.
+    # Worker threads get the script run context so st.error() inside loaders still renders.
     with st.spinner("Loading inaccurate orders data..."):
-        overall_df = get_overall_recovery(date_range, platform_filter, chain_filter)
-        monthly_df = get_monthly_recovery(date_range, platform_filter, chain_filter)
-        platform_df = get_platform_recovery(date_range, platform_filter, chain_filter)
-        chain_df = get_chain_recovery(date_range, platform_filter, chain_filter)
-        subcategory_df = get_subcategory_recovery(date_range, platform_filter, chain_filter)
-        subcategory_monthly_df = get_subcategory_recovery_monthly(date_range, platform_filter, chain_filter)
-        subcategory_volume_df = get_subcategory_volume_monthly(date_range, platform_filter, chain_filter)
-        order_value_df = get_win_rate_by_order_value(date_range, platform_filter, chain_filter)
-        order_value_monthly_df = get_win_rate_by_order_value_monthly(date_range, platform_filter, chain_filter)
-        platform_trend_df = get_platform_win_rate_trend(date_range, platform_filter, chain_filter)
-        cohort_df = get_cohort_analysis(date_range, platform_filter, chain_filter)
-        win_rate_cohort_df = get_win_rate_cohort(date_range, platform_filter, chain_filter)
-        attention_df = get_chains_requiring_attention(date_range, platform_filter, chain_filter)
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(
+            max_workers=8,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+        ) as executor:
+            filter_args = (date_range, platform_filter, chain_filter)
+            futures = {
+                'overall': executor.submit(get_overall_recovery, *filter_args),
+                'monthly': executor.submit(get_monthly_recovery, *filter_args),
+                'platform': executor.submit(get_platform_recovery, *filter_args),
+                'chain': executor.submit(get_chain_recovery, *filter_args),
+                'subcategory': executor.submit(get_subcategory_recovery, *filter_args),
+                'subcategory_monthly': executor.submit(get_subcategory_recovery_monthly, *filter_args),
+                'subcategory_volume': executor.submit(get_subcategory_volume_monthly, *filter_args),
+                'order_value': executor.submit(get_win_rate_by_order_value, *filter_args),
+                'order_value_monthly': executor.submit(get_win_rate_by_order_value_monthly, *filter_args),
+                'platform_trend': executor.submit(get_platform_win_rate_trend, *filter_args),
+                'cohort': executor.submit(get_cohort_analysis, *filter_args),
+                'win_rate_cohort': executor.submit(get_win_rate_cohort, *filter_args),
+                'attention': executor.submit(get_chains_requiring_attention, *filter_args, date.today()),
+            }
+        
+        overall_df = futures['overall'].result()
+        monthly_df = futures['monthly'].result()
+        platform_df = futures['platform'].result()
+        chain_df = futures['chain'].result()
+        subcategory_df = futures['subcategory'].result()
+        subcategory_monthly_df = futures['subcategory_monthly'].result()
+        subcategory_volume_df = futures['subcategory_volume'].result()
+        order_value_df = futures['order_value'].result()
+        order_value_monthly_df = futures['order_value_monthly'].result()
+        platform_trend_df = futures['platform_trend'].result()
+        cohort_df = futures['cohort'].result()
+        win_rate_cohort_df = futures['win_rate_cohort'].result()
+        attention_df = futures['attention'].result()
     
     # Overall Metrics
     st.header("📊 Overall Recovery Metrics - Inaccurate Orders Only")
@@ -1745,8 +1809,11 @@ def main():
             # Summary metrics
             st.subheader("Key Metrics")
             
+            # Positional best/worst rows (argmax/argmin skip NaN like idxmax/idxmin)
+            win_rates = subcategory_df['win_rate']
+            
             # Top performer
-            best_category = subcategory_df.loc[subcategory_df['win_rate'].idxmax()]
+            best_category = subcategory_df.iloc[win_rates.argmax()]
             st.metric(
                 "Best Performing",
                 f"{best_category['win_rate']:.1f}%",
@@ -1754,7 +1821,7 @@ def main():
             )
             
             # Worst performer
-            worst_category = subcategory_df.loc[subcategory_df['win_rate'].idxmin()]
+            worst_category = subcategory_df.iloc[win_rates.argmin()]
             st.metric(
                 "Needs Attention",
                 f"{worst_category['win_rate']:.1f}%",
@@ -1762,68 +1829,53 @@ def main():
             )
             
             # Volume leader
-            volume_leader = subcategory_df.loc[subcategory_df['settled'].idxmax()]
+            volume_leader = subcategory_df.iloc[subcategory_df['settled'].argmax()]
             st.metric(
                 "Highest Volume",
                 f"${volume_leader['settled']:,.0f}",
                 help=f"{volume_leader['subcategory']}"
             )
         
-        # Detailed table
-        with st.expander("View All Subcategories"):
-            display_sub = subcategory_df.copy()
-            display_sub.columns = ['Subcategory', 'Won ($)', 'Settled ($)', 'Win Rate (%)', 'Locations', 'Disputes']
-            
+        # Detailed table (a toggle rather than an expander, so the table is only built when shown)
+        if st.toggle("View All Subcategories"):
+            # Labels and number formats via column_config (rendered client-side, no Styler)
             st.dataframe(
-                display_sub.style.format({
-                    'Won ($)': '${:,.0f}',
-                    'Settled ($)': '${:,.0f}',
-                    'Win Rate (%)': '{:.1f}%',
-                    'Locations': '{:,.0f}',
-                    'Disputes': '{:,.0f}'
-                }),
+                subcategory_df,
                 use_container_width=True,
-                hide_index=True
+                hide_index=True,
+                column_config={
+                    'subcategory': 'Subcategory',
+                    'won': st.column_config.NumberColumn('Won ($)', format='dollar', step=1),
+                    'settled': st.column_config.NumberColumn('Settled ($)', format='dollar', step=1),
+                    'win_rate': st.column_config.NumberColumn('Win Rate (%)', format='%.1f%%'),
+                    'location_count': st.column_config.NumberColumn('Locations', format='localized', step=1),
+                    'dispute_count': st.column_config.NumberColumn('Disputes', format='localized', step=1)
+                }
             )
         
         # Monthly Recovery Rate by Subcategory Table
         st.subheader("📅 Monthly Recovery Rate by Subcategory")
         
         if not subcategory_monthly_df.empty:
-            # Create pivot table for monthly trends
-            monthly_pivot = subcategory_monthly_df.pivot_table(
-                index='subcategory',
-                columns='month',
-                values='win_rate',
-                fill_value=0
-            )
-            
-            # Get sorted months (chronological order - January to current month)
-            sorted_months = sorted(subcategory_monthly_df['month'].unique(), reverse=False)
-            month_labels = [pd.to_datetime(month).strftime('%b %Y') for month in sorted_months]
+            # Reshape to subcategory x month (rows are already one per subcategory/month);
+            # the row means over all months give the Overall Avg without a separate groupby
+            # (float32 halves the payload sent to the browser; values are shown to 1 decimal)
+            win_rate_wide = subcategory_monthly_df.set_index(['subcategory', 'month'])['win_rate'].unstack().astype('float32')
+            overall_avg = win_rate_wide.mean(axis=1)
             
-            # Limit to last 12 months if needed
-            month_labels = month_labels[-12:] if len(month_labels) > 12 else month_labels
-            sorted_months = sorted_months[-12:] if len(sorted_months) > 12 else sorted_months
+            # Month columns come out of unstack in chronological order, so the last 12 are a positional slice
+            monthly_pivot = win_rate_wide.iloc[:, -12:].fillna(0)
+            monthly_pivot.columns = format_month_labels(monthly_pivot.columns)
             
-            # Filter pivot table to only include the months we want
-            monthly_pivot = monthly_pivot[sorted_months]
-            monthly_pivot.columns = month_labels
+            # Per-month averages, taken before the Overall Avg column is added
+            col_means = monthly_pivot.mean()
             
             # Add overall average column
-            monthly_pivot['Overall Avg'] = subcategory_monthly_df.groupby('subcategory')['win_rate'].mean()
+            monthly_pivot['Overall Avg'] = overall_avg
             
             # Style the dataframe with background gradient
-            styled_monthly = monthly_pivot.style.format('{:.1f}%').background_gradient(
-                cmap='RdYlGn', 
-                vmin=0, 
-                vmax=100,
-                subset=[col for col in monthly_pivot.columns if col != 'Overall Avg']
-            ).background_gradient(
-                cmap='RdYlGn', 
-                vmin=0, 
-                vmax=100,
-                subset=['Overall Avg']
+            styled_monthly = monthly_pivot.style.format('{:.1f}%').apply(
+                gradient_css, axis=None, cmap='RdYlGn', vmin=0, vmax=100
             )
             
             st.dataframe(styled_monthly, use_container_width=True)
@@ -1831,8 +1883,8 @@ def main():
             # Summary statistics
             col1, col2, col3 = st.columns(3)
             with col1:
-                best_month = monthly_pivot.drop('Overall Avg', axis=1).mean().idxmax()
-                best_rate = monthly_pivot.drop('Overall Avg', axis=1).mean().max()
+                best_month = col_means.idxmax()
+                best_rate = col_means.max()
                 st.metric("Best Month", best_month, f"{best_rate:.1f}%")
             
             with col2:
@@ -1841,7 +1893,7 @@ def main():
                 st.metric("Best Subcategory", best_subcategory, f"{best_subcategory_rate:.1f}%")
             
             with col3:
-                overall_trend = "↗️" if monthly_pivot.drop('Overall Avg', axis=1).mean().iloc[-1] > monthly_pivot.drop('Overall Avg', axis=1).mean().iloc[0] else "↘️"
+                overall_trend = "↗️" if col_means.iloc[-1] > col_means.iloc[0] else "↘️"
                 st.metric("Trend", "Overall", overall_trend)
         
         else:
@@ -1851,40 +1903,28 @@ def main():
         st.subheader("📊 Monthly Dispute Volume by Subcategory (%)")
         
         if not subcategory_volume_df.empty:
-            # Create pivot table for volume percentages
-            volume_pivot = subcategory_volume_df.pivot_table(
-                index='subcategory',
-                columns='month',
-                values='percentage',
-                fill_value=0
-            )
-            
-            # Get sorted months (chronological order - January to current month)
-            sorted_months = sorted(subcategory_volume_df['month'].unique(), reverse=False)
-            month_labels = [pd.to_datetime(month).strftime('%b %Y') for month in sorted_months]
+            # Reshape to subcategory x month (rows are already one per subcategory/month);
+            # the row means over all months give the Overall Avg without a separate groupby
+            # (float32 halves the payload sent to the browser; values are shown to 1 decimal)
+            percentage_wide = subcategory_volume_df.set_index(['subcategory', 'month'])['percentage'].unstack().astype('float32')
+            volume_overall_avg = percentage_wide.mean(axis=1)
             
-            # Limit to last 12 months if needed
-            month_labels = month_labels[-12:] if len(month_labels) > 12 else month_labels
-            sorted_months = sorted_months[-12:] if len(sorted_months) > 12 else sorted_months
+            # Month columns come out of unstack in chronological order, so the last 12 are a positional slice
+            volume_pivot = percentage_wide.iloc[:, -12:].fillna(0)
+            volume_pivot.columns = format_month_labels(volume_pivot.columns)
             
-            # Filter pivot table to only include the months we want
-            volume_pivot = volume_pivot[sorted_months]
-            volume_pivot.columns = month_labels
+            # Per-month averages and peak, taken before the Overall Avg column is added
+            volume_col_means = volume_pivot.mean()
+            volume_month_max = volume_pivot.max().max()
             
             # Add overall average column
-            volume_pivot['Overall Avg'] = subcategory_volume_df.groupby('subcategory')['percentage'].mean()
+            volume_pivot['Overall Avg'] = volume_overall_avg
             
             # Style the dataframe with background gradient (different color scheme for volume)
-            styled_volume = volume_pivot.style.format('{:.1f}%').background_gradient(
-                cmap='Blues', 
-                vmin=0, 
-                vmax=volume_pivot.drop('Overall Avg', axis=1).max().max(),
-                subset=[col for col in volume_pivot.columns if col != 'Overall Avg']
-            ).background_gradient(
-                cmap='Blues', 
-                vmin=0, 
-                vmax=volume_pivot['Overall Avg'].max(),
-                subset=['Overall Avg']
+            # Months share one scale, Overall Avg gets its own
+            volume_vmax = np.where(volume_pivot.columns == 'Overall Avg', volume_pivot['Overall Avg'].max(), volume_month_max)
+            styled_volume = volume_pivot.style.format('{:.1f}%').apply(
+                gradient_css, axis=None, cmap='Blues', vmin=0, vmax=volume_vmax
             )
             
             st.dataframe(styled_volume, use_container_width=True)
@@ -1892,8 +1932,8 @@ def main():
             # Summary statistics for volume
             col1, col2, col3 = st.columns(3)
             with col1:
-                peak_month = volume_pivot.drop('Overall Avg', axis=1).mean().idxmax()
-                peak_rate = volume_pivot.drop('Overall Avg', axis=1).mean().max()
+                peak_month = volume_col_means.idxmax()
+                peak_rate = volume_col_means.max()
                 st.metric("Peak Volume Month", peak_month, f"{peak_rate:.1f}%")
             
             with col2:
@@ -1961,8 +2001,11 @@ def main():
             # Summary statistics
             st.subheader("Key Insights")
             
+            # Positional best/worst rows (argmax/argmin skip NaN like idxmax/idxmin)
+            bracket_win_rates = order_value_df['win_rate']
+            
             # Best performing bracket
-            best_bracket = order_value_df.loc[order_value_df['win_rate'].idxmax()]
+            best_bracket = order_value_df.iloc[bracket_win_rates.argmax()]
             st.metric(
                 "Best Performing",
                 best_bracket['value_bracket'],
@@ -1970,7 +2013,7 @@ def main():
             )
             
             # Worst performing bracket
-            worst_bracket = order_value_df.loc[order_value_df['win_rate'].idxmin()]
+            worst_bracket = order_value_df.iloc[bracket_win_rates.argmin()]
             st.metric(
                 "Needs Attention",
                 worst_bracket['value_bracket'],
@@ -1980,7 +2023,7 @@ def main():
             
             # Volume distribution
             total_disputes = order_value_df['total_disputes'].sum()
-            most_disputes = order_value_df.loc[order_value_df['total_disputes'].idxmax()]
+            most_disputes = order_value_df.iloc[order_value_df['total_disputes'].argmax()]
             st.metric(
                 "Highest Volume",
                 most_disputes['value_bracket'],
@@ -1992,46 +2035,35 @@ def main():
             st.subheader("📊 Monthly Win Rate Trend by Order Value")
             st.caption("Win rate percentage by order value bracket over the last 12 months")
             
-            # Pivot the data to create a table with brackets as rows and months as columns
-            order_value_monthly_df['month'] = pd.to_datetime(order_value_monthly_df['month'])
-            order_value_monthly_df['month_label'] = order_value_monthly_df['month'].dt.strftime('%b %Y')
-            
-            # Create pivot table
-            pivot_df = order_value_monthly_df.pivot_table(
-                index='value_bracket',
-                columns='month_label',
-                values='win_rate',
-                aggfunc='first'
-            )
-            
-            # Sort columns by date (oldest first - chronological order)
-            sorted_months = sorted(order_value_monthly_df['month'].unique(), reverse=False)
-            month_labels = [pd.to_datetime(m).strftime('%b %Y') for m in sorted_months]
+            # Pivot to brackets as rows and months as columns (rows are already one per bracket/month);
+            # month columns come out of unstack in chronological order (oldest first)
+            bracket_month_df = order_value_monthly_df.set_index(['value_bracket', 'month'])
+            pivot_df = bracket_month_df['win_rate'].unstack()
             
             # Limit to last 12 months (take from the end since we're in chronological order)
-            month_labels = month_labels[-12:] if len(month_labels) > 12 else month_labels
-            pivot_df = pivot_df[month_labels]
+            pivot_df = pivot_df.iloc[:, -12:].astype('float32')
+            month_labels = format_month_labels(pivot_df.columns)
+            pivot_df.columns = month_labels
             
-            # Sort rows by bracket order
+            # Sort rows by bracket order (the row order is shared with the volume table below)
             bracket_order = ['$0-20', '$20-40', '$40-60', '$60-80', '$80-100', '$100-150', '$150-200', '$200+']
-            pivot_df = pivot_df.reindex([b for b in bracket_order if b in pivot_df.index])
+            bracket_rows = [b for b in bracket_order if b in pivot_df.index]
+            pivot_df = pivot_df.reindex(bracket_rows)
             
             # Create a styled dataframe with color coding
             styled_df = pivot_df.style.format('{:.1f}%', na_rep='-')\
-                .background_gradient(cmap='RdYlGn', vmin=0, vmax=100, axis=None)\
-                .set_properties(**{'text-align': 'center'})
+                .apply(gradient_css, axis=None, cmap='RdYlGn', vmin=0, vmax=100)
             
             st.dataframe(styled_df, use_container_width=True)
             
             # Add a heatmap visualization
-            with st.expander("View as Heatmap"):
+            if st.toggle("View as Heatmap"):
                 fig_heatmap = go.Figure(data=go.Heatmap(
                     z=pivot_df.values,
                     x=pivot_df.columns,
                     y=pivot_df.index,
                     colorscale='RdYlGn',
-                    text=pivot_df.values,
-                    texttemplate='%{text:.1f}%',
+                    texttemplate='%{z:.1f}%',
                     textfont={"size": 10},
                     colorbar=dict(title="Win Rate (%)")
                 ))
@@ -2049,25 +2081,25 @@ def main():
             st.subheader("📊 Monthly Dispute Distribution by Order Value")
             st.caption("Percentage of disputed orders by order value bracket for each month")
             
-            # Create pivot table for dispute counts
-            volume_pivot_df = order_value_monthly_df.pivot_table(
-                index='value_bracket',
-                columns='month_label',
-                values='total_disputes',
-                aggfunc='first'
-            )
+            # Reshape dispute counts the same way
+            volume_pivot_df = bracket_month_df['total_disputes'].unstack().iloc[:, -12:]
             
-            # Use the same sorted months and bracket order
-            volume_pivot_df = volume_pivot_df[month_labels]
-            volume_pivot_df = volume_pivot_df.reindex([b for b in bracket_order if b in volume_pivot_df.index])
+            # Use the same month labels and bracket order
+            volume_pivot_df.columns = month_labels
+            volume_pivot_df = volume_pivot_df.reindex(bracket_rows)
             
             # Convert to percentages - each column (month) should sum to 100%
-            volume_pct_df = volume_pivot_df.div(volume_pivot_df.sum(axis=0), axis=1) * 100
+            # (plain NumPy broadcast; missing bracket/month cells stay NaN and don't count toward the total)
+            volume_counts = volume_pivot_df.to_numpy(dtype='float32', na_value=np.nan)
+            volume_pct_df = pd.DataFrame(
+                volume_counts / np.nansum(volume_counts, axis=0, keepdims=True) * 100,
+                index=volume_pivot_df.index,
+                columns=volume_pivot_df.columns
+            )
             
             # Create a styled dataframe with color coding for percentages
             styled_volume_df = volume_pct_df.style.format('{:.1f}%', na_rep='-')\
-                .background_gradient(cmap='Blues', axis=None)\
-                .set_properties(**{'text-align': 'center'})
+                .apply(gradient_css, axis=None, cmap='Blues')
             
             st.dataframe(styled_volume_df, use_container_width=True)
             
@@ -2083,8 +2115,7 @@ def main():
                 avg_order_value = order_value_df['avg_order_value'].mean() if not order_value_df.empty else 0
                 st.metric("Avg Order Value", f"${avg_order_value:.2f}")
             with col3:
-                highest_volume_bracket = order_value_df.loc[order_value_df['total_disputes'].idxmax(), 'value_bracket'] if not order_value_df.empty else "N/A"
-                st.metric("Highest Volume Bracket", highest_volume_bracket)
+                st.metric("Highest Volume Bracket", most_disputes['value_bracket'])
     
     st.markdown("---")
     
@@ -2101,7 +2132,7 @@ def main():
             y=monthly_df['won'],
             name='Won',
             marker_color='#2ecc71',
-            text=monthly_df['won'].apply(lambda x: f'${x:,.0f}'),
+            texttemplate='$%{y:,.0f}',
             textposition='auto'
         ))
         
@@ -2110,7 +2141,7 @@ def main():
             y=monthly_df['lost'],
             name='Lost',
             marker_color='#e74c3c',
-            text=monthly_df['lost'].apply(lambda x: f'${x:,.0f}'),
+            texttemplate='$%{y:,.0f}',
             textposition='auto'
         ))
         
@@ -2119,7 +2150,7 @@ def main():
             y=monthly_df['pending'],
             name='Pending',
             marker_color='#95a5a6',
-            text=monthly_df['pending'].apply(lambda x: f'${x:,.0f}'),
+            texttemplate='$%{y:,.0f}',
             textposition='auto'
         ))
         
@@ -2146,20 +2177,20 @@ def main():
         st.plotly_chart(fig, use_container_width=True)
         
         # Monthly details table
-        with st.expander("View Monthly Details"):
-            display_df = monthly_df[['month_name', 'total_contested', 'won', 'lost', 'pending', 'win_rate']].copy()
-            display_df.columns = ['Month', 'Contested', 'Won', 'Lost', 'Pending', 'Win Rate %']
-            
+        if st.toggle("View Monthly Details"):
             st.dataframe(
-                display_df.style.format({
-                    'Contested': '${:,.0f}',
-                    'Won': '${:,.0f}',
-                    'Lost': '${:,.0f}',
-                    'Pending': '${:,.0f}',
-                    'Win Rate %': '{:.1f}%'
-                }),
+                monthly_df,
                 use_container_width=True,
-                hide_index=True
+                hide_index=True,
+                column_order=['month_name', 'total_contested', 'won', 'lost', 'pending', 'win_rate'],
+                column_config={
+                    'month_name': 'Month',
+                    'total_contested': st.column_config.NumberColumn('Contested', format='dollar', step=1),
+                    'won': st.column_config.NumberColumn('Won', format='dollar', step=1),
+                    'lost': st.column_config.NumberColumn('Lost', format='dollar', step=1),
+                    'pending': st.column_config.NumberColumn('Pending', format='dollar', step=1),
+                    'win_rate': st.column_config.NumberColumn('Win Rate %', format='%.1f%%')
+                }
             )
     
     st.markdown("---")
@@ -2169,37 +2200,33 @@ def main():
     st.caption("Chains where 3-month win rate is 20% below 12-month average (DoorDash & UberEats only)")
     
     if attention_df is not None and not attention_df.empty:
-        # Format the dataframe for display
-        display_attention = attention_df.copy()
-        display_attention['Alert'] = display_attention.apply(
-            lambda row: "🔴 Critical" if row['decline_percentage'] > 30 else "⚠️ Warning", axis=1
-        )
-        
-        # Select columns to display
-        display_cols = ['chain', 'platform', 'Alert', 'avg_12m_win_rate', 'avg_3m_win_rate', 
-                       'decline_percentage', 'months_of_data', 'total_settled_12m']
-        display_attention = display_attention[display_cols].copy()
-        display_attention.columns = ['Chain', 'Platform', 'Alert', '12M Win Rate %', '3M Win Rate %', 
-                                     'Decline %', 'Months of Data', 'Total Settled ($)']
+        # Format the dataframe for display (attention_df is already a per-run copy from the cache)
+        attention_df['Alert'] = np.where(attention_df['decline_percentage'].to_numpy() > 30, "🔴 Critical", "⚠️ Warning")
         
-        # Apply formatting
+        # Columns are selected, labelled and formatted by st.dataframe
         st.dataframe(
-            display_attention.style.format({
-                '12M Win Rate %': '{:.1f}%',
-                '3M Win Rate %': '{:.1f}%',
-                'Decline %': '-{:.1f}%',
-                'Total Settled ($)': '${:,.0f}'
-            }),
+            attention_df,
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            column_order=['chain', 'platform', 'Alert', 'avg_12m_win_rate', 'avg_3m_win_rate',
+                          'decline_percentage', 'months_of_data', 'total_settled_12m'],
+            column_config={
+                'chain': 'Chain',
+                'platform': 'Platform',
+                'avg_12m_win_rate': st.column_config.NumberColumn('12M Win Rate %', format='%.1f%%'),
+                'avg_3m_win_rate': st.column_config.NumberColumn('3M Win Rate %', format='%.1f%%'),
+                'decline_percentage': st.column_config.NumberColumn('Decline %', format='-%.1f%%'),
+                'months_of_data': 'Months of Data',
+                'total_settled_12m': st.column_config.NumberColumn('Total Settled ($)', format='dollar', step=1)
+            }
         )
         
         # Summary statistics
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Chains Flagged", len(display_attention))
+            st.metric("Chains Flagged", len(attention_df))
         with col2:
-            critical_count = len(display_attention[display_attention['Alert'] == "🔴 Critical"])
+            critical_count = len(attention_df[attention_df['Alert'] == "🔴 Critical"])
             st.metric("Critical (>30% decline)", critical_count)
         with col3:
             avg_decline = attention_df['decline_percentage'].mean()
@@ -2213,21 +2240,19 @@ def main():
     st.header("📈 Platform Win Rate Trends")
     
     if not platform_trend_df.empty:
-        # Create line chart for platform win rates
-        fig_platform = go.Figure()
-        
-        # Add a line for each platform
-        for platform in platform_trend_df['platform'].unique():
-            platform_data = platform_trend_df[platform_trend_df['platform'] == platform]
-            fig_platform.add_trace(go.Scatter(
-                x=platform_data['month'],
-                y=platform_data['win_rate'],
-                mode='lines+markers',
-                name=platform,
-                line=dict(width=2),
-                marker=dict(size=8),
-                hovertemplate='%{y:.1f}%<br>%{x|%b %Y}<extra></extra>'
-            ))
+        # Create line chart for platform win rates (one line per platform)
+        fig_platform = px.line(
+            platform_trend_df,
+            x='month',
+            y='win_rate',
+            color='platform',
+            markers=True
+        )
+        fig_platform.update_traces(
+            line=dict(width=2),
+            marker=dict(size=8),
+            hovertemplate='%{y:.1f}%<br>%{x|%b %Y}<extra></extra>'
+        )
         
         fig_platform.update_layout(
             title="Win Rate Trends by Platform",
@@ -2237,6 +2262,7 @@ def main():
             hovermode='x unified',
             height=400,
             legend=dict(
+                title_text=None,
                 orientation="h",
                 yanchor="bottom",
                 y=1.02,
@@ -2248,23 +2274,26 @@ def main():
         st.plotly_chart(fig_platform, use_container_width=True)
         
         # Summary statistics by platform
-        with st.expander("View Platform Statistics"):
-            platform_summary = platform_trend_df.groupby('platform').agg({
-                'win_rate': ['mean', 'min', 'max'],
-                'total_won': 'sum',
-                'total_settled': 'sum'
-            }).round(2)
-            platform_summary.columns = ['Avg Win Rate %', 'Min Win Rate %', 'Max Win Rate %', 'Total Won $', 'Total Settled $']
+        if st.toggle("View Platform Statistics"):
+            # Named aggregation gives flat columns directly (no MultiIndex to rename)
+            platform_summary = platform_trend_df.groupby('platform', observed=True).agg(
+                avg_win_rate=('win_rate', 'mean'),
+                min_win_rate=('win_rate', 'min'),
+                max_win_rate=('win_rate', 'max'),
+                total_won=('total_won', 'sum'),
+                total_settled=('total_settled', 'sum')
+            ).round(2)
             
             st.dataframe(
-                platform_summary.style.format({
-                    'Avg Win Rate %': '{:.1f}%',
-                    'Min Win Rate %': '{:.1f}%',
-                    'Max Win Rate %': '{:.1f}%',
-                    'Total Won $': '${:,.0f}',
-                    'Total Settled $': '${:,.0f}'
-                }),
-                use_container_width=True
+                platform_summary,
+                use_container_width=True,
+                column_config={
+                    'avg_win_rate': st.column_config.NumberColumn('Avg Win Rate %', format='%.1f%%'),
+                    'min_win_rate': st.column_config.NumberColumn('Min Win Rate %', format='%.1f%%'),
+                    'max_win_rate': st.column_config.NumberColumn('Max Win Rate %', format='%.1f%%'),
+                    'total_won': st.column_config.NumberColumn('Total Won $', format='dollar', step=1),
+                    'total_settled': st.column_config.NumberColumn('Total Settled $', format='dollar', step=1)
+                }
             )
     
     st.markdown("---")
@@ -2312,20 +2341,20 @@ def main():
     if not chain_df.empty:
         st.header("📋 Restaurant Chain Details - Inaccurate Orders")
         
-        display_chain = chain_df[['chain', 'total_contested', 'won', 'lost', 'pending', 'win_rate', 'location_count']].copy()
-        display_chain.columns = ['Chain', 'Contested', 'Won', 'Lost', 'Pending', 'Win Rate %', 'Locations']
-        
         st.dataframe(
-            display_chain.style.format({
-                'Contested': '${:,.0f}',
-                'Won': '${:,.0f}',
-                'Lost': '${:,.0f}',
-                'Pending': '${:,.0f}',
-                'Win Rate %': '{:.1f}%',
-                'Locations': '{:,.0f}'
-            }),
+            chain_df,
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            column_order=['chain', 'total_contested', 'won', 'lost', 'pending', 'win_rate', 'location_count'],
+            column_config={
+                'chain': 'Chain',
+                'total_contested': st.column_config.NumberColumn('Contested', format='dollar', step=1),
+                'won': st.column_config.NumberColumn('Won', format='dollar', step=1),
+                'lost': st.column_config.NumberColumn('Lost', format='dollar', step=1),
+                'pending': st.column_config.NumberColumn('Pending', format='dollar', step=1),
+                'win_rate': st.column_config.NumberColumn('Win Rate %', format='%.1f%%'),
+                'location_count': st.column_config.NumberColumn('Locations', format='localized', step=1)
+            }
         )
     
     st.markdown("---")
@@ -2335,53 +2364,54 @@ def main():
     st.caption("Top 20 chains by total recovery volume - showing average recovery $ per active location per month")
     
     if not cohort_df.empty:
-        # Create heatmap using plotly
-        fig = go.Figure(data=go.Heatmap(
-            z=cohort_df.values,
-            x=cohort_df.columns,
-            y=cohort_df.index,
-            colorscale='RdYlGn',
-            text=cohort_df.values,
-            texttemplate='$%{text:,.0f}',
-            textfont={"size": 10},
-            colorbar=dict(
-                title="$/Location"
-            )
-        ))
-        
-        fig.update_layout(
-            title="Recovery per Location by Chain and Month",
-            xaxis_title="Month",
-            yaxis_title="Restaurant Chain",
-            height=600,
-            xaxis={'side': 'top'},
-            yaxis={'autorange': 'reversed'}
-        )
+        # Raw matrix, shared by the heatmap and the summary metrics
+        cohort_values = cohort_df.to_numpy()
         
-        st.plotly_chart(fig, use_container_width=True)
+        # The chain x month heatmap is the heaviest figure on the page, so only build it on request
+        if st.toggle("Show cohort heatmap"):
+            fig = go.Figure(data=go.Heatmap(
+                z=cohort_values,
+                x=cohort_df.columns,
+                y=cohort_df.index,
+                colorscale='RdYlGn',
+                texttemplate='$%{z:,.0f}',
+                textfont={"size": 10},
+                colorbar=dict(
+                    title="$/Location"
+                )
+            ))
+            
+            fig.update_layout(
+                title="Recovery per Location by Chain and Month",
+                xaxis_title="Month",
+                yaxis_title="Restaurant Chain",
+                height=600,
+                xaxis={'side': 'top'},
+                yaxis={'autorange': 'reversed'}
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
         
         # Show the raw data table
-        with st.expander("📊 View Cohort Data Table"):
+        if st.toggle("📊 View Cohort Data Table"):
             st.caption("Recovery amount per location ($ Won / # Active Locations)")
             
-            # Format the dataframe for display
-            display_cohort = cohort_df.copy()
-            
-            # Apply formatting without background gradient (matplotlib not installed)
+            # Every month column shares the same dollar format
             st.dataframe(
-                display_cohort.style.format('${:,.0f}'),
-                use_container_width=True
+                cohort_df,
+                use_container_width=True,
+                column_config={col: st.column_config.NumberColumn(format='dollar', step=1) for col in cohort_df.columns}
             )
             
             # Summary statistics
             st.caption("Summary Statistics:")
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Average $/Location", f"${cohort_df.mean().mean():,.0f}")
+                st.metric("Average $/Location", f"${np.nanmean(cohort_values):,.0f}")
             with col2:
-                st.metric("Max $/Location", f"${cohort_df.max().max():,.0f}")
+                st.metric("Max $/Location", f"${np.nanmax(cohort_values):,.0f}")
             with col3:
-                st.metric("Min $/Location", f"${cohort_df.min().min():,.0f}")
+                st.metric("Min $/Location", f"${np.nanmin(cohort_values):,.0f}")
     else:
         st.info("No cohort data available for the selected filters.")
     
@@ -2400,84 +2430,60 @@ def main():
     
     with tab1:
         if not ontime_df.empty:
-            # Display metrics by platform
-            cols = st.columns(len(ontime_df))
-            
-            for idx, (col, row) in enumerate(zip(cols, ontime_df.itertuples())):
-                with col:
-                    # Color based on performance
-                    if row.on_time_percentage >= 90:
-                        color = "🟢"
-                    elif row.on_time_percentage >= 75:
-                        color = "🟡"
-                    else:
-                        color = "🔴"
-                    
-                    st.metric(
-                        f"{color} {row.platform}",
-                        f"{row.on_time_percentage:.1f}%",
-                        f"{row.on_time_count:,} of {row.on_time_count + row.late_count:,} disputes",
-                        help="Disputes that have been filed (ACCEPTED/DENIED/IN_PROGRESS) vs not filed (TO_BE_RAISED/EXPIRED)"
-                    )
+            # Display metrics by platform, at most PLATFORMS_PER_ROW per row
+            records = ontime_df[['platform', 'on_time_percentage', 'on_time_count', 'late_count']].to_dict('records')
+            # Filed/not-filed pairs summed once: per platform for the metrics, overall for the pie
+            pair = ontime_df[['on_time_count', 'late_count']].to_numpy('int64')
+            totals_per_row = pair.sum(axis=1)
+            total_on_time, total_late = pair.sum(axis=0)
+            
+            for start in range(0, len(records), PLATFORMS_PER_ROW):
+                row_records = records[start:start + PLATFORMS_PER_ROW]
+                cols = st.columns(len(row_records))
+                for col, r, total in zip(cols, row_records, totals_per_row[start:start + PLATFORMS_PER_ROW]):
+                    with col:
+                        # Color based on performance
+                        if r['on_time_percentage'] >= 90:
+                            color = "🟢"
+                        elif r['on_time_percentage'] >= 75:
+                            color = "🟡"
+                        else:
+                            color = "🔴"
+                        
+                        st.metric(
+                            f"{color} {r['platform']}",
+                            f"{r['on_time_percentage']:.1f}%",
+                            f"{r['on_time_count']:,} of {total:,} disputes",
+                            help="Disputes that have been filed (ACCEPTED/DENIED/IN_PROGRESS) vs not filed (TO_BE_RAISED/EXPIRED)"
+                        )
             
             # Visualization
             col1, col2 = st.columns(2)
             
             with col1:
                 # Bar chart of on-time percentages
-                fig_bar = px.bar(
-                    ontime_df,
-                    x='platform',
-                    y='on_time_percentage',
-                    title='Dispute Filing Rate by Platform',
-                    labels={'on_time_percentage': 'Filing Rate %', 'platform': 'Platform'},
-                    color='on_time_percentage',
-                    color_continuous_scale='RdYlGn',
-                    range_color=[0, 100],
-                    text='on_time_percentage'
-                )
-                fig_bar.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-                fig_bar.update_layout(showlegend=False)
-                st.plotly_chart(fig_bar, use_container_width=True)
+                st.plotly_chart(go.Figure(json.loads(build_filing_rate_bar_figure(ontime_df))), use_container_width=True)
             
             with col2:
                 # Pie chart showing overall on-time vs late
-                total_on_time = ontime_df['on_time_count'].sum()
-                total_late = ontime_df['late_count'].sum()
-                
-                pie_data = pd.DataFrame({
-                    'status': ['Filed', 'Not Filed'],
-                    'count': [total_on_time, total_late]
-                })
-                
-                fig_pie = px.pie(
-                    pie_data,
-                    values='count',
-                    names='status',
-                    title='Overall Filed vs Not Filed Disputes',
-                    color_discrete_map={
-                        'Filed': '#2ecc71',
-                        'Not Filed': '#e74c3c'
-                    }
-                )
-                fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-                st.plotly_chart(fig_pie, use_container_width=True)
+                st.plotly_chart(go.Figure(json.loads(build_filing_status_pie_figure(int(total_on_time), int(total_late)))), use_container_width=True)
             
             # Detailed table
             with st.expander("View Platform Details"):
-                display_df = ontime_df[['platform', 'dispute_window', 'total_count', 'on_time_count', 'late_count', 'on_time_percentage', 'total_amount']].copy()
-                display_df.columns = ['Platform', 'Window (Days)', 'Total Disputes', 'Filed', 'Not Filed', 'Filed %', 'Total Amount']
-                
                 st.dataframe(
-                    display_df.style.format({
-                        'Total Disputes': '{:,.0f}',
-                        'Filed': '{:,.0f}',
-                        'Not Filed': '{:,.0f}',
-                        'Filed %': '{:.1f}%',
-                        'Total Amount': '${:,.0f}'
-                    }),
+                    ontime_df,
                     use_container_width=True,
-                    hide_index=True
+                    hide_index=True,
+                    column_order=['platform', 'dispute_window', 'total_count', 'on_time_count', 'late_count', 'on_time_percentage', 'total_amount'],
+                    column_config={
+                        'platform': 'Platform',
+                        'dispute_window': 'Window (Days)',
+                        'total_count': st.column_config.NumberColumn('Total Disputes', format='localized', step=1),
+                        'on_time_count': st.column_config.NumberColumn('Filed', format='localized', step=1),
+                        'late_count': st.column_config.NumberColumn('Not Filed', format='localized', step=1),
+                        'on_time_percentage': st.column_config.NumberColumn('Filed %', format='%.1f%%'),
+                        'total_amount': st.column_config.NumberColumn('Total Amount', format='dollar', step=1)
+                    }
                 )
     
     with tab2:
@@ -2495,7 +2501,7 @@ def main():
                 y=monthly_filing_df['filing_rate'],
                 mode='lines+markers+text',
                 name='Filing Rate',
-                text=monthly_filing_df['filing_rate'].apply(lambda x: f'{x:.1f}%'),
+                texttemplate='%{y:.1f}%',
                 textposition="top center",
                 line=dict(color='#2ecc71', width=3),
                 marker=dict(size=10)
@@ -2566,28 +2572,38 @@ def main():
                          delta=f"{recent_trend - avg_filing_rate:.1f}%")
                 
                 # Best and worst months
-                best_month = monthly_filing_df.loc[monthly_filing_df['filing_rate'].idxmax()]
-                worst_month = monthly_filing_df.loc[monthly_filing_df['filing_rate'].idxmin()]
+                filing_rates = monthly_filing_df['filing_rate']
+                best_month = monthly_filing_df.iloc[filing_rates.argmax()]
+                worst_month = monthly_filing_df.iloc[filing_rates.argmin()]
                 
                 st.success(f"🏆 Best Month: {best_month['month'].strftime('%b %Y')} ({best_month['filing_rate']:.1f}%)")
                 st.error(f"⚠️ Worst Month: {worst_month['month'].strftime('%b %Y')} ({worst_month['filing_rate']:.1f}%)")
             
             # Detailed monthly table
             with st.expander("📋 View Monthly Details"):
-                display_monthly = monthly_filing_df[['month_label', 'filed_count', 'not_filed_count', 
-                                                     'total_count', 'filing_rate', 'total_amount']].copy()
-                display_monthly.columns = ['Month', 'Filed', 'Not Filed', 'Total', 'Filing Rate %', 'Total Amount']
-                
                 # Apply background gradient to filing rate
-                styled_monthly = display_monthly.style.format({
-                    'Filed': '{:,.0f}',
-                    'Not Filed': '{:,.0f}',
-                    'Total': '{:,.0f}',
-                    'Filing Rate %': '{:.1f}%',
-                    'Total Amount': '${:,.0f}'
-                }).background_gradient(subset=['Filing Rate %'], cmap='RdYlGn', vmin=0, vmax=100)
+                styled_monthly = monthly_filing_df.style.format({
+                    'filed_count': '{:,.0f}',
+                    'not_filed_count': '{:,.0f}',
+                    'total_count': '{:,.0f}',
+                    'filing_rate': '{:.1f}%',
+                    'total_amount': '${:,.0f}'
+                }).background_gradient(subset=['filing_rate'], cmap='RdYlGn', vmin=0, vmax=100)
                 
-                st.dataframe(styled_monthly, use_container_width=True, hide_index=True)
+                st.dataframe(
+                    styled_monthly,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_order=['month_label', 'filed_count', 'not_filed_count', 'total_count', 'filing_rate', 'total_amount'],
+                    column_config={
+                        'month_label': 'Month',
+                        'filed_count': 'Filed',
+                        'not_filed_count': 'Not Filed',
+                        'total_count': 'Total',
+                        'filing_rate': 'Filing Rate %',
+                        'total_amount': 'Total Amount'
+                    }
+                )
     
     st.markdown("---")
     
@@ -2596,55 +2612,32 @@ def main():
     st.caption("Top 10 chains by settled volume - showing win rates (%) by month")
     
     if not win_rate_cohort_df.empty:
-        # Create heatmap for win rates
-        fig_wr = go.Figure(data=go.Heatmap(
-            z=win_rate_cohort_df.values,
-            x=win_rate_cohort_df.columns,
-            y=win_rate_cohort_df.index,
-            colorscale='RdYlGn',
-            text=win_rate_cohort_df.values,
-            texttemplate='%{text:.1f}%',
-            textfont={"size": 10},
-            colorbar=dict(
-                title="Win Rate %"
-            ),
-            zmin=0,
-            zmax=100
-        ))
-        
-        fig_wr.update_layout(
-            title="Win Rate % by Chain and Month",
-            xaxis_title="Month",
-            yaxis_title="Restaurant Chain",
-            height=500,
-            xaxis={'side': 'top'},
-            yaxis={'autorange': 'reversed'}
-        )
+        # Raw matrix for the summary metrics
+        win_rate_values = win_rate_cohort_df.to_numpy()
         
-        st.plotly_chart(fig_wr, use_container_width=True)
+        # Create heatmap for win rates
+        st.plotly_chart(go.Figure(json.loads(build_win_rate_cohort_figure(win_rate_cohort_df))), use_container_width=True)
         
         # Show the raw data table
         with st.expander("📊 View Win Rate Data Table"):
             st.caption("Monthly win rates (%) for top 10 chains")
             
-            # Format the dataframe for display
-            display_win_rate = win_rate_cohort_df.copy()
-            
-            # Apply formatting
+            # Every month column shares the same percentage format
             st.dataframe(
-                display_win_rate.style.format('{:.1f}%'),
-                use_container_width=True
+                win_rate_cohort_df,
+                use_container_width=True,
+                column_config={col: st.column_config.NumberColumn(format='%.1f%%') for col in win_rate_cohort_df.columns}
             )
             
             # Summary statistics
             st.caption("Summary Statistics:")
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Average Win Rate", f"{win_rate_cohort_df.mean().mean():.1f}%")
+                st.metric("Average Win Rate", f"{np.nanmean(win_rate_values):.1f}%")
             with col2:
-                st.metric("Max Win Rate", f"{win_rate_cohort_df.max().max():.1f}%")
+                st.metric("Max Win Rate", f"{np.nanmax(win_rate_values):.1f}%")
             with col3:
-                st.metric("Min Win Rate", f"{win_rate_cohort_df.min().min():.1f}%")
+                st.metric("Min Win Rate", f"{np.nanmin(win_rate_values):.1f}%")
     else:
         st.info("No win rate cohort data available for the selected filters.")
 
@@ -310,17 +310,16 @@ print("-" * 40)
 
 location_query1 = f"""
 SELECT
-    COUNT(DISTINCT CONCAT(chain, b_name)) as locations_from_enriched
-FROM `merchant_portal_export.chargeback_orders_enriched`
+    COUNT(DISTINCT loc_fp) as locations_from_enriched
+FROM `merchant_portal_export.loop_enabled_orders`
 WHERE order_date BETWEEN '{last_30_start}' AND '{last_30_end}'
-    AND is_loop_enabled = true
-    AND loop_raised_timestamp IS NOT NULL
 """
 
 location_query2 = f"""
 SELECT
     COUNT(DISTINCT sm.slug) as unique_slugs,
-    COUNT(DISTINCT CONCAT(sm.chain, sm.b_name)) as unique_chain_bname
+    -- STRUCT avoids building a string per row; the IF keeps CONCAT's skipping of NULL parts
+    COUNT(DISTINCT IF(sm.chain IS NULL OR sm.b_name IS NULL, NULL, STRUCT(sm.chain, sm.b_name))) as unique_chain_bname
 FROM `merchant_portal_export.chargeback_split_summary` cs
 JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
 WHERE cs.chargeback_date BETWEEN '{last_30_start}' AND '{last_30_end}'
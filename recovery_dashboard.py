@@ -149,7 +149,7 @@ def get_monthly_performance(days_back=90):
     """
     
     credentials = get_credentials()
-    df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+    df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
     
     df['month'] = pd.to_datetime(df['month'])
     return df
@@ -194,7 +194,7 @@ def get_platform_performance():
     """
     
     credentials = get_credentials()
-    return pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+    return pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
 
 @st.cache_data(ttl=3600)
 def get_location_profitability():
@@ -225,7 +225,7 @@ def get_location_profitability():
     """
     
     credentials = get_credentials()
-    return pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+    return pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
 
 @st.cache_data(ttl=3600)
 def get_daily_trend(days=30):
@@ -244,7 +244,7 @@ def get_daily_trend(days=30):
     """
     
     credentials = get_credentials()
-    df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+    df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
     df['chargeback_date'] = pd.to_datetime(df['chargeback_date'])
     return df
 
@@ -287,7 +287,7 @@ def get_top_chains():
     """
     
     credentials = get_credentials()
-    return pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+    return pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
 
 # ============================================
 # DASHBOARD LAYOUT
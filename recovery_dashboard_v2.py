@@ -21,14 +21,18 @@ st.set_page_config(
 )
 
 # Authentication
-if 'gcp_service_account' in st.secrets:
-    credentials = service_account.Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"]
-    )
-else:
+@st.cache_resource
+def load_credentials():
+    """Service account credentials, parsed once per process rather than on every rerun"""
+    if 'gcp_service_account' in st.secrets:
+        return service_account.Credentials.from_service_account_info(
+            st.secrets["gcp_service_account"]
+        )
     os.environ['GOOGLE_AUTH_DISABLE_METADATA_SERVER'] = 'True'
     os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = ''
-    credentials = None
+    return None
+
+credentials = load_credentials()
 
 # Configuration
 PROJECT_ID = 'arboreal-vision-339901'
@@ -78,7 +82,7 @@ def get_platforms():
     ORDER BY platform
     """
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df['platform'].tolist()
     except:
         return []
@@ -96,7 +100,7 @@ def get_chains():
     ORDER BY sm.chain
     """
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df['chain'].tolist()
     except:
         return []
@@ -241,7 +245,7 @@ def get_overall_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         if not df.empty:
             row = df.iloc[0]
             # Calculate lost as Settled - Won
@@ -333,7 +337,7 @@ def get_monthly_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         df['month'] = pd.to_datetime(df['month'])
         df['month_name'] = df['month'].dt.strftime('%B %Y')
         
@@ -420,7 +424,7 @@ def get_platform_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         
         # Calculate lost as Settled - Won
         df['lost'] = df['settled'] - df['won']
@@ -514,7 +518,7 @@ def get_chain_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         
         # Calculate lost as Settled - Won
         df['lost'] = df['settled'] - df['won']
@@ -590,7 +594,7 @@ def get_platform_win_rate_trend(date_range, platform_filter=None, chain_filter=N
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         if not df.empty:
             df['month'] = pd.to_datetime(df['month'])
             df['month_str'] = df['month'].dt.strftime('%b %Y')
@@ -665,7 +669,7 @@ def get_subcategory_recovery(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading subcategory recovery: {e}")
@@ -737,7 +741,7 @@ def get_subcategory_recovery_monthly(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading monthly subcategory recovery: {e}")
@@ -807,7 +811,7 @@ def get_subcategory_volume_monthly(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading monthly subcategory volume: {e}")
@@ -840,7 +844,7 @@ def get_status_breakdown(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading status breakdown: {e}")
@@ -914,7 +918,7 @@ def get_cohort_analysis(date_range, platform_filter=None, chain_filter=None):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         
         if not df.empty:
             # Pivot the data to create cohort matrix
@@ -1021,7 +1025,7 @@ def get_ontime_dispute_analysis(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading on-time dispute analysis: {e}")
@@ -1090,7 +1094,7 @@ def get_expiry_analysis(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading expiry analysis: {e}")
@@ -1198,7 +1202,7 @@ def get_chains_requiring_attention(date_range, platform_filter=None, chain_filte
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading attention-required chains: {str(e)}")
@@ -1280,7 +1284,7 @@ def get_win_rate_cohort(date_range, platform_filter=None, chain_filter=None):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         
         if not df.empty:
             # Pivot the data to create win rate matrix
@@ -1426,7 +1430,7 @@ def get_win_rate_by_order_value(date_range, platform_filter, chain_filter):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading win rate by order value: {e}")
@@ -1548,7 +1552,7 @@ def get_win_rate_by_order_value_monthly(date_range, platform_filter, chain_filte
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading monthly win rate by order value: {e}")
@@ -0,0 +1,44 @@
+-- P0-P4 chain segmentation over the last 30 days of loop_enabled_orders.
+-- Read by weekly_scorecard.py instead of re-ranking every chain on each
+-- page load (chains movement, segment performance and segment breakdowns).
+--
+-- A materialized view cannot be used here: they allow neither
+-- CURRENT_DATE() nor analytic functions such as ROW_NUMBER(). Save this as
+-- a BigQuery scheduled query running daily (e.g. 06:00 UTC) in project
+-- arboreal-vision-339901; each run rebuilds the table in place.
+-- Segment boundaries must match get_chain_segmentation() in
+-- weekly_scorecard.py.
+
+CREATE OR REPLACE TABLE `merchant_portal_export.chain_segments_daily`
+CLUSTER BY chain
+AS
+WITH chain_sizes AS (
+    SELECT
+        chain,
+        COUNT(DISTINCT loc_fp) as location_count
+    FROM `merchant_portal_export.loop_enabled_orders`
+    WHERE order_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
+        AND chain IS NOT NULL
+        AND chain != ''
+    GROUP BY chain
+),
+ranked_chains AS (
+    SELECT
+        chain,
+        location_count,
+        ROW_NUMBER() OVER (ORDER BY location_count DESC) as rank_by_locations
+    FROM chain_sizes
+)
+SELECT
+    chain,
+    location_count,
+    rank_by_locations,
+    CASE
+        WHEN rank_by_locations <= 15 THEN 'P0'
+        WHEN rank_by_locations <= 40 THEN 'P1'
+        WHEN rank_by_locations <= 70 THEN 'P2'
+        WHEN rank_by_locations <= 132 THEN 'P3'
+        ELSE 'P4'
+    END as segment,
+    CURRENT_DATE() as segmented_on
+FROM ranked_chains;
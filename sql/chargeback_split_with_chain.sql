@@ -0,0 +1,28 @@
+-- Pre-joined chargeback split summary with chain attached.
+-- Used by the chain-level queries in inaccurate_orders_dashboard.py so they
+-- no longer join slug_am_mapping at query time.
+--
+-- Run once in project arboreal-vision-339901. LEFT JOIN keeps unmapped slugs
+-- (chain IS NULL) so unfiltered platform-level queries see every row.
+-- LEFT JOIN materialized views are non-incremental, hence the
+-- allow_non_incremental_definition / max_staleness options.
+-- PARTITION BY needs the base table partitioned on chargeback_date, so it
+-- reads the partitioned copy kept by partition_chargeback_split_summary.sql;
+-- run (and schedule) that first.
+
+CREATE OR REPLACE MATERIALIZED VIEW `merchant_portal_export.chargeback_split_with_chain`
+PARTITION BY chargeback_date
+CLUSTER BY chain, platform
+OPTIONS (
+    allow_non_incremental_definition = true,
+    max_staleness = INTERVAL "1:0:0" HOUR TO SECOND,
+    enable_refresh = true,
+    refresh_interval_minutes = 60
+)
+AS
+SELECT
+    cs.*,
+    sm.chain
+FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
+LEFT JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm
+    USING (slug);
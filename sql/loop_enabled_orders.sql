@@ -0,0 +1,32 @@
+-- Loop-enabled, raised orders from chargeback_orders_enriched.
+-- Used for every location count in weekly_scorecard.py and the test_*.py
+-- location checks, which all applied the same is_loop_enabled /
+-- loop_raised_timestamp filter to the base table.
+--
+-- loc_fp is an INT64 fingerprint of chain + b_name so location counts are
+-- COUNT(DISTINCT loc_fp) rather than a distinct over concatenated strings.
+-- It is NULL when chain or b_name is NULL, as CONCAT was, so those rows are
+-- still not counted.
+--
+-- Run once in project arboreal-vision-339901. Filter/projection-only views
+-- refresh incrementally. PARTITION BY needs the base table partitioned on
+-- order_date, so it reads the partitioned copy kept by
+-- partition_chargeback_orders_enriched.sql; run (and schedule) that first.
+
+CREATE OR REPLACE MATERIALIZED VIEW `merchant_portal_export.loop_enabled_orders`
+PARTITION BY order_date
+CLUSTER BY chain, platform
+OPTIONS (
+    enable_refresh = true,
+    refresh_interval_minutes = 60
+)
+AS
+SELECT
+    order_date,
+    chain,
+    b_name,
+    platform,
+    FARM_FINGERPRINT(CONCAT(chain, '|', b_name)) as loc_fp
+FROM `merchant_portal_export.chargeback_orders_enriched_partitioned`
+WHERE is_loop_enabled = true
+    AND loop_raised_timestamp IS NOT NULL;
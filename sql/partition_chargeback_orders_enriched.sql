@@ -0,0 +1,29 @@
+-- Partitioned copy of chargeback_orders_enriched, by order_date and
+-- clustered by (chain, platform), matching the location-count predicates
+-- (order_date range, chain / platform filters).
+--
+-- Same side-by-side copy as partition_chargeback_split_summary.sql: the
+-- source table belongs to the upstream pipeline and is left untouched.
+-- Run in project arboreal-vision-339901 as a scheduled query after each
+-- upstream load. The first run creates chargeback_orders_enriched_partitioned;
+-- every run reloads it in one transaction, so the loop_enabled_orders
+-- materialized view built on it stays bound to the same table.
+-- If the source schema changes, drop the copy and let the next run rebuild it.
+
+CREATE TABLE IF NOT EXISTS `merchant_portal_export.chargeback_orders_enriched_partitioned`
+PARTITION BY order_date
+CLUSTER BY chain, platform
+AS
+SELECT *
+FROM `merchant_portal_export.chargeback_orders_enriched`
+WHERE FALSE;
+
+BEGIN TRANSACTION;
+
+DELETE FROM `merchant_portal_export.chargeback_orders_enriched_partitioned` WHERE TRUE;
+
+INSERT INTO `merchant_portal_export.chargeback_orders_enriched_partitioned`
+SELECT *
+FROM `merchant_portal_export.chargeback_orders_enriched`;
+
+COMMIT TRANSACTION;
@@ -0,0 +1,32 @@
+-- Partitioned copy of chargeback_split_summary, by chargeback_date and
+-- clustered by (platform, error_category), matching the dashboard
+-- predicates (chargeback_date range, platform IN, error_category IN).
+--
+-- CREATE OR REPLACE TABLE cannot change an existing table's partitioning
+-- spec, and the source table is owned by the upstream load, so it is left
+-- untouched: this builds chargeback_split_summary_partitioned next to it.
+-- Run in project arboreal-vision-339901 as a scheduled query after each
+-- upstream load. The first run creates the copy; every run reloads it in one
+-- transaction, so the table (and the chargeback_split_with_chain
+-- materialized view built on it) keeps its identity, IAM and history.
+-- weekly_scorecard.py and inaccurate_orders_dashboard.py read this copy (or
+-- the view on it) for every query, so each page reads a single snapshot.
+-- If the source schema changes, drop the copy and let the next run rebuild it.
+
+CREATE TABLE IF NOT EXISTS `merchant_portal_export.chargeback_split_summary_partitioned`
+PARTITION BY chargeback_date
+CLUSTER BY platform, error_category
+AS
+SELECT *
+FROM `merchant_portal_export.chargeback_split_summary`
+WHERE FALSE;
+
+BEGIN TRANSACTION;
+
+DELETE FROM `merchant_portal_export.chargeback_split_summary_partitioned` WHERE TRUE;
+
+INSERT INTO `merchant_portal_export.chargeback_split_summary_partitioned`
+SELECT *
+FROM `merchant_portal_export.chargeback_split_summary`;
+
+COMMIT TRANSACTION;
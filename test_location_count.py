@@ -3,9 +3,10 @@ Test script to verify location count calculation is fixed
 """
 
 import pandas as pd
-import pandas_gbq
+from google.cloud import bigquery
 from datetime import date
 import os
+from functools import lru_cache
 
 # Configuration
 PROJECT_ID = 'arboreal-vision-339901'
@@ -14,21 +15,32 @@ PROJECT_ID = 'arboreal-vision-339901'
 os.environ['GOOGLE_AUTH_DISABLE_METADATA_SERVER'] = 'True'
 os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = ''
 
+# One client for the whole run; results stream over the BigQuery Storage API (Arrow) instead of REST pages
+bq_client = bigquery.Client(project=PROJECT_ID)
+
+@lru_cache(maxsize=None)
+def run_bq(query, params=()):
+    """Run a query once per process; repeats of the exact same SQL and params reuse the first result"""
+    # Dates go in as named DATE parameters so the SQL text (and BigQuery's result cache key) stays fixed
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter(name, 'DATE', value) for name, value in params
+    ])
+    return bq_client.query(query, job_config=job_config).to_dataframe(create_bqstorage_client=True)
+
 def test_location_count():
     """Test the location count with the correct query"""
 
     # Test date range
     start_date = '2025-08-01'
     end_date = '2025-09-30'
+    params = (('start_date', start_date), ('end_date', end_date))
 
     # The correct query provided by the user
-    query = f"""
+    query = """
     SELECT
-        COUNT(DISTINCT CONCAT(chain, b_name)) as location_count
-    FROM `merchant_portal_export.chargeback_orders_enriched`
-    WHERE order_date BETWEEN '{start_date}' AND '{end_date}'
-        AND is_loop_enabled = true
-        AND loop_raised_timestamp IS NOT NULL
+        COUNT(DISTINCT loc_fp) as location_count
+    FROM `merchant_portal_export.loop_enabled_orders`
+    WHERE order_date BETWEEN @start_date AND @end_date
     """
 
     print(f"Testing location count for period: {start_date} to {end_date}")
@@ -37,7 +49,7 @@ def test_location_count():
     print("\n" + "="*50)
 
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID)
+        df = run_bq(query, params)
         if not df.empty:
             location_count = df.iloc[0]['location_count']
             print(f"✓ Location count: {location_count:,}")
@@ -54,15 +66,16 @@ def compare_old_vs_new():
 
     start_date = '2025-09-01'
     end_date = '2025-09-30'
+    params = (('start_date', start_date), ('end_date', end_date))
 
     # Old method (counting b_name_id from chargeback_split_summary)
-    old_query = f"""
+    old_query = """
     WITH monthly_data AS (
         SELECT
             sm.b_name_id
         FROM `merchant_portal_export.chargeback_split_summary` cs
         JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date BETWEEN '{start_date}' AND '{end_date}'
+        WHERE cs.chargeback_date BETWEEN @start_date AND @end_date
             AND sm.chain IS NOT NULL
             AND sm.chain != ''
     )
@@ -71,13 +84,11 @@ def compare_old_vs_new():
     """
 
     # New method (your correct query)
-    new_query = f"""
+    new_query = """
     SELECT
-        COUNT(DISTINCT CONCAT(chain, b_name)) as location_count
-    FROM `merchant_portal_export.chargeback_orders_enriched`
-    WHERE order_date BETWEEN '{start_date}' AND '{end_date}'
-        AND is_loop_enabled = true
-        AND loop_raised_timestamp IS NOT NULL
+        COUNT(DISTINCT loc_fp) as location_count
+    FROM `merchant_portal_export.loop_enabled_orders`
+    WHERE order_date BETWEEN @start_date AND @end_date
     """
 
     print(f"\nComparing methods for September 2025:")
@@ -86,7 +97,7 @@ def compare_old_vs_new():
     # Run old query
     print("\n1. OLD METHOD (b_name_id from chargeback_split_summary):")
     try:
-        df_old = pandas_gbq.read_gbq(old_query, project_id=PROJECT_ID)
+        df_old = run_bq(old_query, params)
         old_count = df_old.iloc[0]['location_count'] if not df_old.empty else 0
         print(f"   Count: {old_count:,}")
     except Exception as e:
@@ -94,9 +105,9 @@ def compare_old_vs_new():
         old_count = None
 
     # Run new query
-    print("\n2. NEW METHOD (chain + b_name from chargeback_orders_enriched):")
+    print("\n2. NEW METHOD (chain + b_name from loop_enabled_orders):")
     try:
-        df_new = pandas_gbq.read_gbq(new_query, project_id=PROJECT_ID)
+        df_new = run_bq(new_query, params)
         new_count = df_new.iloc[0]['location_count'] if not df_new.empty else 0
         print(f"   Count: {new_count:,}")
     except Exception as e:
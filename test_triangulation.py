@@ -4,79 +4,114 @@ This ensures all sections are using the same location counting methodology
 """
 
 import pandas as pd
-import pandas_gbq
+from google.cloud import bigquery
 from datetime import date, timedelta
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Configuration
 PROJECT_ID = 'arboreal-vision-339901'
 
+# False: location counts use BigQuery's HLL++ APPROX_COUNT_DISTINCT (<1% error, much cheaper).
+# Segmentation and reconciliation always count exactly.
+EXACT_COUNTS = False
+
 # Disable metadata server for local development
 os.environ['GOOGLE_AUTH_DISABLE_METADATA_SERVER'] = 'True'
 os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = ''
 
+# One client for the whole run; results stream over the BigQuery Storage API (Arrow) instead of REST pages
+bq_client = bigquery.Client(project=PROJECT_ID)
+
+@lru_cache(maxsize=None)
+def run_bq(query, params=()):
+    """Run a query once per process; repeats of the exact same SQL and params reuse the first result"""
+    # Dates go in as named DATE parameters so the SQL text (and BigQuery's result cache key) stays fixed
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter(name, 'DATE', value) for name, value in params
+    ])
+    return bq_client.query(query, job_config=job_config).to_dataframe(create_bqstorage_client=True)
+
+def location_count_sql():
+    """Distinct chain + b_name count, exact or approximate depending on EXACT_COUNTS"""
+    if EXACT_COUNTS:
+        return "COUNT(DISTINCT loc_fp)"
+    return "APPROX_COUNT_DISTINCT(loc_fp)"
+
 # Test date ranges
 current_month_start = date(2025, 9, 1)
 current_month_end = date(2025, 9, 30)
 last_30_days_start = date.today() - timedelta(days=30)
+current_month_params = (('start_date', current_month_start), ('end_date', current_month_end))
+trend_months = [
+    ('2025-07-01', '2025-07-31', 'July 2025'),
+    ('2025-08-01', '2025-08-31', 'August 2025'),
+    ('2025-09-01', '2025-09-30', 'September 2025')
+]
 
-def test_base_location_count():
-    """Test 1: Base location count from chargeback_orders_enriched"""
+def location_counts_query():
+    """Total, per-chain and per-platform location counts for the current month from a single scan (Tests 1-3)"""
 
     query = f"""
     SELECT
-        COUNT(DISTINCT CONCAT(chain, b_name)) as total_locations,
+        CASE
+            WHEN GROUPING(chain) = 0 THEN 'chain'
+            WHEN GROUPING(platform) = 0 THEN 'platform'
+            ELSE 'total'
+        END as grouping_level,
+        chain,
+        platform,
+        {location_count_sql()} as location_count,
         COUNT(DISTINCT chain) as unique_chains,
         COUNT(DISTINCT b_name) as unique_b_names
-    FROM `merchant_portal_export.chargeback_orders_enriched`
-    WHERE order_date BETWEEN '{current_month_start}' AND '{current_month_end}'
-        AND is_loop_enabled = true
-        AND loop_raised_timestamp IS NOT NULL
+    FROM `merchant_portal_export.loop_enabled_orders`
+    WHERE order_date BETWEEN @start_date AND @end_date
+    GROUP BY GROUPING SETS ((), (chain), (platform))
     """
+    return query, current_month_params
+
+def location_counts_by_grouping():
+    """Grouped location counts shared by Tests 1-3"""
+
+    # run_bq memoizes on the SQL text and params, so Tests 1-3 share one BigQuery job
+    return run_bq(*location_counts_query())
+
+def test_base_location_count():
+    """Test 1: Base location count from loop_enabled_orders"""
 
     print("\n" + "="*60)
     print("TEST 1: BASE LOCATION COUNT (September 2025)")
     print("="*60)
 
-    df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID)
+    df = location_counts_by_grouping()
+    df = df[df['grouping_level'] == 'total']
     if not df.empty:
         row = df.iloc[0]
-        print(f"Total Locations (chain + b_name): {row['total_locations']:,}")
+        print(f"Total Locations (chain + b_name): {row['location_count']:,}")
         print(f"Unique Chains: {row['unique_chains']:,}")
         print(f"Unique B_Names: {row['unique_b_names']:,}")
-        return row['total_locations']
+        return row['location_count']
     return 0
 
 def test_location_by_chain():
     """Test 2: Location count by chain (top 10)"""
 
-    query = f"""
-    SELECT
-        chain,
-        COUNT(DISTINCT CONCAT(chain, b_name)) as location_count
-    FROM `merchant_portal_export.chargeback_orders_enriched`
-    WHERE order_date BETWEEN '{current_month_start}' AND '{current_month_end}'
-        AND is_loop_enabled = true
-        AND loop_raised_timestamp IS NOT NULL
-        AND chain IS NOT NULL
-        AND chain != ''
-    GROUP BY chain
-    ORDER BY location_count DESC
-    LIMIT 10
-    """
-
     print("\n" + "="*60)
     print("TEST 2: TOP 10 CHAINS BY LOCATION COUNT")
     print("="*60)
 
-    df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID)
+    df = location_counts_by_grouping()
+    df = df[(df['grouping_level'] == 'chain') & df['chain'].notna() & (df['chain'] != '')]
+    df = df.sort_values('location_count', ascending=False).head(10)
     if not df.empty:
         print("\n{:<40} {:>15}".format("Chain", "Locations"))
         print("-"*55)
-        total = 0
-        for _, row in df.iterrows():
-            print("{:<40} {:>15,}".format(row['chain'][:40], int(row['location_count'])))
-            total += row['location_count']
+        print(df[['chain', 'location_count']].to_string(index=False, header=False, formatters={
+            'chain': lambda chain: "{:<40}".format(chain[:40]),
+            'location_count': "{:>15,}".format,
+        }))
+        total = df['location_count'].sum()
         print("-"*55)
         print("{:<40} {:>15,}".format("Top 10 Total:", total))
         return total
@@ -85,47 +120,35 @@ def test_location_by_chain():
 def test_location_by_platform():
     """Test 3: Location count by platform"""
 
-    query = f"""
-    SELECT
-        platform,
-        COUNT(DISTINCT CONCAT(chain, b_name)) as location_count
-    FROM `merchant_portal_export.chargeback_orders_enriched`
-    WHERE order_date BETWEEN '{current_month_start}' AND '{current_month_end}'
-        AND is_loop_enabled = true
-        AND loop_raised_timestamp IS NOT NULL
-    GROUP BY platform
-    ORDER BY platform
-    """
-
     print("\n" + "="*60)
     print("TEST 3: LOCATION COUNT BY PLATFORM")
     print("="*60)
 
-    df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID)
+    df = location_counts_by_grouping()
+    df = df[df['grouping_level'] == 'platform'].sort_values('platform', na_position='first')[['platform', 'location_count']]
     if not df.empty:
         print("\n{:<20} {:>15}".format("Platform", "Locations"))
         print("-"*35)
-        total = 0
-        for _, row in df.iterrows():
-            print("{:<20} {:>15,}".format(row['platform'], int(row['location_count'])))
-            total += row['location_count']
+        print(df.to_string(index=False, header=False, formatters={
+            'platform': "{:<20}".format,
+            'location_count': "{:>15,}".format,
+        }))
+        total = df['location_count'].sum()
         print("-"*35)
         print("{:<20} {:>15,}".format("Total:", total))
         return df
     return pd.DataFrame()
 
-def test_segmentation_consistency():
-    """Test 4: Verify P0-P4 segmentation is consistent"""
+def segmentation_query():
+    """P0-P4 segment totals over the last 30 days (Test 4)"""
 
-    query = f"""
+    query = """
     WITH chain_locations AS (
         SELECT
             chain,
-            COUNT(DISTINCT CONCAT(chain, b_name)) as location_count
-        FROM `merchant_portal_export.chargeback_orders_enriched`
+            COUNT(DISTINCT loc_fp) as location_count
+        FROM `merchant_portal_export.loop_enabled_orders`
         WHERE order_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-            AND is_loop_enabled = true
-            AND loop_raised_timestamp IS NOT NULL
             AND chain IS NOT NULL
             AND chain != ''
         GROUP BY chain
@@ -157,33 +180,49 @@ def test_segmentation_consistency():
     FROM segmented
     ORDER BY segment
     """
+    return query, ()
+
+def test_segmentation_consistency():
+    """Test 4: Verify P0-P4 segmentation is consistent"""
 
     print("\n" + "="*60)
     print("TEST 4: P0-P4 SEGMENTATION CONSISTENCY")
     print("="*60)
 
-    df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID)
+    df = run_bq(*segmentation_query())
     if not df.empty:
         print("\n{:<10} {:<12} {:<15} {:<12} {:<12}".format(
             "Segment", "Chains", "Total Locs", "Min Locs", "Max Locs"))
         print("-"*61)
-        grand_total_chains = 0
-        grand_total_locs = 0
-        for _, row in df.iterrows():
-            print("{:<10} {:<12} {:<15,} {:<12,} {:<12,}".format(
-                row['segment'],
-                int(row['chain_count']),
-                int(row['total_locations']),
-                int(row['min_locations']),
-                int(row['max_locations'])
-            ))
-            grand_total_chains += row['chain_count']
-            grand_total_locs += row['total_locations']
+        columns = ['segment', 'chain_count', 'total_locations', 'min_locations', 'max_locations']
+        print(df[columns].to_string(index=False, header=False, formatters={
+            'segment': "{:<10}".format,
+            'chain_count': "{:<12}".format,
+            'total_locations': "{:<15,}".format,
+            'min_locations': "{:<12,}".format,
+            'max_locations': "{:<12,}".format,
+        }))
+        grand_total_chains = df['chain_count'].sum()
+        grand_total_locs = df['total_locations'].sum()
         print("-"*61)
         print("{:<10} {:<12} {:<15,}".format("TOTAL:", grand_total_chains, grand_total_locs))
         return grand_total_locs
     return 0
 
+def monthly_trend_query():
+    """Location counts per month across trend_months (Test 5)"""
+
+    # One scan over the whole range, grouped by month, instead of a query per month
+    query = f"""
+    SELECT
+        CAST(DATE_TRUNC(order_date, MONTH) AS STRING) as month_start,
+        {location_count_sql()} as location_count
+    FROM `merchant_portal_export.loop_enabled_orders`
+    WHERE order_date BETWEEN @start_date AND @end_date
+    GROUP BY month_start
+    """
+    return query, (('start_date', trend_months[0][0]), ('end_date', trend_months[-1][1]))
+
 def test_monthly_trend():
     """Test 5: Monthly trend of location counts"""
 
@@ -191,29 +230,31 @@ def test_monthly_trend():
     print("TEST 5: MONTHLY LOCATION TREND")
     print("="*60)
 
-    months = [
-        ('2025-07-01', '2025-07-31', 'July 2025'),
-        ('2025-08-01', '2025-08-31', 'August 2025'),
-        ('2025-09-01', '2025-09-30', 'September 2025')
-    ]
+    df = run_bq(*monthly_trend_query())
+    counts = dict(zip(df['month_start'], df['location_count']))
 
     print("\n{:<15} {:>15}".format("Month", "Locations"))
     print("-"*30)
 
-    for start, end, label in months:
-        query = f"""
-        SELECT
-            COUNT(DISTINCT CONCAT(chain, b_name)) as location_count
-        FROM `merchant_portal_export.chargeback_orders_enriched`
-        WHERE order_date BETWEEN '{start}' AND '{end}'
-            AND is_loop_enabled = true
-            AND loop_raised_timestamp IS NOT NULL
-        """
-
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID)
-        if not df.empty:
-            count = df.iloc[0]['location_count']
-            print("{:<15} {:>15,}".format(label, int(count)))
+    for start, end, label in trend_months:
+        print("{:<15} {:>15,}".format(label, int(counts.get(start, 0))))
+
+def reconciliation_query():
+    """Fingerprint vs string location counts for the current month from a single scan (Test 6)"""
+
+    # Summing per-chain distinct counts is not checked: grouping by chain partitions
+    # the distinct (chain, b_name) set, so that sum equals the direct count by construction.
+    # The string key is only unambiguous while neither column contains the '|' separator,
+    # so rows that do are counted alongside.
+    query = """
+    SELECT
+        COUNT(DISTINCT loc_fp) as fingerprint_count,
+        COUNT(DISTINCT CONCAT(chain, '|', b_name)) as string_count,
+        COUNTIF(STRPOS(chain, '|') > 0 OR STRPOS(b_name, '|') > 0) as separator_rows
+    FROM `merchant_portal_export.loop_enabled_orders`
+    WHERE order_date BETWEEN @start_date AND @end_date
+    """
+    return query, current_month_params
 
 def test_reconciliation():
     """Test 6: Reconcile location counts across different aggregations"""
@@ -222,81 +263,42 @@ def test_reconciliation():
     print("TEST 6: LOCATION COUNT RECONCILIATION")
     print("="*60)
 
-    # Get total unique locations
-    query1 = f"""
-    SELECT COUNT(DISTINCT CONCAT(chain, b_name)) as total
-    FROM `merchant_portal_export.chargeback_orders_enriched`
-    WHERE order_date BETWEEN '{current_month_start}' AND '{current_month_end}'
-        AND is_loop_enabled = true
-        AND loop_raised_timestamp IS NOT NULL
-    """
-
-    # Get sum of locations by chain
-    query2 = f"""
-    WITH chain_locs AS (
-        SELECT
-            chain,
-            COUNT(DISTINCT CONCAT(chain, b_name)) as locs
-        FROM `merchant_portal_export.chargeback_orders_enriched`
-        WHERE order_date BETWEEN '{current_month_start}' AND '{current_month_end}'
-            AND is_loop_enabled = true
-            AND loop_raised_timestamp IS NOT NULL
-        GROUP BY chain
-    )
-    SELECT SUM(locs) as total FROM chain_locs
-    """
-
-    # Get unique chain-b_name combinations
-    query3 = f"""
-    SELECT COUNT(DISTINCT CONCAT(chain, '|', b_name)) as total
-    FROM `merchant_portal_export.chargeback_orders_enriched`
-    WHERE order_date BETWEEN '{current_month_start}' AND '{current_month_end}'
-        AND is_loop_enabled = true
-        AND loop_raised_timestamp IS NOT NULL
-    """
-
-    df1 = pandas_gbq.read_gbq(query1, project_id=PROJECT_ID)
-    df2 = pandas_gbq.read_gbq(query2, project_id=PROJECT_ID)
-    df3 = pandas_gbq.read_gbq(query3, project_id=PROJECT_ID)
+    df = run_bq(*reconciliation_query())
+    row = df.iloc[0] if not df.empty else {}
 
-    total1 = df1.iloc[0]['total'] if not df1.empty else 0
-    total2 = df2.iloc[0]['total'] if not df2.empty else 0
-    total3 = df3.iloc[0]['total'] if not df3.empty else 0
+    fingerprint_count = row.get('fingerprint_count', 0)
+    string_count = row.get('string_count', 0)
+    separator_rows = row.get('separator_rows', 0)
 
     print("\nReconciliation Results:")
-    print(f"1. Direct COUNT(DISTINCT CONCAT(chain, b_name)): {total1:,}")
-    print(f"2. SUM of locations grouped by chain: {total2:,}")
-    print(f"3. COUNT(DISTINCT CONCAT(chain, '|', b_name)): {total3:,}")
+    print(f"1. COUNT(DISTINCT loc_fp): {fingerprint_count:,}")
+    print(f"2. COUNT(DISTINCT CONCAT(chain, '|', b_name)): {string_count:,}")
 
-    if total1 == total2 == total3:
-        print("\n✅ RECONCILIATION PASSED: All methods return the same count!")
+    if separator_rows:
+        print(f"\n⚠️  {separator_rows:,} rows have '|' in chain or b_name; the string key may merge locations")
+
+    if fingerprint_count == string_count:
+        print("\n✅ RECONCILIATION PASSED: Both methods return the same count!")
     else:
         print("\n❌ RECONCILIATION FAILED: Methods return different counts!")
-        print(f"   Difference between method 1 and 2: {abs(total1 - total2):,}")
-        print(f"   Difference between method 1 and 3: {abs(total1 - total3):,}")
-
-def test_avg_per_location_calc():
-    """Test 7: Verify $/Location calculations are correct"""
+        print(f"   Difference between method 1 and 2: {abs(fingerprint_count - string_count):,}")
 
-    print("\n" + "="*60)
-    print("TEST 7: AVERAGE PER LOCATION CALCULATIONS")
-    print("="*60)
+def avg_per_location_query():
+    """Current-month locations, recovery and $/location (Test 7)"""
 
     query = f"""
     WITH location_data AS (
         SELECT
-            COUNT(DISTINCT CONCAT(chain, b_name)) as total_locations
-        FROM `merchant_portal_export.chargeback_orders_enriched`
-        WHERE order_date BETWEEN '{current_month_start}' AND '{current_month_end}'
-            AND is_loop_enabled = true
-            AND loop_raised_timestamp IS NOT NULL
+            {location_count_sql()} as total_locations
+        FROM `merchant_portal_export.loop_enabled_orders`
+        WHERE order_date BETWEEN @start_date AND @end_date
     ),
     recovery_data AS (
         SELECT
             SUM(COALESCE(cs.enabled_won_disputes, 0)) as total_recovered
         FROM `merchant_portal_export.chargeback_split_summary` cs
         JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}'
+        WHERE cs.chargeback_date BETWEEN @start_date AND @end_date
     )
     SELECT
         l.total_locations,
@@ -305,8 +307,16 @@ def test_avg_per_location_calc():
     FROM location_data l
     CROSS JOIN recovery_data r
     """
+    return query, current_month_params
+
+def test_avg_per_location_calc():
+    """Test 7: Verify $/Location calculations are correct"""
+
+    print("\n" + "="*60)
+    print("TEST 7: AVERAGE PER LOCATION CALCULATIONS")
+    print("="*60)
 
-    df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID)
+    df = run_bq(*avg_per_location_query())
     if not df.empty:
         row = df.iloc[0]
         print(f"\nTotal Locations: {row['total_locations']:,}")
@@ -319,6 +329,18 @@ if __name__ == "__main__":
     print("Testing all location calculations for consistency")
     print("="*60)
 
+    # The BigQuery jobs are independent and network-bound, so start them all at once;
+    # run_bq caches each result and the tests below print from the cache in order
+    queries = [
+        location_counts_query(),
+        segmentation_query(),
+        monthly_trend_query(),
+        reconciliation_query(),
+        avg_per_location_query(),
+    ]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda query_params: run_bq(*query_params), queries))
+
     # Run all tests
     base_count = test_base_location_count()
     top_10_total = test_location_by_chain()
@@ -345,8 +367,8 @@ if __name__ == "__main__":
         print("   locations appearing on multiple platforms")
 
     print("\n✅ All location calculations have been updated to use:")
-    print("   COUNT(DISTINCT CONCAT(chain, b_name)) from chargeback_orders_enriched")
-    print("   with filters: is_loop_enabled = true AND loop_raised_timestamp IS NOT NULL")
+    print("   COUNT(DISTINCT loc_fp) from loop_enabled_orders, loc_fp = FARM_FINGERPRINT(CONCAT(chain, '|', b_name))")
+    print("   (chargeback_orders_enriched where is_loop_enabled = true AND loop_raised_timestamp IS NOT NULL)")
 
     print("\n" + "="*60)
     print("TEST COMPLETE!")
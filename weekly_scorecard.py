@@ -5,17 +5,38 @@ P0-P4 Chain Segmentation with Monthly Overview
 
 import streamlit as st
 import pandas as pd
-import pandas_gbq
+from google.cloud import bigquery
 import os
 from datetime import date, timedelta, datetime
 import plotly.graph_objects as go
 import plotly.express as px
 import numpy as np
 import calendar
+import hashlib
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from google.oauth2 import service_account
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Configuration
 PROJECT_ID = 'arboreal-vision-339901'
+# On-disk query results, see run_query(); point QUERY_CACHE_DIR at a shared volume to share them across replicas
+QUERY_CACHE_DIR = os.environ.get('QUERY_CACHE_DIR', '.query_cache')
+QUERY_CACHE_TTL = 3600  # seconds, matches @st.cache_data(ttl=3600)
+MAX_BNAME_OPTIONS = 50  # locations shown in the sidebar multiselect at once
+CHAIN_PAGE_SIZE = 100  # chains per page in the segment chain breakdown
+
+# False: displayed location counts use BigQuery's HLL++ APPROX_COUNT_DISTINCT (<1% error).
+# Counts that rank chains into P0-P4 segments always stay exact.
+EXACT_COUNTS = False
+
+def location_count_sql(alias=''):
+    """Distinct location (loc_fp) count, exact or approximate depending on EXACT_COUNTS"""
+    key = f"{alias}loc_fp"
+    return f"COUNT(DISTINCT {key})" if EXACT_COUNTS else f"APPROX_COUNT_DISTINCT({key})"
 
 # Page config
 st.set_page_config(
@@ -26,21 +47,72 @@ st.set_page_config(
 )
 
 # Initialize credentials
-try:
-    # Try to use Streamlit secrets first (for cloud deployment)
-    if 'gcp_service_account' in st.secrets:
-        from google.oauth2 import service_account
-        credentials = service_account.Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"]
-        )
-    else:
+@st.cache_resource
+def load_credentials():
+    """Service account credentials, parsed once per process rather than on every rerun"""
+    try:
+        # Try to use Streamlit secrets first (for cloud deployment)
+        if 'gcp_service_account' in st.secrets:
+            return service_account.Credentials.from_service_account_info(
+                st.secrets["gcp_service_account"]
+            )
         # For local development
         os.environ['GOOGLE_AUTH_DISABLE_METADATA_SERVER'] = 'True'
         os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = ''
-        credentials = None
-except Exception as e:
-    st.error(f"Error loading credentials: {e}")
-    credentials = None
+        return None
+    except Exception as e:
+        st.error(f"Error loading credentials: {e}")
+        return None
+
+@st.cache_resource
+def get_bigquery_client():
+    """Shared BigQuery client for all scorecard queries"""
+    return bigquery.Client(project=PROJECT_ID, credentials=load_credentials())
+
+def run_query(query, params=None):
+    """Run a query with optional named BigQuery query parameters.
+    Dates go in as parameters so the SQL text stays identical across reloads and BigQuery's
+    result cache can answer repeats; results are read via the Storage API (Arrow) rather than REST.
+    Results are also kept on local disk for QUERY_CACHE_TTL seconds so a restarted app
+    (empty st.cache_data) can serve repeat requests without a BigQuery round trip."""
+    params = params or []
+    key_source = query + json.dumps([p.to_api_repr() for p in params], sort_keys=True, default=str)
+    cache_path = os.path.join(QUERY_CACHE_DIR, hashlib.sha1(key_source.encode()).hexdigest() + '.parquet')
+    try:
+        cache_fresh = time.time() - os.path.getmtime(cache_path) < QUERY_CACHE_TTL
+    except OSError:
+        cache_fresh = False  # not cached yet
+    if cache_fresh:
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception:
+            # Truncated or corrupt file (e.g. ArrowInvalid): a miss, and drop it so it is rewritten below
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+
+    job_config = bigquery.QueryJobConfig(query_parameters=params)
+    job = get_bigquery_client().query(query, job_config=job_config)
+    df = job.to_dataframe(create_bqstorage_client=True)
+
+    tmp_path = None
+    try:
+        os.makedirs(QUERY_CACHE_DIR, exist_ok=True)
+        # Write then rename so concurrent loaders never read a half-written file. The temp name
+        # must be unique across processes too, since replicas can share QUERY_CACHE_DIR.
+        with tempfile.NamedTemporaryFile(dir=QUERY_CACHE_DIR, suffix='.tmp', delete=False) as tmp:
+            tmp_path = tmp.name
+            df.to_parquet(tmp, index=False)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        # The disk cache is best-effort; the query result is still returned
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    return df
 
 # Title and description
 st.title("📊 Weekly Recovery Scorecard")
@@ -54,37 +126,29 @@ st.sidebar.header("🔍 Filters")
 def get_filter_options():
     """Get unique chains, platforms, and b_names for filters"""
 
-    chains_query = """
-    SELECT DISTINCT chain
-    FROM `restaurant_aggregate_metrics.slug_am_mapping`
-    WHERE chain IS NOT NULL AND chain != ''
-    ORDER BY chain
-    """
-
-    platforms_query = """
-    SELECT DISTINCT platform
-    FROM `merchant_portal_export.chargeback_split_summary`
-    WHERE platform IS NOT NULL
-    ORDER BY platform
-    """
-
-    bnames_query = """
-    SELECT DISTINCT b_name
-    FROM `restaurant_aggregate_metrics.slug_am_mapping`
-    WHERE b_name IS NOT NULL AND b_name != ''
-    ORDER BY b_name
-    LIMIT 1000
+    # One round trip: each list is a scalar ARRAY_AGG subquery (empty tables give NULL arrays)
+    options_query = """
+    SELECT
+        (SELECT ARRAY_AGG(DISTINCT chain ORDER BY chain)
+         FROM `restaurant_aggregate_metrics.slug_am_mapping`
+         WHERE chain IS NOT NULL AND chain != '') as chains,
+        (SELECT ARRAY_AGG(DISTINCT platform ORDER BY platform)
+         FROM `merchant_portal_export.chargeback_split_summary_partitioned`
+         WHERE platform IS NOT NULL) as platforms,
+        (SELECT ARRAY_AGG(DISTINCT b_name ORDER BY b_name LIMIT 1000)
+         FROM `restaurant_aggregate_metrics.slug_am_mapping`
+         WHERE b_name IS NOT NULL AND b_name != '') as bnames
     """
 
     try:
-        chains_df = pandas_gbq.read_gbq(chains_query, project_id=PROJECT_ID, credentials=credentials)
-        platforms_df = pandas_gbq.read_gbq(platforms_query, project_id=PROJECT_ID, credentials=credentials)
-        bnames_df = pandas_gbq.read_gbq(bnames_query, project_id=PROJECT_ID, credentials=credentials)
-
-        return (
-            chains_df['chain'].tolist() if not chains_df.empty else [],
-            platforms_df['platform'].tolist() if not platforms_df.empty else [],
-            bnames_df['b_name'].tolist() if not bnames_df.empty else []
+        options_df = run_query(options_query)
+        if options_df.empty:
+            return [], [], []
+
+        row = options_df.iloc[0]
+        return tuple(
+            list(row[col]) if row[col] is not None else []
+            for col in ('chains', 'platforms', 'bnames')
         )
     except Exception as e:
         st.error(f"Error loading filter options: {e}")
@@ -108,17 +172,30 @@ selected_platforms = st.sidebar.multiselect(
     help="Filter by delivery platform"
 )
 
+# Up to 1000 b_names render slowly in a multiselect, so only show the first
+# MAX_BNAME_OPTIONS matches for the search text plus whatever is already selected
+bname_search = st.sidebar.text_input("Search Location(s)", "", help="Narrow the location list below")
+# The widget ID follows its options, which change with the search text and selection, so the
+# selection lives under its own key and is only written by the widget's on_change callback
+def store_selected_bnames():
+    st.session_state['selected_bnames'] = st.session_state['bname_multiselect']
+
+current_bnames = st.session_state.setdefault('selected_bnames', ["All"])
+bname_matches = [b for b in bnames_list if bname_search.lower() in b.lower()][:MAX_BNAME_OPTIONS]
+
 selected_bnames = st.sidebar.multiselect(
     "Select Location(s)",
-    options=["All"] + bnames_list,
-    default=["All"],
+    options=list(dict.fromkeys(["All"] + current_bnames + bname_matches)),
+    default=current_bnames,
+    key='bname_multiselect',
+    on_change=store_selected_bnames,
     help="Filter by location name (b_name)"
 )
 
-# Process filter selections
-filter_chains = None if "All" in selected_chains else selected_chains
-filter_platforms = None if "All" in selected_platforms else selected_platforms
-filter_bnames = None if "All" in selected_bnames else selected_bnames
+# Process filter selections into sorted tuples: cheap, order-independent cache keys for the loaders
+filter_chains = None if "All" in selected_chains else tuple(sorted(selected_chains))
+filter_platforms = None if "All" in selected_platforms else tuple(sorted(selected_platforms))
+filter_bnames = None if "All" in selected_bnames else tuple(sorted(selected_bnames))
 
 st.sidebar.markdown("---")
 st.sidebar.caption("Filters will be applied to all dashboard sections")
@@ -151,39 +228,175 @@ last_month_start, last_month_end = get_month_dates(1)
 month_2_start, month_2_end = get_month_dates(2)
 month_3_start, month_3_end = get_month_dates(3)
 
+def periods_cte(periods):
+    """SQL for a `periods` CTE with one (period_label, period_start, period_end) row per period"""
+    return "\n        UNION ALL\n".join(
+        f"        SELECT @period_label_{i} as period_label, @period_start_{i} as period_start, @period_end_{i} as period_end"
+        for i in range(len(periods))
+    )
+
+def filter_clause(chain_col, platform_col, bname_col):
+    """Sidebar filter predicates bound to @chains/@platforms/@bnames; an empty (or NULL) array means no filter"""
+    return f"""
+            AND (COALESCE(ARRAY_LENGTH(@chains), 0) = 0 OR {chain_col} IN UNNEST(@chains))
+            AND (COALESCE(ARRAY_LENGTH(@platforms), 0) = 0 OR TRIM({platform_col}) IN UNNEST(@platforms))
+            AND (COALESCE(ARRAY_LENGTH(@bnames), 0) = 0 OR {bname_col} IN UNNEST(@bnames))"""
+
+def filter_params(filter_chains=None, filter_platforms=None, filter_bnames=None):
+    """Array parameters for filter_clause(); the SQL text is the same whatever is selected"""
+    return [
+        bigquery.ArrayQueryParameter('chains', 'STRING', list(filter_chains or [])),
+        bigquery.ArrayQueryParameter('platforms', 'STRING', list(filter_platforms or [])),
+        bigquery.ArrayQueryParameter('bnames', 'STRING', list(filter_bnames or [])),
+    ]
+
+def periods_params(periods):
+    """Query parameters for periods_cte(), plus @range_start/@range_end spanning all periods"""
+    # The outer range prunes chargeback_split_summary_partitioned (partitioned on chargeback_date);
+    # the join to periods assigns rows to (overlapping) periods
+    params = [
+        bigquery.ScalarQueryParameter('range_start', 'DATE', min(start for start, _, _ in periods)),
+        bigquery.ScalarQueryParameter('range_end', 'DATE', max(end for _, end, _ in periods)),
+    ]
+    for i, (start, end, label) in enumerate(periods):
+        params += [
+            bigquery.ScalarQueryParameter(f'period_label_{i}', 'STRING', label),
+            bigquery.ScalarQueryParameter(f'period_start_{i}', 'DATE', start),
+            bigquery.ScalarQueryParameter(f'period_end_{i}', 'DATE', end),
+        ]
+    return params
+
+# Overview query column -> (overview dict key, dtype); NULL aggregates read as 0
+OVERVIEW_COLUMNS = {
+    'chain_count': ('chains', 'int64'),
+    'unique_locations': ('unique_locations', 'int64'),
+    'dd_locations': ('dd_locations', 'int64'),
+    'ue_locations': ('ue_locations', 'int64'),
+    'gh_locations': ('gh_locations', 'int64'),
+    'total_disputed': ('disputed', 'int64'),
+    'disputes_won': ('won', 'int64'),
+    'disputes_lost': ('lost', 'int64'),
+    'disputes_pending': ('pending', 'int64'),
+    'disputes_in_progress': ('in_progress', 'int64'),
+    'disputes_to_be_raised': ('to_be_raised', 'int64'),
+    'disputes_expired': ('expired', 'int64'),
+    'total_recovered': ('recovered', 'float64'),
+    'total_settled': ('settled', 'float64'),
+    'win_rate': ('win_rate', 'float64'),
+}
+
+def overview_frame(df, extra_columns=()):
+    """Overview columns (plus extra_columns) with NULLs as 0, cast and renamed to overview keys in one pass"""
+    dtypes = {col: dtype for col, (_, dtype) in OVERVIEW_COLUMNS.items()}
+    dtypes.update({col: 'float64' for col in extra_columns})
+    return (
+        df.fillna({col: 0 for col in dtypes})
+        .astype(dtypes)
+        .rename(columns={col: key for col, (key, _) in OVERVIEW_COLUMNS.items()})
+    )
+
+# Overview dict key -> display column for the count columns of the overview tables
+OVERVIEW_TABLE_COUNTS = {
+    'chains': 'Chains (chain)',
+    'unique_locations': 'Locations (chain + b_name)',
+    'dd_locations': 'DoorDash (slug)',
+    'ue_locations': 'UberEats (slug)',
+    'gh_locations': 'Grubhub (slug)',
+    'disputed': 'Disputed',
+    'won': 'Won',
+    'lost': 'Lost',
+    'pending': 'Pending',
+    'in_progress': 'In Progress',
+    'to_be_raised': 'To Be Raised',
+    'expired': 'Expired',
+}
+
+# Styler.format() spec for overview_table(); the table itself stays numeric
+OVERVIEW_TABLE_FORMAT = {
+    **{label: '{:,}' for label in OVERVIEW_TABLE_COUNTS.values()},
+    'Total Recovered (enabled_won_disputes)': '${:,.0f}',
+    '$/Location': '${:.0f}',
+    'Win Rate': '{:.1f}%',
+}
+
+def overview_table(overviews):
+    """Display table for a list of overview dicts, one row per period; format with OVERVIEW_TABLE_FORMAT"""
+    records = pd.DataFrame(overviews)
+    table = records[['month', *OVERVIEW_TABLE_COUNTS]].rename(columns={'month': 'Period', **OVERVIEW_TABLE_COUNTS})
+    table['Total Recovered (enabled_won_disputes)'] = records['recovered']
+    table['$/Location'] = safe_divide(records['recovered'], records['unique_locations'])
+    table['Win Rate'] = records['win_rate']
+    return table
+
+# Per-period metric columns of the segment chain breakdown, prefixed mtd/m1/m2/m3 once pivoted wide
+CHAIN_PERIOD_PREFIXES = ('mtd', 'm1', 'm2', 'm3')
+CHAIN_PERIOD_METRICS = ('dd', 'ue', 'gh', 'disputes', 'won', 'lost', 'pending', 'recovered', 'settled', 'win_rate')
+
+def pivot_chain_periods(chain_long, periods):
+    """Pivot (period_label, chain) rows to one row per chain with mtd_/m1_/m2_/m3_ columns, busiest MTD first"""
+    if chain_long.empty:
+        return pd.DataFrame()
+    prefixes = dict(zip((label for _, _, label in periods), CHAIN_PERIOD_PREFIXES))
+    # BigQuery hands back nullable Int64 counts next to float64 amounts; a mixed pivot comes out object dtype
+    metrics = chain_long[list(CHAIN_PERIOD_METRICS)].astype('float64')
+    wide = metrics.assign(chain=chain_long['chain'], period_label=chain_long['period_label']).pivot(
+        index='chain', columns='period_label', values=list(CHAIN_PERIOD_METRICS)
+    )
+    wide.columns = [f"{prefixes[label]}_{metric}" for metric, label in wide.columns]
+    # A chain with no disputes in a period has no row for it: zero counts/amounts, NULL win rate
+    columns = [f"{prefix}_{metric}" for prefix in CHAIN_PERIOD_PREFIXES for metric in CHAIN_PERIOD_METRICS]
+    wide = wide.reindex(columns=columns)
+    zero_filled = [col for col in columns if not col.endswith(('_win_rate', '_recovered', '_settled'))]
+    wide[zero_filled] = wide[zero_filled].fillna(0).astype('int64')
+    amount_columns = [col for col in columns if col.endswith(('_recovered', '_settled'))]
+    wide[amount_columns] = wide[amount_columns].fillna(0).astype('float64')
+    return wide.sort_values('mtd_recovered', ascending=False).reset_index()
+
+# Count columns shown in each period tab of the chain breakdown: (display label, metric)
+CHAIN_DISPLAY_COUNTS = (
+    ('DoorDash', 'dd'),
+    ('UberEats', 'ue'),
+    ('Grubhub', 'gh'),
+    ('Disputed', 'disputes'),
+    ('Won', 'won'),
+    ('Lost', 'lost'),
+    ('Pending', 'pending'),
+)
+
+def chain_period_display(chain_df, prefix):
+    """Display table for one period (mtd/m1/m2/m3) of a pivot_chain_periods() frame"""
+    data = {'Chain': chain_df['chain']}
+    data.update({label: chain_df[f'{prefix}_{metric}'] for label, metric in CHAIN_DISPLAY_COUNTS})
+    data['Recovered'] = chain_df[f'{prefix}_recovered'].map('${:,.0f}'.format)
+    data['Win Rate'] = chain_df[f'{prefix}_win_rate'].fillna(0).map('{:.1f}%'.format)
+    return pd.DataFrame(data, copy=False)
+
+def safe_divide(numerator, denominator):
+    """Element-wise numerator / denominator, 0 wherever the denominator is not positive"""
+    numerator = np.asarray(numerator, dtype='float64')
+    denominator = np.asarray(denominator, dtype='float64')
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    return np.divide(numerator, denominator, out=out, where=denominator > 0)
+
+def pct_change(current, previous):
+    """Percent change from previous to current, 0 wherever previous is not positive"""
+    return safe_divide(np.subtract(current, previous, dtype='float64'), previous) * 100
+
 @st.cache_data(ttl=3600)
-def get_monthly_overview(start_date, end_date, month_label, filter_chains=None, filter_platforms=None, filter_bnames=None):
-    """Get monthly overview metrics including dispute counts"""
-
-    # Build filter conditions
-    filter_conditions = []
-    filter_conditions_coe = []  # For chargeback_orders_enriched table
-
-    if filter_chains:
-        chains_str = "', '".join(filter_chains)
-        filter_conditions.append(f"sm.chain IN ('{chains_str}')")
-        filter_conditions_coe.append(f"chain IN ('{chains_str}')")
-    if filter_platforms:
-        platforms_str = "', '".join(filter_platforms)
-        filter_conditions.append(f"TRIM(cs.platform) IN ('{platforms_str}')")
-        filter_conditions_coe.append(f"TRIM(platform) IN ('{platforms_str}')")
-    if filter_bnames:
-        bnames_str = "', '".join(filter_bnames)
-        filter_conditions.append(f"sm.b_name IN ('{bnames_str}')")
-        filter_conditions_coe.append(f"b_name IN ('{bnames_str}')")
-
-    filter_clause = " AND " + " AND ".join(filter_conditions) if filter_conditions else ""
-    filter_clause_coe = " AND " + " AND ".join(filter_conditions_coe) if filter_conditions_coe else ""
+def get_monthly_overviews(periods, filter_chains=None, filter_platforms=None, filter_bnames=None):
+    """Get monthly overview metrics including dispute counts for several (start, end, label) periods in one query"""
 
     query = f"""
-    WITH monthly_data AS (
+    WITH periods AS (
+{periods_cte(periods)}
+    ),
+    monthly_data AS (
         SELECT
+            p.period_label,
             sm.chain,
             sm.slug,
-            sm.b_name_id,
             cs.platform,
             cs.external_status,
-            cs.error_category,
             COALESCE(cs.enabled_won_disputes, 0) as won_amount,
             CASE
                 WHEN cs.external_status IN ('ACCEPTED', 'DENIED')
@@ -197,152 +410,134 @@ def get_monthly_overview(start_date, end_date, month_label, filter_chains=None,
                 WHEN cs.external_status IN ('IN_PROGRESS', 'TO_BE_RAISED') THEN 'pending'
                 ELSE 'other'
             END as dispute_status
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
         JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date BETWEEN '{start_date}' AND '{end_date}'
+        JOIN periods p ON cs.chargeback_date BETWEEN p.period_start AND p.period_end
+        WHERE cs.chargeback_date BETWEEN @range_start AND @range_end
             AND sm.chain IS NOT NULL
-            AND sm.chain != ''
-            {filter_clause}
+            AND sm.chain != ''{filter_clause('sm.chain', 'cs.platform', 'sm.b_name')}
     ),
-    -- Get location count from chargeback_orders_enriched table
+    -- Get location count from loop_enabled_orders view
     location_counts AS (
         SELECT
-            COUNT(DISTINCT CONCAT(chain, b_name)) as unique_locations
-        FROM `merchant_portal_export.chargeback_orders_enriched`
-        WHERE order_date BETWEEN '{start_date}' AND '{end_date}'
-            AND is_loop_enabled = true
-            AND loop_raised_timestamp IS NOT NULL
-            {filter_clause_coe}
+            p.period_label,
+            {location_count_sql()} as unique_locations
+        FROM `merchant_portal_export.loop_enabled_orders`
+        JOIN periods p ON order_date BETWEEN p.period_start AND p.period_end
+        WHERE order_date BETWEEN @range_start AND @range_end{filter_clause('chain', 'platform', 'b_name')}
+        GROUP BY p.period_label
     ),
     platform_metrics AS (
         SELECT
+            period_label,
             chain,
             -- Count unique slug-platform combinations (match actual platform values in database)
             COUNT(DISTINCT CASE WHEN TRIM(platform) = 'Doordash' THEN slug END) as dd_locations,
             COUNT(DISTINCT CASE WHEN TRIM(platform) = 'UberEats' THEN slug END) as ue_locations,
             COUNT(DISTINCT CASE WHEN TRIM(platform) = 'Grubhub' THEN slug END) as gh_locations,
             COUNT(*) as total_disputed,
-            SUM(CASE WHEN dispute_status = 'won' THEN 1 ELSE 0 END) as disputes_won,
-            SUM(CASE WHEN dispute_status = 'lost' THEN 1 ELSE 0 END) as disputes_lost,
-            SUM(CASE WHEN dispute_status = 'pending' THEN 1 ELSE 0 END) as disputes_pending,
-            SUM(CASE WHEN external_status = 'IN_PROGRESS' THEN 1 ELSE 0 END) as disputes_in_progress,
-            SUM(CASE WHEN external_status = 'TO_BE_RAISED' THEN 1 ELSE 0 END) as disputes_to_be_raised,
-            SUM(CASE WHEN external_status = 'EXPIRED' THEN 1 ELSE 0 END) as disputes_expired,
+            COUNTIF(dispute_status = 'won') as disputes_won,
+            COUNTIF(dispute_status = 'lost') as disputes_lost,
+            COUNTIF(dispute_status = 'pending') as disputes_pending,
+            COUNTIF(external_status = 'IN_PROGRESS') as disputes_in_progress,
+            COUNTIF(external_status = 'TO_BE_RAISED') as disputes_to_be_raised,
+            COUNTIF(external_status = 'EXPIRED') as disputes_expired,
             SUM(won_amount) as total_won,
             SUM(settled_amount) as total_settled
         FROM monthly_data
-        GROUP BY chain
+        GROUP BY period_label, chain
+    ),
+    period_metrics AS (
+        SELECT
+            period_label,
+            COUNT(DISTINCT chain) as chain_count,
+            SUM(dd_locations) as dd_locations,
+            SUM(ue_locations) as ue_locations,
+            SUM(gh_locations) as gh_locations,
+            SUM(total_disputed) as total_disputed,
+            SUM(disputes_won) as disputes_won,
+            SUM(disputes_lost) as disputes_lost,
+            SUM(disputes_pending) as disputes_pending,
+            SUM(disputes_in_progress) as disputes_in_progress,
+            SUM(disputes_to_be_raised) as disputes_to_be_raised,
+            SUM(disputes_expired) as disputes_expired,
+            SUM(total_won) as total_recovered,
+            SUM(total_settled) as total_settled,
+            ROUND(SAFE_DIVIDE(SUM(total_won), NULLIF(SUM(total_settled), 0)) * 100, 2) as win_rate,
+            -- Use total location count (sum of all platforms) for avg calculation
+            ROUND(SAFE_DIVIDE(SUM(total_won), NULLIF(SUM(dd_locations) + SUM(ue_locations) + SUM(gh_locations), 0)), 2) as avg_per_location
+        FROM platform_metrics
+        GROUP BY period_label
     )
+    -- One row per period, even when it has no disputes
     SELECT
-        COUNT(DISTINCT chain) as chain_count,
-        (SELECT unique_locations FROM location_counts) as unique_locations,
-        SUM(dd_locations) as dd_locations,
-        SUM(ue_locations) as ue_locations,
-        SUM(gh_locations) as gh_locations,
-        SUM(total_disputed) as total_disputed,
-        SUM(disputes_won) as disputes_won,
-        SUM(disputes_lost) as disputes_lost,
-        SUM(disputes_pending) as disputes_pending,
-        SUM(disputes_in_progress) as disputes_in_progress,
-        SUM(disputes_to_be_raised) as disputes_to_be_raised,
-        SUM(disputes_expired) as disputes_expired,
-        SUM(total_won) as total_recovered,
-        SUM(total_settled) as total_settled,
-        ROUND(SAFE_DIVIDE(SUM(total_won), NULLIF(SUM(total_settled), 0)) * 100, 2) as win_rate,
-        -- Use total location count (sum of all platforms) for avg calculation
-        ROUND(SAFE_DIVIDE(SUM(total_won), NULLIF(SUM(dd_locations) + SUM(ue_locations) + SUM(gh_locations), 0)), 2) as avg_per_location
-    FROM platform_metrics
+        p.period_label,
+        pm.* EXCEPT (period_label),
+        lc.unique_locations
+    FROM periods p
+    LEFT JOIN period_metrics pm ON p.period_label = pm.period_label
+    LEFT JOIN location_counts lc ON p.period_label = lc.period_label
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
-        if not df.empty:
-            row = df.iloc[0]
+        params = periods_params(periods) + filter_params(filter_chains, filter_platforms, filter_bnames)
+        df = overview_frame(run_query(query, params), extra_columns=['avg_per_location'])
+        overview_keys = [key for key, _ in OVERVIEW_COLUMNS.values()]
+        overviews = {}
+        for start_date, end_date, month_label in periods:
+            period_df = df[df['period_label'] == month_label]
+            if period_df.empty:
+                continue
+            # to_dict('records') hands back plain Python ints/floats
+            row = period_df.to_dict('records')[0]
             # Calculate days in period for monthly average
             days_in_period = (end_date - start_date).days + 1
             days_in_month = 30  # Standardize to 30 days for monthly average
             
-            return {
+            overviews[month_label] = {
                 'month': month_label,
-                'chains': int(row['chain_count']) if pd.notna(row['chain_count']) else 0,
-                'unique_locations': int(row['unique_locations']) if pd.notna(row['unique_locations']) else 0,
-                'dd_locations': int(row['dd_locations']) if pd.notna(row['dd_locations']) else 0,
-                'ue_locations': int(row['ue_locations']) if pd.notna(row['ue_locations']) else 0,
-                'gh_locations': int(row['gh_locations']) if pd.notna(row['gh_locations']) else 0,
-                'disputed': int(row['total_disputed']) if pd.notna(row['total_disputed']) else 0,
-                'won': int(row['disputes_won']) if pd.notna(row['disputes_won']) else 0,
-                'lost': int(row['disputes_lost']) if pd.notna(row['disputes_lost']) else 0,
-                'pending': int(row['disputes_pending']) if pd.notna(row['disputes_pending']) else 0,
-                'in_progress': int(row['disputes_in_progress']) if pd.notna(row['disputes_in_progress']) else 0,
-                'to_be_raised': int(row['disputes_to_be_raised']) if pd.notna(row['disputes_to_be_raised']) else 0,
-                'expired': int(row['disputes_expired']) if pd.notna(row['disputes_expired']) else 0,
-                'recovered': float(row['total_recovered']) if pd.notna(row['total_recovered']) else 0,
-                'settled': float(row['total_settled']) if pd.notna(row['total_settled']) else 0,
-                'win_rate': float(row['win_rate']) if pd.notna(row['win_rate']) else 0,
-                'avg_per_location_per_month': float(row['avg_per_location']) * (days_in_month / days_in_period) if pd.notna(row['avg_per_location']) else 0
+                **{key: row[key] for key in overview_keys},
+                'avg_per_location_per_month': row['avg_per_location'] * (days_in_month / days_in_period)
             }
-        return None
+        return overviews
     except Exception as e:
         st.error(f"Error fetching monthly data: {e}")
-        return None
+        return {}
 
 @st.cache_data(ttl=3600)
 def get_chains_movement(current_start, current_end, previous_start, previous_end):
     """Get chains that entered or exited Recover between two periods"""
     
-    query = f"""
-    WITH current_month_chains AS (
-        SELECT DISTINCT sm.chain
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date BETWEEN '{current_start}' AND '{current_end}'
-            AND sm.chain IS NOT NULL
-            AND sm.chain != ''
-    ),
-    previous_month_chains AS (
-        SELECT DISTINCT sm.chain
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+    query = """
+    -- One scan over both periods; each chain is tagged with whether it appears in each
+    WITH chain_presence AS (
+        SELECT
+            sm.chain,
+            LOGICAL_OR(cs.chargeback_date BETWEEN @current_start AND @current_end) as in_current,
+            LOGICAL_OR(cs.chargeback_date BETWEEN @previous_start AND @previous_end) as in_previous
+        FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
         JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date BETWEEN '{previous_start}' AND '{previous_end}'
+        WHERE cs.chargeback_date BETWEEN LEAST(@current_start, @previous_start) AND GREATEST(@current_end, @previous_end)
             AND sm.chain IS NOT NULL
             AND sm.chain != ''
-    ),
-    chain_segments AS (
-        SELECT
-            chain,
-            COUNT(DISTINCT CONCAT(chain, b_name)) as location_count,
-            ROW_NUMBER() OVER (ORDER BY COUNT(DISTINCT CONCAT(chain, b_name)) DESC) as rank_by_locations
-        FROM `merchant_portal_export.chargeback_orders_enriched`
-        WHERE order_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-            AND is_loop_enabled = true
-            AND loop_raised_timestamp IS NOT NULL
-            AND chain IS NOT NULL
-            AND chain != ''
-        GROUP BY chain
+        GROUP BY sm.chain
     ),
     segmented_chains AS (
-        SELECT 
-            chain,
-            location_count,
-            CASE 
-                WHEN rank_by_locations <= 15 THEN 'P0'
-                WHEN rank_by_locations <= 40 THEN 'P1'
-                WHEN rank_by_locations <= 70 THEN 'P2'
-                WHEN rank_by_locations <= 132 THEN 'P3'
-                ELSE 'P4'
-            END as segment
-        FROM chain_segments
+        -- Rebuilt daily by sql/chain_segments_daily.sql
+        SELECT chain, location_count, segment
+        FROM `merchant_portal_export.chain_segments_daily`
     ),
     movement AS (
-        SELECT 
-            COALESCE(c.chain, p.chain) as chain,
-            CASE 
-                WHEN c.chain IS NOT NULL AND p.chain IS NULL THEN 'entered'
-                WHEN c.chain IS NULL AND p.chain IS NOT NULL THEN 'exited'
+        SELECT
+            chain,
+            CASE
+                WHEN in_current AND NOT in_previous THEN 'entered'
+                WHEN in_previous AND NOT in_current THEN 'exited'
                 ELSE 'stayed'
             END as movement_type
-        FROM current_month_chains c
-        FULL OUTER JOIN previous_month_chains p ON c.chain = p.chain
+        FROM chain_presence
+        -- Chains seen only between the two periods are in neither
+        WHERE in_current OR in_previous
     )
     SELECT 
         m.chain,
@@ -355,39 +550,33 @@ def get_chains_movement(current_start, current_end, previous_start, previous_end
     ORDER BY s.segment, m.movement_type, s.location_count DESC
     """
     
+    params = [
+        bigquery.ScalarQueryParameter('current_start', 'DATE', current_start),
+        bigquery.ScalarQueryParameter('current_end', 'DATE', current_end),
+        bigquery.ScalarQueryParameter('previous_start', 'DATE', previous_start),
+        bigquery.ScalarQueryParameter('previous_end', 'DATE', previous_end),
+    ]
+    
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = run_query(query, params)
         return df
     except Exception as e:
         st.error(f"Error fetching chain movement: {e}")
         return pd.DataFrame()
 
 @st.cache_data(ttl=3600)
-def get_platform_breakdown(start_date, end_date, month_label, filter_chains=None, filter_platforms=None, filter_bnames=None):
-    """Get platform-specific metrics"""
-
-    # Build filter conditions
-    filter_conditions = []
-    if filter_chains:
-        chains_str = "', '".join(filter_chains)
-        filter_conditions.append(f"sm.chain IN ('{chains_str}')")
-    if filter_platforms:
-        platforms_str = "', '".join(filter_platforms)
-        filter_conditions.append(f"TRIM(cs.platform) IN ('{platforms_str}')")
-    if filter_bnames:
-        bnames_str = "', '".join(filter_bnames)
-        filter_conditions.append(f"sm.b_name IN ('{bnames_str}')")
-
-    filter_clause = " AND " + " AND ".join(filter_conditions) if filter_conditions else ""
+def get_platform_breakdowns(periods, filter_chains=None, filter_platforms=None, filter_bnames=None):
+    """Get platform-specific metrics for several (start, end, label) periods in one query"""
 
     query = f"""
-    WITH monthly_data AS (
+    WITH periods AS (
+{periods_cte(periods)}
+    ),
+    monthly_data AS (
         SELECT
+            p.period_label,
             cs.platform,
-            sm.b_name_id,
             sm.slug,
-            sm.chain,
-            sm.b_name,
             cs.external_status,
             COALESCE(cs.enabled_won_disputes, 0) as won_amount,
             CASE
@@ -402,50 +591,56 @@ def get_platform_breakdown(start_date, end_date, month_label, filter_chains=None
                 WHEN cs.external_status IN ('IN_PROGRESS', 'TO_BE_RAISED') THEN 'pending'
                 ELSE 'other'
             END as dispute_status
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
         JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date BETWEEN '{start_date}' AND '{end_date}'
+        JOIN periods p ON cs.chargeback_date BETWEEN p.period_start AND p.period_end
+        WHERE cs.chargeback_date BETWEEN @range_start AND @range_end
             AND sm.chain IS NOT NULL
-            AND sm.chain != ''
-            {filter_clause}
+            AND sm.chain != ''{filter_clause('sm.chain', 'cs.platform', 'sm.b_name')}
     ),
-    -- Get location counts per platform from chargeback_orders_enriched
+    -- Get location counts per platform from loop_enabled_orders
     platform_locations AS (
         SELECT
+            p.period_label,
             platform,
-            COUNT(DISTINCT CONCAT(chain, b_name)) as unique_locations
-        FROM `merchant_portal_export.chargeback_orders_enriched`
-        WHERE order_date BETWEEN '{start_date}' AND '{end_date}'
-            AND is_loop_enabled = true
-            AND loop_raised_timestamp IS NOT NULL
-        GROUP BY platform
+            {location_count_sql()} as unique_locations
+        FROM `merchant_portal_export.loop_enabled_orders`
+        JOIN periods p ON order_date BETWEEN p.period_start AND p.period_end
+        WHERE order_date BETWEEN @range_start AND @range_end{filter_clause('chain', 'platform', 'b_name')}
+        GROUP BY p.period_label, platform
     )
     SELECT
+        md.period_label,
         TRIM(md.platform) as platform,
         COALESCE(pl.unique_locations, 0) as unique_locations,
         COUNT(DISTINCT md.slug) as slug_count,
         COUNT(*) as total_disputed,
-        SUM(CASE WHEN md.dispute_status = 'won' THEN 1 ELSE 0 END) as disputes_won,
-        SUM(CASE WHEN md.dispute_status = 'lost' THEN 1 ELSE 0 END) as disputes_lost,
-        SUM(CASE WHEN md.dispute_status = 'pending' THEN 1 ELSE 0 END) as disputes_pending,
-        SUM(CASE WHEN md.external_status = 'IN_PROGRESS' THEN 1 ELSE 0 END) as disputes_in_progress,
-        SUM(CASE WHEN md.external_status = 'TO_BE_RAISED' THEN 1 ELSE 0 END) as disputes_to_be_raised,
-        SUM(CASE WHEN md.external_status = 'EXPIRED' THEN 1 ELSE 0 END) as disputes_expired,
+        COUNTIF(md.dispute_status = 'won') as disputes_won,
+        COUNTIF(md.dispute_status = 'lost') as disputes_lost,
+        COUNTIF(md.dispute_status = 'pending') as disputes_pending,
+        COUNTIF(md.external_status = 'IN_PROGRESS') as disputes_in_progress,
+        COUNTIF(md.external_status = 'TO_BE_RAISED') as disputes_to_be_raised,
+        COUNTIF(md.external_status = 'EXPIRED') as disputes_expired,
         SUM(md.won_amount) as total_recovered,
         SUM(md.settled_amount) as total_settled,
         ROUND(SAFE_DIVIDE(SUM(md.won_amount), NULLIF(SUM(md.settled_amount), 0)) * 100, 2) as win_rate
     FROM monthly_data md
-    LEFT JOIN platform_locations pl ON TRIM(md.platform) = pl.platform
-    GROUP BY md.platform, pl.unique_locations
-    ORDER BY md.platform
+    LEFT JOIN platform_locations pl ON md.period_label = pl.period_label AND TRIM(md.platform) = pl.platform
+    GROUP BY md.period_label, md.platform, pl.unique_locations
+    ORDER BY md.period_label, md.platform
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
-        return df
+        params = periods_params(periods) + filter_params(filter_chains, filter_platforms, filter_bnames)
+        df = run_query(query, params)
+        # Split back into one frame per period, keyed by label
+        return {
+            label: df[df['period_label'] == label].drop(columns='period_label').reset_index(drop=True)
+            for _, _, label in periods
+        }
     except Exception as e:
         st.error(f"Error fetching platform breakdown: {e}")
-        return pd.DataFrame()
+        return {label: pd.DataFrame() for _, _, label in periods}
 
 @st.cache_data(ttl=3600)
 def get_chain_segmentation():
@@ -459,61 +654,156 @@ def get_chain_segmentation():
     # P4: Remaining chains (1-26 locations)
     
     query = """
-    WITH chain_sizes AS (
-        SELECT
-            chain,
-            COUNT(DISTINCT CONCAT(chain, b_name)) as location_count
-        FROM `merchant_portal_export.chargeback_orders_enriched`
-        WHERE order_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-            AND is_loop_enabled = true
-            AND loop_raised_timestamp IS NOT NULL
-            AND chain IS NOT NULL
-            AND chain != ''
-        GROUP BY chain
-    ),
-    -- Get volume from chargeback_split_summary for ranking purposes
-    chain_volumes AS (
+    -- Get volume from chargeback_split_summary_partitioned for ranking purposes
+    WITH chain_volumes AS (
         SELECT
             sm.chain,
             SUM(COALESCE(cs.enabled_customer_refunds, 0)) as total_volume
-        FROM `merchant_portal_export.chargeback_split_summary` cs
+        FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
         JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
         WHERE cs.chargeback_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
             AND sm.chain IS NOT NULL
             AND sm.chain != ''
         GROUP BY sm.chain
-    ),
-    ranked_chains AS (
-        SELECT
-            cs.chain,
-            cs.location_count,
-            COALESCE(cv.total_volume, 0) as total_volume,
-            ROW_NUMBER() OVER (ORDER BY cs.location_count DESC) as rank_by_locations
-        FROM chain_sizes cs
-        LEFT JOIN chain_volumes cv ON cs.chain = cv.chain
     )
+    -- Chain sizes, ranks and segments are rebuilt daily by sql/chain_segments_daily.sql
     SELECT
-        chain,
-        location_count,
-        total_volume,
-        rank_by_locations,
-        CASE
-            WHEN rank_by_locations <= 15 THEN 'P0'
-            WHEN rank_by_locations <= 40 THEN 'P1'
-            WHEN rank_by_locations <= 70 THEN 'P2'
-            WHEN rank_by_locations <= 132 THEN 'P3'
-            ELSE 'P4'
-        END as segment
-    FROM ranked_chains
+        seg.chain,
+        seg.location_count,
+        COALESCE(cv.total_volume, 0) as total_volume,
+        seg.rank_by_locations,
+        seg.segment
+    FROM `merchant_portal_export.chain_segments_daily` seg
+    LEFT JOIN chain_volumes cv ON seg.chain = cv.chain
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = run_query(query)
         return df
     except Exception as e:
         st.error(f"Error fetching segmentation: {e}")
         return pd.DataFrame()
 
+# Get segment-specific monthly data
+@st.cache_data(ttl=3600)
+def get_segment_monthly_data(periods):
+    """Get monthly metrics for every segment and (start, end, label) period in one query"""
+    
+    query = f"""
+    WITH periods AS (
+{periods_cte(periods)}
+    ),
+    segmented_chains AS (
+        -- Rebuilt daily by sql/chain_segments_daily.sql
+        SELECT chain, segment
+        FROM `merchant_portal_export.chain_segments_daily`
+    ),
+    monthly_data AS (
+        SELECT
+            p.period_label,
+            sc.segment,
+            sm.chain,
+            sm.slug,
+            cs.platform,
+            cs.external_status,
+            COALESCE(cs.enabled_won_disputes, 0) as won_amount,
+            CASE
+                WHEN cs.external_status IN ('ACCEPTED', 'DENIED')
+                    AND UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
+                THEN COALESCE(cs.enabled_customer_refunds, 0)
+                ELSE 0
+            END as settled_amount,
+            CASE
+                WHEN cs.external_status = 'ACCEPTED' THEN 'won'
+                WHEN cs.external_status = 'DENIED' THEN 'lost'
+                WHEN cs.external_status IN ('IN_PROGRESS', 'TO_BE_RAISED') THEN 'pending'
+                ELSE 'other'
+            END as dispute_status
+        FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
+        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
+        JOIN segmented_chains sc ON sm.chain = sc.chain
+        JOIN periods p ON cs.chargeback_date BETWEEN p.period_start AND p.period_end
+        WHERE cs.chargeback_date BETWEEN @range_start AND @range_end
+    ),
+    -- Get location count per segment from loop_enabled_orders
+    segment_locations AS (
+        SELECT
+            p.period_label,
+            sc.segment,
+            {location_count_sql('coe.')} as unique_locations
+        FROM `merchant_portal_export.loop_enabled_orders` coe
+        JOIN segmented_chains sc ON coe.chain = sc.chain
+        JOIN periods p ON coe.order_date BETWEEN p.period_start AND p.period_end
+        WHERE coe.order_date BETWEEN @range_start AND @range_end
+        GROUP BY p.period_label, sc.segment
+    ),
+    platform_metrics AS (
+        SELECT
+            period_label,
+            segment,
+            chain,
+            COUNT(DISTINCT CASE WHEN TRIM(platform) = 'Doordash' THEN slug END) as dd_locations,
+            COUNT(DISTINCT CASE WHEN TRIM(platform) = 'UberEats' THEN slug END) as ue_locations,
+            COUNT(DISTINCT CASE WHEN TRIM(platform) = 'Grubhub' THEN slug END) as gh_locations,
+            COUNT(*) as total_disputed,
+            COUNTIF(dispute_status = 'won') as disputes_won,
+            COUNTIF(dispute_status = 'lost') as disputes_lost,
+            COUNTIF(dispute_status = 'pending') as disputes_pending,
+            COUNTIF(external_status = 'IN_PROGRESS') as disputes_in_progress,
+            COUNTIF(external_status = 'TO_BE_RAISED') as disputes_to_be_raised,
+            COUNTIF(external_status = 'EXPIRED') as disputes_expired,
+            SUM(won_amount) as total_won,
+            SUM(settled_amount) as total_settled
+        FROM monthly_data
+        GROUP BY period_label, segment, chain
+    ),
+    segment_metrics AS (
+        SELECT
+            period_label,
+            segment,
+            COUNT(DISTINCT chain) as chain_count,
+            SUM(dd_locations) as dd_locations,
+            SUM(ue_locations) as ue_locations,
+            SUM(gh_locations) as gh_locations,
+            SUM(total_disputed) as total_disputed,
+            SUM(disputes_won) as disputes_won,
+            SUM(disputes_lost) as disputes_lost,
+            SUM(disputes_pending) as disputes_pending,
+            SUM(disputes_in_progress) as disputes_in_progress,
+            SUM(disputes_to_be_raised) as disputes_to_be_raised,
+            SUM(disputes_expired) as disputes_expired,
+            SUM(total_won) as total_recovered,
+            SUM(total_settled) as total_settled,
+            ROUND(SAFE_DIVIDE(SUM(total_won), NULLIF(SUM(total_settled), 0)) * 100, 2) as win_rate
+        FROM platform_metrics
+        GROUP BY period_label, segment
+    )
+    -- One row per segment and period, even when it has no disputes
+    SELECT
+        p.period_label,
+        seg_label as segment,
+        m.* EXCEPT (period_label, segment),
+        sl.unique_locations
+    FROM periods p
+    CROSS JOIN UNNEST(['P0', 'P1', 'P2', 'P3', 'P4']) as seg_label
+    LEFT JOIN segment_metrics m ON p.period_label = m.period_label AND seg_label = m.segment
+    LEFT JOIN segment_locations sl ON p.period_label = sl.period_label AND seg_label = sl.segment
+    """
+    
+    try:
+        df = overview_frame(run_query(query, periods_params(periods)))
+        # Keyed by (segment, period label)
+        return {
+            (row['segment'], row['period_label']): {
+                'month': row['period_label'],
+                **{key: row[key] for key, _ in OVERVIEW_COLUMNS.values()}
+            }
+            for row in df.to_dict('records')
+        }
+    except Exception as e:
+        st.error(f"Error fetching segment data: {e}")
+        return {}
+
 # Header with date context
 st.markdown(f"**Report Date**: {today.strftime('%B %d, %Y')} | **Last 30 Days**: {current_month_start.strftime('%b %d')} - {current_month_end.strftime('%b %d')}")
 st.markdown("---")
@@ -521,62 +811,143 @@ st.markdown("---")
 # Section 1: Overall Monthly Performance
 st.header("📈 Overall Monthly Performance")
 
-# Fetch data for all 5 periods
+# The 5 overview periods: (start, end, label)
+overview_periods = (
+    (current_month_start, current_month_end, "Last 30 Days"),
+    (last_90_start, last_90_end, "Last 90 Days"),
+    (last_month_start, last_month_end, last_month_start.strftime('%B')),
+    (month_2_start, month_2_end, month_2_start.strftime('%B')),
+    (month_3_start, month_3_end, month_3_start.strftime('%B')),
+)
+segment_periods = (overview_periods[0],) + overview_periods[2:]  # segments skip Last 90 Days
+
+@st.cache_data(ttl=3600)
+def get_segment_chain_tables(segment, periods, page):
+    """One page of a segment's chains as (total chain count, {prefix: display table}) for the period tabs"""
+    # One row per (period, chain); periods join like the other loaders so overlapping windows both count
+    query = f"""
+    WITH periods AS (
+{periods_cte(periods)}
+    ),
+    segmented_chains AS (
+        -- Rebuilt daily by sql/chain_segments_daily.sql
+        SELECT chain, segment
+        FROM `merchant_portal_export.chain_segments_daily`
+    ),
+    chain_monthly_data AS (
+        SELECT 
+            p.period_label,
+            sm.chain,
+            sm.slug,
+            cs.platform,
+            COALESCE(cs.enabled_won_disputes, 0) as won_amount,
+            CASE
+                WHEN cs.external_status IN ('ACCEPTED', 'DENIED')
+                    AND UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
+                THEN COALESCE(cs.enabled_customer_refunds, 0)
+                ELSE 0
+            END as settled_amount,
+            CASE
+                WHEN cs.external_status = 'ACCEPTED' THEN 'won'
+                WHEN cs.external_status = 'DENIED' THEN 'lost'
+                WHEN cs.external_status IN ('IN_PROGRESS', 'TO_BE_RAISED') THEN 'pending'
+                ELSE 'other'
+            END as dispute_status
+        FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
+        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
+        JOIN segmented_chains sc ON sm.chain = sc.chain
+        JOIN periods p ON cs.chargeback_date BETWEEN p.period_start AND p.period_end
+        WHERE cs.chargeback_date BETWEEN @range_start AND @range_end
+            AND sc.segment = @segment
+    ),
+    -- One page of chains, busiest Last 30 Days first; total_chains counts all of them
+    chain_page AS (
+        SELECT
+            chain,
+            COUNT(*) OVER () as total_chains
+        FROM chain_monthly_data
+        GROUP BY chain
+        ORDER BY SUM(IF(period_label = @period_label_0, won_amount, 0)) DESC, chain
+        LIMIT @page_size OFFSET @page_offset
+    )
+    SELECT 
+        period_label,
+        chain,
+        total_chains,
+        COUNT(DISTINCT CASE WHEN TRIM(platform) = 'Doordash' THEN slug END) as dd,
+        COUNT(DISTINCT CASE WHEN TRIM(platform) = 'UberEats' THEN slug END) as ue,
+        COUNT(DISTINCT CASE WHEN TRIM(platform) = 'Grubhub' THEN slug END) as gh,
+        COUNT(*) as disputes,
+        COUNTIF(dispute_status = 'won') as won,
+        COUNTIF(dispute_status = 'lost') as lost,
+        COUNTIF(dispute_status = 'pending') as pending,
+        SUM(won_amount) as recovered,
+        SUM(settled_amount) as settled,
+        ROUND(SAFE_DIVIDE(SUM(won_amount), NULLIF(SUM(settled_amount), 0)) * 100, 2) as win_rate
+    FROM chain_monthly_data
+    JOIN chain_page USING (chain)
+    GROUP BY period_label, chain, total_chains
+    """
+    
+    params = periods_params(periods) + [
+        bigquery.ScalarQueryParameter('segment', 'STRING', segment),
+        bigquery.ScalarQueryParameter('page_size', 'INT64', CHAIN_PAGE_SIZE),
+        bigquery.ScalarQueryParameter('page_offset', 'INT64', (page - 1) * CHAIN_PAGE_SIZE),
+    ]
+    chain_long = run_query(query, params)
+    chain_df = pivot_chain_periods(chain_long, periods)
+    if chain_df.empty:
+        return 0, {}
+    # Display tables are built once here, so reruns reuse them instead of reformatting every tab
+    return int(chain_long['total_chains'].iloc[0]), {prefix: chain_period_display(chain_df, prefix) for prefix in CHAIN_PERIOD_PREFIXES}
+
+# Fetch data for all 5 periods in one query per section. The queries are independent,
+# so run them concurrently; worker threads get the script run context so st.error() still renders.
 with st.spinner("Loading monthly overview data..."):
-    mtd_data = get_monthly_overview(current_month_start, current_month_end, "Last 30 Days", filter_chains, filter_platforms, filter_bnames)
-    last_90_data = get_monthly_overview(last_90_start, last_90_end, "Last 90 Days", filter_chains, filter_platforms, filter_bnames)
-    month_1_data = get_monthly_overview(last_month_start, last_month_end, last_month_start.strftime('%B'), filter_chains, filter_platforms, filter_bnames)
-    month_2_data = get_monthly_overview(month_2_start, month_2_end, month_2_start.strftime('%B'), filter_chains, filter_platforms, filter_bnames)
-    month_3_data = get_monthly_overview(month_3_start, month_3_end, month_3_start.strftime('%B'), filter_chains, filter_platforms, filter_bnames)
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=5,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+    ) as executor:
+        futures = {
+            'overviews': executor.submit(get_monthly_overviews, overview_periods, filter_chains, filter_platforms, filter_bnames),
+            'platform_breakdowns': executor.submit(get_platform_breakdowns, overview_periods, filter_chains, filter_platforms, filter_bnames),
+            'chains_movement': executor.submit(get_chains_movement, current_month_start, current_month_end, last_month_start, last_month_end),
+            'segmentation': executor.submit(get_chain_segmentation),
+            'segment_monthly': executor.submit(get_segment_monthly_data, segment_periods),
+        }
+
+    overviews = futures['overviews'].result()
+    mtd_data, last_90_data, month_1_data, month_2_data, month_3_data = (
+        overviews.get(label) for _, _, label in overview_periods
+    )
+    # The same records column-wise (one row per period label) for totals and trend series
+    periods_df = pd.DataFrame.from_dict(overviews, orient='index')
 
 # Create a comprehensive table view
 if all([mtd_data, last_90_data, month_1_data, month_2_data, month_3_data]):
-    # Prepare data for table
-    table_data = []
-
-    for data in [mtd_data, last_90_data, month_1_data, month_2_data, month_3_data]:
-        if data:
-            recovered_per_location = data['recovered'] / data['unique_locations'] if data['unique_locations'] > 0 else 0
-            row = {
-                'Period': data['month'],
-                'Chains (chain)': f"{data['chains']:,}",
-                'Locations (chain + b_name)': f"{data['unique_locations']:,}",
-                'DoorDash (slug)': f"{data['dd_locations']:,}",
-                'UberEats (slug)': f"{data['ue_locations']:,}",
-                'Grubhub (slug)': f"{data['gh_locations']:,}",
-                'Disputed': f"{data['disputed']:,}",
-                'Won': f"{data['won']:,}",
-                'Lost': f"{data['lost']:,}",
-                'Pending': f"{data['pending']:,}",
-                'In Progress': f"{data['in_progress']:,}",
-                'To Be Raised': f"{data['to_be_raised']:,}",
-                'Expired': f"{data['expired']:,}",
-                'Total Recovered (enabled_won_disputes)': f"${data['recovered']:,.0f}",
-                '$/Location': f"${recovered_per_location:.0f}",
-                'Win Rate': f"{data['win_rate']:.1f}%"
-            }
-            table_data.append(row)
-    
     # Display as DataFrame
-    overview_df = pd.DataFrame(table_data)
+    overview_df = overview_table([mtd_data, last_90_data, month_1_data, month_2_data, month_3_data])
     
     # Style the dataframe
-    styled_df = overview_df.style.set_properties(**{
+    styled_df = overview_df.style.format(OVERVIEW_TABLE_FORMAT).set_properties(**{
         'background-color': '#f5f5f5',
         'color': 'black',
         'border-color': 'white'
     })
     
     # Highlight Last 30 Days and Last 90 Days rows
-    def highlight_mtd(row):
-        if 'Last 30 Days' in row['Period']:
-            return ['background-color: #ffe6e6'] * len(row)
-        elif 'Last 90 Days' in row['Period']:
-            return ['background-color: #e6f2ff'] * len(row)
-        else:
-            return [''] * len(row)
+    def highlight_mtd(df):
+        period = df['Period'].astype(str)
+        row_styles = np.select(
+            [period.str.contains('Last 30 Days', regex=False), period.str.contains('Last 90 Days', regex=False)],
+            ['background-color: #ffe6e6', 'background-color: #e6f2ff'],
+            default=''
+        )
+        # One style per row, repeated across every column
+        return pd.DataFrame(np.repeat(row_styles[:, None], df.shape[1], axis=1), index=df.index, columns=df.columns)
     
-    styled_df = styled_df.apply(highlight_mtd, axis=1)
+    styled_df = styled_df.apply(highlight_mtd, axis=None)
     
     st.dataframe(styled_df, use_container_width=True, hide_index=True)
     
@@ -584,12 +955,11 @@ if all([mtd_data, last_90_data, month_1_data, month_2_data, month_3_data]):
     st.markdown("---")
     st.subheader("📱 Platform-Specific Performance")
     
-    # Fetch platform data for all periods
-    platform_mtd = get_platform_breakdown(current_month_start, current_month_end, "Last 30 Days")
-    platform_90d = get_platform_breakdown(last_90_start, last_90_end, "Last 90 Days")
-    platform_m1 = get_platform_breakdown(last_month_start, last_month_end, last_month_start.strftime('%B'))
-    platform_m2 = get_platform_breakdown(month_2_start, month_2_end, month_2_start.strftime('%B'))
-    platform_m3 = get_platform_breakdown(month_3_start, month_3_end, month_3_start.strftime('%B'))
+    # Platform data for all periods (fetched above)
+    platform_breakdowns = futures['platform_breakdowns'].result()
+    platform_mtd, platform_90d, platform_m1, platform_m2, platform_m3 = (
+        platform_breakdowns[label] for _, _, label in overview_periods
+    )
 
     # Create tabs for each time period
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["Last 30 Days",
@@ -602,29 +972,28 @@ if all([mtd_data, last_90_data, month_1_data, month_2_data, month_3_data]):
         if df.empty:
             return pd.DataFrame()
         
-        # Add calculated columns
-        df['recovered_per_location'] = df['total_recovered'] / df['unique_locations'].replace(0, 1)
+        recovered_per_location = pd.Series(safe_divide(df['total_recovered'], df['unique_locations']), index=df.index)
         
-        # Format for display
-        formatted_data = []
-        for _, row in df.iterrows():
-            formatted_data.append({
-                'Platform': row['platform'],
-                'Locations (chain + b_name)': f"{int(row['unique_locations']):,}",
-                'Slugs (slug)': f"{int(row['slug_count']):,}",
-                'Disputed': f"{int(row['total_disputed']):,}",
-                'Won': f"{int(row['disputes_won']):,}",
-                'Lost': f"{int(row['disputes_lost']):,}",
-                'Pending': f"{int(row['disputes_pending']):,}",
-                'In Progress': f"{int(row['disputes_in_progress']):,}",
-                'To Be Raised': f"{int(row['disputes_to_be_raised']):,}",
-                'Expired': f"{int(row['disputes_expired']):,}",
-                'Total Recovered (enabled_won_disputes)': f"${row['total_recovered']:,.0f}",
-                '$/Location': f"${row['recovered_per_location']:.0f}",
-                'Win Rate': f"{row['win_rate']:.1f}%"
-            })
+        # Format for display, one vectorized column at a time
+        count_columns = {
+            'Locations (chain + b_name)': 'unique_locations',
+            'Slugs (slug)': 'slug_count',
+            'Disputed': 'total_disputed',
+            'Won': 'disputes_won',
+            'Lost': 'disputes_lost',
+            'Pending': 'disputes_pending',
+            'In Progress': 'disputes_in_progress',
+            'To Be Raised': 'disputes_to_be_raised',
+            'Expired': 'disputes_expired',
+        }
+        formatted = pd.DataFrame({'Platform': df['platform']})
+        for label, col in count_columns.items():
+            formatted[label] = df[col].astype('int64').map('{:,}'.format)
+        formatted['Total Recovered (enabled_won_disputes)'] = df['total_recovered'].map('${:,.0f}'.format)
+        formatted['$/Location'] = recovered_per_location.map('${:.0f}'.format)
+        formatted['Win Rate'] = df['win_rate'].map('{:.1f}%'.format)
         
-        return pd.DataFrame(formatted_data)
+        return formatted.reset_index(drop=True)
     
     with tab1:
         if not platform_mtd.empty:
@@ -660,8 +1029,8 @@ if all([mtd_data, last_90_data, month_1_data, month_2_data, month_3_data]):
     st.markdown("---")
     st.subheader("🔄 Chain Movement (Last 30 Days vs Previous Month)")
     
-    # Get chain movement data
-    chains_movement = get_chains_movement(current_month_start, current_month_end, last_month_start, last_month_end)
+    # Get chain movement data (fetched above)
+    chains_movement = futures['chains_movement'].result()
     
     if not chains_movement.empty:
         # Group by segment
@@ -714,9 +1083,12 @@ if all([mtd_data, last_90_data, month_1_data, month_2_data, month_3_data]):
     # Add summary metrics below the table
     st.markdown("---")
     col1, col2, col3, col4 = st.columns(4)
+    mtd_vs_last, mtd_vol_vs_last = pct_change(
+        [mtd_data['win_rate'], mtd_data['recovered']],
+        [month_1_data['win_rate'], month_1_data['recovered']]
+    )
     
     with col1:
-        mtd_vs_last = ((mtd_data['win_rate'] - month_1_data['win_rate']) / month_1_data['win_rate'] * 100) if month_1_data['win_rate'] > 0 else 0
         st.metric(
             "L30D vs Last Month (Win Rate)",
             f"{mtd_data['win_rate']:.1f}%",
@@ -724,7 +1096,6 @@ if all([mtd_data, last_90_data, month_1_data, month_2_data, month_3_data]):
         )
 
     with col2:
-        mtd_vol_vs_last = ((mtd_data['recovered'] - month_1_data['recovered']) / month_1_data['recovered'] * 100) if month_1_data['recovered'] > 0 else 0
         st.metric(
             "L30D vs Last Month (Recovery)",
             f"${mtd_data['recovered']/1000:.1f}K",
@@ -732,7 +1103,7 @@ if all([mtd_data, last_90_data, month_1_data, month_2_data, month_3_data]):
         )
     
     with col3:
-        total_disputes = sum([d['disputed'] for d in [mtd_data, last_90_data, month_1_data, month_2_data, month_3_data]])
+        total_disputes = periods_df['disputed'].sum()
         st.metric("Total Disputes (5 periods)", f"{total_disputes:,}")
     
     with col4:
@@ -742,52 +1113,66 @@ else:
     st.error("Unable to load monthly overview data")
 
 # Trend Analysis
+@st.cache_data(ttl=3600)
+def build_win_rate_trend(months, win_rates):
+    """Win rate trend line as plotly JSON, rebuilt only when the points change"""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=months, 
+        y=win_rates,
+        mode='lines+markers',
+        name='Win Rate',
+        line=dict(color='#00cc88', width=3),
+        marker=dict(size=10)
+    ))
+    fig.update_layout(
+        title="Win Rate Trend",
+        yaxis_title="Win Rate (%)",
+        height=300,
+        showlegend=False
+    )
+    return fig.to_json()
+
+@st.cache_data(ttl=3600)
+def build_recovery_trend(months, volumes):
+    """Recovery volume bars as plotly JSON, latest period highlighted"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=months,
+        y=volumes,
+        name='Recovered',
+        marker_color=['#636EFA'] * (len(months) - 1) + ['#ff4b4b']
+    ))
+    fig.update_layout(
+        title="Recovery Volume Trend",
+        yaxis_title="Recovered ($K)",
+        height=300,
+        showlegend=False
+    )
+    return fig.to_json()
+
 if all([mtd_data, month_1_data, month_2_data, month_3_data]):
     st.markdown("---")
     st.subheader("📊 Trend Analysis")
     
+    # Oldest month first, Last 30 Days last (Last 90 Days is not a trend point)
+    trend_df = periods_df.loc[[overview_periods[i][2] for i in (4, 3, 2, 0)]]
+    months = trend_df['month'].tolist()
+    
     col1, col2 = st.columns(2)
     
     with col1:
         # Win Rate Trend
-        months = [month_3_data['month'], month_2_data['month'], month_1_data['month'], mtd_data['month']]
-        win_rates = [month_3_data['win_rate'], month_2_data['win_rate'], month_1_data['win_rate'], mtd_data['win_rate']]
+        win_rates = trend_df['win_rate'].tolist()
         
-        fig_wr = go.Figure()
-        fig_wr.add_trace(go.Scatter(
-            x=months, 
-            y=win_rates,
-            mode='lines+markers',
-            name='Win Rate',
-            line=dict(color='#00cc88', width=3),
-            marker=dict(size=10)
-        ))
-        fig_wr.update_layout(
-            title="Win Rate Trend",
-            yaxis_title="Win Rate (%)",
-            height=300,
-            showlegend=False
-        )
+        fig_wr = go.Figure(json.loads(build_win_rate_trend(tuple(months), tuple(win_rates))))
         st.plotly_chart(fig_wr, use_container_width=True)
     
     with col2:
         # Recovery Volume Trend
-        volumes = [month_3_data['recovered']/1000, month_2_data['recovered']/1000, 
-                  month_1_data['recovered']/1000, mtd_data['recovered']/1000]
+        volumes = (trend_df['recovered'] / 1000).tolist()
         
-        fig_vol = go.Figure()
-        fig_vol.add_trace(go.Bar(
-            x=months,
-            y=volumes,
-            name='Recovered',
-            marker_color=['#636EFA', '#636EFA', '#636EFA', '#ff4b4b']
-        ))
-        fig_vol.update_layout(
-            title="Recovery Volume Trend",
-            yaxis_title="Recovered ($K)",
-            height=300,
-            showlegend=False
-        )
+        fig_vol = go.Figure(json.loads(build_recovery_trend(tuple(months), tuple(volumes))))
         st.plotly_chart(fig_vol, use_container_width=True)
 
 st.markdown("---")
@@ -795,8 +1180,8 @@ st.markdown("---")
 # Section 2: P0-P4 Segment Performance (Last 30 Days)
 st.header("🎯 Segment Performance (Last 30 Days)")
 
-# Get segmentation data
-segmentation_df = get_chain_segmentation()
+# Get segmentation data (fetched above)
+segmentation_df = futures['segmentation'].result()
 
 if not segmentation_df.empty:
     # Get current month performance by segment
@@ -805,45 +1190,25 @@ if not segmentation_df.empty:
         """Get Last 30 Days performance by segment"""
         
         query = f"""
-        WITH chain_segments AS (
-            SELECT
-                chain,
-                COUNT(DISTINCT CONCAT(chain, b_name)) as location_count,
-                ROW_NUMBER() OVER (ORDER BY COUNT(DISTINCT CONCAT(chain, b_name)) DESC) as rank_by_locations
-            FROM `merchant_portal_export.chargeback_orders_enriched`
-            WHERE order_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-                AND is_loop_enabled = true
-                AND loop_raised_timestamp IS NOT NULL
-                AND chain IS NOT NULL
-                AND chain != ''
-            GROUP BY chain
+        WITH segmented_chains AS (
+            -- Rebuilt daily by sql/chain_segments_daily.sql
+            SELECT chain, location_count, segment
+            FROM `merchant_portal_export.chain_segments_daily`
         ),
-        segmented_chains AS (
+        -- Location counts for every segment in one grouped scan of loop_enabled_orders
+        segment_locations AS (
             SELECT
-                chain,
-                location_count,
-                CASE
-                    WHEN rank_by_locations <= 15 THEN 'P0'
-                    WHEN rank_by_locations <= 40 THEN 'P1'
-                    WHEN rank_by_locations <= 70 THEN 'P2'
-                    WHEN rank_by_locations <= 132 THEN 'P3'
-                    ELSE 'P4'
-                END as segment
-            FROM chain_segments
+                sc.segment,
+                {location_count_sql('coe.')} as total_locations
+            FROM `merchant_portal_export.loop_enabled_orders` coe
+            JOIN segmented_chains sc ON coe.chain = sc.chain
+            WHERE coe.order_date BETWEEN @current_month_start AND @current_month_end
+            GROUP BY sc.segment
         ),
         mtd_performance AS (
             SELECT
                 sc.segment,
                 COUNT(DISTINCT sm.chain) as chain_count,
-                (
-                    SELECT COUNT(DISTINCT CONCAT(coe.chain, coe.b_name))
-                    FROM `merchant_portal_export.chargeback_orders_enriched` coe
-                    JOIN (SELECT DISTINCT chain FROM segmented_chains WHERE segment = sc.segment) seg_chains
-                        ON coe.chain = seg_chains.chain
-                    WHERE coe.order_date BETWEEN '{current_month_start}' AND '{current_month_end}'
-                        AND coe.is_loop_enabled = true
-                        AND coe.loop_raised_timestamp IS NOT NULL
-                ) as total_locations,
                 SUM(COALESCE(cs.enabled_won_disputes, 0)) as total_won,
                 SUM(CASE
                     WHEN cs.external_status IN ('ACCEPTED', 'DENIED')
@@ -851,33 +1216,35 @@ if not segmentation_df.empty:
                     ELSE 0
                 END) as total_settled,
                 COUNT(*) as dispute_count
-            FROM `merchant_portal_export.chargeback_split_summary` cs
+            FROM `merchant_portal_export.chargeback_split_summary_partitioned` cs
             JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
             JOIN (SELECT DISTINCT chain, segment, location_count FROM segmented_chains) sc ON sm.chain = sc.chain
-            WHERE cs.chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}'
+            WHERE cs.chargeback_date BETWEEN @current_month_start AND @current_month_end
             GROUP BY sc.segment
         )
         SELECT
-            segment,
-            chain_count,
-            total_locations as location_count,
-            total_won,
-            total_settled,
-            dispute_count,
-            ROUND(SAFE_DIVIDE(total_won, NULLIF(total_settled, 0)) * 100, 2) as win_rate,
-            ROUND(SAFE_DIVIDE(total_won, NULLIF(total_locations, 0)), 2) as avg_per_location
-        FROM mtd_performance
-        ORDER BY segment
+            mp.segment,
+            mp.chain_count,
+            COALESCE(sl.total_locations, 0) as location_count,
+            mp.total_won,
+            mp.total_settled,
+            mp.dispute_count,
+            ROUND(SAFE_DIVIDE(mp.total_won, NULLIF(mp.total_settled, 0)) * 100, 2) as win_rate,
+            ROUND(SAFE_DIVIDE(mp.total_won, NULLIF(sl.total_locations, 0)), 2) as avg_per_location
+        FROM mtd_performance mp
+        LEFT JOIN segment_locations sl ON mp.segment = sl.segment
+        ORDER BY mp.segment
         """
         
-        return pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
+        params = [
+            bigquery.ScalarQueryParameter('current_month_start', 'DATE', current_month_start),
+            bigquery.ScalarQueryParameter('current_month_end', 'DATE', current_month_end),
+        ]
+        return run_query(query, params)
     
     segment_perf = get_segment_performance()
     
     if not segment_perf.empty:
-        # Display segment cards
-        cols = st.columns(5)
-        
         segment_colors = {
             'P0': '#ff4b4b',
             'P1': '#ffa500',
@@ -894,169 +1261,37 @@ if not segmentation_df.empty:
             'P4': 'Long Tail (Monthly)'
         }
         
-        for i, segment in enumerate(['P0', 'P1', 'P2', 'P3', 'P4']):
-            seg_data = segment_perf[segment_perf['segment'] == segment]
-            
-            with cols[i]:
-                if not seg_data.empty:
-                    row = seg_data.iloc[0]
-                    
-                    st.markdown(f"""
-                    <div style='background-color: {segment_colors[segment]}20; 
-                                padding: 10px; 
-                                border-radius: 10px; 
-                                border-left: 4px solid {segment_colors[segment]}'>
-                        <h4 style='color: {segment_colors[segment]}; margin: 0;'>{segment}</h4>
-                        <p style='margin: 0; font-size: 0.8em;'>{segment_names[segment]}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    st.metric("Chains", f"{int(row['chain_count'])}")
-                    st.metric("Locations", f"{int(row['location_count']):,}")
-                    st.metric("Win Rate", f"{row['win_rate']:.1f}%")
-                    st.metric("Recovered", f"${row['total_won']/1000:.1f}K")
-                else:
-                    st.markdown(f"### {segment}")
-                    st.info("No data")
+        # One table row per segment instead of a column of cards and metrics each
+        seg_rows = segment_perf[segment_perf['segment'].isin(segment_names.keys())].sort_values('segment').reset_index(drop=True)
+        cards_df = pd.DataFrame({
+            'Segment': seg_rows['segment'],
+            'Tier': seg_rows['segment'].map(segment_names),
+            'Chains': seg_rows['chain_count'].astype('int64').map('{:,}'.format),
+            'Locations': seg_rows['location_count'].astype('int64').map('{:,}'.format),
+            'Win Rate': seg_rows['win_rate'].map('{:.1f}%'.format),
+            'Recovered': (seg_rows['total_won'] / 1000).map('${:.1f}K'.format),
+        })
+        
+        # Tint each row with its segment colour, accent bar on the segment cell
+        row_colors = seg_rows['segment'].map(segment_colors).to_numpy()
+        card_styles = pd.DataFrame(
+            np.repeat([[f'background-color: {color}20'] for color in row_colors], cards_df.shape[1], axis=1),
+            index=cards_df.index, columns=cards_df.columns
+        )
+        card_styles['Segment'] = [f'background-color: {color}20; border-left: 4px solid {color}; color: {color}; font-weight: bold'
+                                  for color in row_colors]
+        st.dataframe(cards_df.style.apply(lambda _: card_styles, axis=None), use_container_width=True, hide_index=True)
+        
+        missing_segments = [segment for segment in segment_names if segment not in set(seg_rows['segment'])]
+        if missing_segments:
+            st.info(f"No data for {', '.join(missing_segments)}")
 
 # Section 3: P0-P4 Segment Breakdown
 st.markdown("---")
 st.header("📊 Segment Performance Breakdown")
 
-# Get segment-specific monthly data
-@st.cache_data(ttl=3600)
-def get_segment_monthly_data(start_date, end_date, month_label, segment):
-    """Get monthly metrics for a specific segment"""
-    
-    query = f"""
-    WITH chain_segments AS (
-        SELECT 
-            sm.chain,
-            COUNT(DISTINCT sm.slug) as location_count,
-            ROW_NUMBER() OVER (ORDER BY COUNT(DISTINCT sm.slug) DESC) as rank_by_locations
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        WHERE cs.chargeback_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-            AND sm.chain IS NOT NULL
-            AND sm.chain != ''
-        GROUP BY sm.chain
-    ),
-    segmented_chains AS (
-        SELECT 
-            chain,
-            CASE 
-                WHEN rank_by_locations <= 15 THEN 'P0'
-                WHEN rank_by_locations <= 40 THEN 'P1'
-                WHEN rank_by_locations <= 70 THEN 'P2'
-                WHEN rank_by_locations <= 132 THEN 'P3'
-                ELSE 'P4'
-            END as segment
-        FROM chain_segments
-    ),
-    monthly_data AS (
-        SELECT
-            sm.chain,
-            sm.slug,
-            sm.b_name_id,
-            cs.platform,
-            cs.external_status,
-            COALESCE(cs.enabled_won_disputes, 0) as won_amount,
-            CASE
-                WHEN cs.external_status IN ('ACCEPTED', 'DENIED')
-                    AND UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
-                THEN COALESCE(cs.enabled_customer_refunds, 0)
-                ELSE 0
-            END as settled_amount,
-            CASE
-                WHEN cs.external_status = 'ACCEPTED' THEN 'won'
-                WHEN cs.external_status = 'DENIED' THEN 'lost'
-                WHEN cs.external_status IN ('IN_PROGRESS', 'TO_BE_RAISED') THEN 'pending'
-                ELSE 'other'
-            END as dispute_status
-        FROM `merchant_portal_export.chargeback_split_summary` cs
-        JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-        JOIN segmented_chains sc ON sm.chain = sc.chain
-        WHERE cs.chargeback_date BETWEEN '{start_date}' AND '{end_date}'
-            AND sc.segment = '{segment}'
-    ),
-    -- Get location count for the segment from chargeback_orders_enriched
-    segment_locations AS (
-        SELECT
-            COUNT(DISTINCT CONCAT(coe.chain, coe.b_name)) as unique_locations
-        FROM `merchant_portal_export.chargeback_orders_enriched` coe
-        JOIN (
-            SELECT DISTINCT chain FROM segmented_chains WHERE segment = '{segment}'
-        ) sc ON coe.chain = sc.chain
-        WHERE coe.order_date BETWEEN '{start_date}' AND '{end_date}'
-            AND coe.is_loop_enabled = true
-            AND coe.loop_raised_timestamp IS NOT NULL
-    ),
-    platform_metrics AS (
-        SELECT
-            chain,
-            COUNT(DISTINCT CASE WHEN TRIM(platform) = 'Doordash' THEN slug END) as dd_locations,
-            COUNT(DISTINCT CASE WHEN TRIM(platform) = 'UberEats' THEN slug END) as ue_locations,
-            COUNT(DISTINCT CASE WHEN TRIM(platform) = 'Grubhub' THEN slug END) as gh_locations,
-            COUNT(*) as total_disputed,
-            SUM(CASE WHEN dispute_status = 'won' THEN 1 ELSE 0 END) as disputes_won,
-            SUM(CASE WHEN dispute_status = 'lost' THEN 1 ELSE 0 END) as disputes_lost,
-            SUM(CASE WHEN dispute_status = 'pending' THEN 1 ELSE 0 END) as disputes_pending,
-            SUM(CASE WHEN external_status = 'IN_PROGRESS' THEN 1 ELSE 0 END) as disputes_in_progress,
-            SUM(CASE WHEN external_status = 'TO_BE_RAISED' THEN 1 ELSE 0 END) as disputes_to_be_raised,
-            SUM(CASE WHEN external_status = 'EXPIRED' THEN 1 ELSE 0 END) as disputes_expired,
-            SUM(won_amount) as total_won,
-            SUM(settled_amount) as total_settled
-        FROM monthly_data
-        GROUP BY chain
-    )
-    SELECT
-        COUNT(DISTINCT chain) as chain_count,
-        (SELECT unique_locations FROM segment_locations) as unique_locations,
-        SUM(dd_locations) as dd_locations,
-        SUM(ue_locations) as ue_locations,
-        SUM(gh_locations) as gh_locations,
-        SUM(total_disputed) as total_disputed,
-        SUM(disputes_won) as disputes_won,
-        SUM(disputes_lost) as disputes_lost,
-        SUM(disputes_pending) as disputes_pending,
-        SUM(disputes_in_progress) as disputes_in_progress,
-        SUM(disputes_to_be_raised) as disputes_to_be_raised,
-        SUM(disputes_expired) as disputes_expired,
-        SUM(total_won) as total_recovered,
-        SUM(total_settled) as total_settled,
-        ROUND(SAFE_DIVIDE(SUM(total_won), NULLIF(SUM(total_settled), 0)) * 100, 2) as win_rate
-    FROM platform_metrics
-    """
-    
-    try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
-        if not df.empty:
-            row = df.iloc[0]
-            return {
-                'month': month_label,
-                'chains': int(row['chain_count']) if pd.notna(row['chain_count']) else 0,
-                'unique_locations': int(row['unique_locations']) if pd.notna(row['unique_locations']) else 0,
-                'dd_locations': int(row['dd_locations']) if pd.notna(row['dd_locations']) else 0,
-                'ue_locations': int(row['ue_locations']) if pd.notna(row['ue_locations']) else 0,
-                'gh_locations': int(row['gh_locations']) if pd.notna(row['gh_locations']) else 0,
-                'disputed': int(row['total_disputed']) if pd.notna(row['total_disputed']) else 0,
-                'won': int(row['disputes_won']) if pd.notna(row['disputes_won']) else 0,
-                'lost': int(row['disputes_lost']) if pd.notna(row['disputes_lost']) else 0,
-                'pending': int(row['disputes_pending']) if pd.notna(row['disputes_pending']) else 0,
-                'in_progress': int(row['disputes_in_progress']) if pd.notna(row['disputes_in_progress']) else 0,
-                'to_be_raised': int(row['disputes_to_be_raised']) if pd.notna(row['disputes_to_be_raised']) else 0,
-                'expired': int(row['disputes_expired']) if pd.notna(row['disputes_expired']) else 0,
-                'recovered': float(row['total_recovered']) if pd.notna(row['total_recovered']) else 0,
-                'settled': float(row['total_settled']) if pd.notna(row['total_settled']) else 0,
-                'win_rate': float(row['win_rate']) if pd.notna(row['win_rate']) else 0
-            }
-        return None
-    except Exception as e:
-        st.error(f"Error fetching segment data: {e}")
-        return None
-
-# Get chain movement data once for all segments
-chains_movement = get_chains_movement(current_month_start, current_month_end, last_month_start, last_month_end)
+# Chain movement data for all segments (fetched above)
+chains_movement = futures['chains_movement'].result()
 
 # Display each segment
 segments = ['P0', 'P1', 'P2', 'P3', 'P4']
@@ -1075,317 +1310,139 @@ segment_names = {
     'P4': 'Long Tail (Monthly Monitoring)'
 }
 
-for segment in segments:
+# Every segment and period, fetched in one query above
+segment_monthly_data = futures['segment_monthly'].result()
+
+# Every segment has a (zero-filled) row per period, so gate on actual activity: segments with
+# no chains or disputes in any period get one line here rather than an empty section each
+segments_present = {
+    segment for (segment, _), data in segment_monthly_data.items()
+    if data['chains'] > 0 or data['disputed'] > 0
+}
+segments_without_data = [segment for segment in segments if segment not in segments_present]
+if segments_without_data:
+    st.info(f"No data available for {', '.join(segments_without_data)}")
+
+@st.fragment
+def render_segment(segment):
+    """One segment's section; its widgets (chain loading, paging) rerun only this fragment"""
     st.markdown("---")
     st.subheader(f"{segment} - {segment_names[segment]}")
     
-    with st.spinner(f"Loading {segment} data..."):
-        # Fetch data for all periods for this segment
-        seg_mtd = get_segment_monthly_data(current_month_start, current_month_end, "Last 30 Days", segment)
-        seg_m1 = get_segment_monthly_data(last_month_start, last_month_end, last_month_start.strftime('%B'), segment)
-        seg_m2 = get_segment_monthly_data(month_2_start, month_2_end, month_2_start.strftime('%B'), segment)
-        seg_m3 = get_segment_monthly_data(month_3_start, month_3_end, month_3_start.strftime('%B'), segment)
+    seg_mtd, seg_m1, seg_m2, seg_m3 = (
+        segment_monthly_data[(segment, label)] for _, _, label in segment_periods
+    )
     
-    if all([seg_mtd, seg_m1, seg_m2, seg_m3]):
-        # Create table for this segment
-        seg_table_data = []
-        
-        for data in [seg_mtd, seg_m1, seg_m2, seg_m3]:
-            if data:
-                recovered_per_location = data['recovered'] / data['unique_locations'] if data['unique_locations'] > 0 else 0
-                row = {
-                    'Period': data['month'],
-                    'Chains (chain)': f"{data['chains']:,}",
-                    'Locations (chain + b_name)': f"{data['unique_locations']:,}",
-                    'DoorDash (slug)': f"{data['dd_locations']:,}",
-                    'UberEats (slug)': f"{data['ue_locations']:,}",
-                    'Grubhub (slug)': f"{data['gh_locations']:,}",
-                    'Disputed': f"{data['disputed']:,}",
-                    'Won': f"{data['won']:,}",
-                    'Lost': f"{data['lost']:,}",
-                    'Pending': f"{data['pending']:,}",
-                    'In Progress': f"{data['in_progress']:,}",
-                    'To Be Raised': f"{data['to_be_raised']:,}",
-                    'Expired': f"{data['expired']:,}",
-                    'Total Recovered (enabled_won_disputes)': f"${data['recovered']:,.0f}",
-                    '$/Location': f"${recovered_per_location:.0f}",
-                    'Win Rate': f"{data['win_rate']:.1f}%"
-                }
-                seg_table_data.append(row)
-        
-        # Display as DataFrame
-        seg_df = pd.DataFrame(seg_table_data)
-        
-        # Style the dataframe
-        styled_seg_df = seg_df.style.set_properties(**{
-            'background-color': f'{segment_colors[segment]}20',
-            'color': 'black',
-            'border-color': 'white'
-        })
-        
-        # Highlight Last 30 Days row
-        def highlight_seg_mtd(row):
-            if 'Last 30 Days' in row['Period']:
-                return [f'background-color: {segment_colors[segment]}40'] * len(row)
-            else:
-                return [''] * len(row)
-        
-        styled_seg_df = styled_seg_df.apply(highlight_seg_mtd, axis=1)
-        
-        st.dataframe(styled_seg_df, use_container_width=True, hide_index=True)
-        
-        # Quick metrics for this segment
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            mtd_vs_last_wr = ((seg_mtd['win_rate'] - seg_m1['win_rate']) / seg_m1['win_rate'] * 100) if seg_m1['win_rate'] > 0 else 0
-            st.metric(
-                f"{segment} L30D vs Last Month (Win Rate)",
-                f"{seg_mtd['win_rate']:.1f}%",
-                f"{mtd_vs_last_wr:+.1f}%"
-            )
+    # Create table for this segment
+    seg_df = overview_table([seg_mtd, seg_m1, seg_m2, seg_m3])
+    
+    # Style the dataframe
+    styled_seg_df = seg_df.style.format(OVERVIEW_TABLE_FORMAT).set_properties(**{
+        'background-color': f'{segment_colors[segment]}20',
+        'color': 'black',
+        'border-color': 'white'
+    })
+    
+    # Highlight Last 30 Days row with a precomputed style frame (no per-row callback)
+    seg_styles = pd.DataFrame('', index=seg_df.index, columns=seg_df.columns)
+    seg_styles.loc[seg_df['Period'].str.contains('Last 30 Days', regex=False)] = f'background-color: {segment_colors[segment]}40'
+    styled_seg_df = styled_seg_df.apply(lambda _: seg_styles, axis=None)
+    
+    st.dataframe(styled_seg_df, use_container_width=True, hide_index=True)
+    
+    # Quick metrics for this segment
+    col1, col2, col3 = st.columns(3)
+    mtd_vs_last_wr, mtd_vs_last_vol = pct_change(
+        [seg_mtd['win_rate'], seg_mtd['recovered']],
+        [seg_m1['win_rate'], seg_m1['recovered']]
+    )
+    
+    with col1:
+        st.metric(
+            f"{segment} L30D vs Last Month (Win Rate)",
+            f"{seg_mtd['win_rate']:.1f}%",
+            f"{mtd_vs_last_wr:+.1f}%"
+        )
 
-        with col2:
-            mtd_vs_last_vol = ((seg_mtd['recovered'] - seg_m1['recovered']) / seg_m1['recovered'] * 100) if seg_m1['recovered'] > 0 else 0
-            st.metric(
-                f"{segment} L30D vs Last Month (Recovery)",
-                f"${seg_mtd['recovered']/1000:.1f}K",
-                f"{mtd_vs_last_vol:+.1f}%"
-            )
+    with col2:
+        st.metric(
+            f"{segment} L30D vs Last Month (Recovery)",
+            f"${seg_mtd['recovered']/1000:.1f}K",
+            f"{mtd_vs_last_vol:+.1f}%"
+        )
 
-        with col3:
-            st.metric(f"{segment} Current Pending", f"{seg_mtd['pending']:,}")
+    with col3:
+        st.metric(f"{segment} Current Pending", f"{seg_mtd['pending']:,}")
+    
+    # Add expandable section for chain-level breakdown
+    with st.expander(f"View {segment} chains breakdown"):
+        # The chain breakdown is the heaviest query per segment, so only run it once someone asks for it
+        show_chains_key = f'show_{segment}_chains'
+        if not st.session_state.get(show_chains_key):
+            st.session_state[show_chains_key] = st.button(f"Load {segment} chains", key=f"btn_{segment}")
+        if st.session_state[show_chains_key]:
+            page = st.number_input(f"{segment} chains page", min_value=1, value=1, step=1, key=f"pg_{segment}")
         
-        # Add expandable section for chain-level breakdown
-        with st.expander(f"View {segment} chains breakdown"):
-            # Get chain-level data for this segment
-            chain_query = f"""
-            WITH chain_segments AS (
-                SELECT
-                    chain,
-                    COUNT(DISTINCT CONCAT(chain, b_name)) as location_count,
-                    ROW_NUMBER() OVER (ORDER BY COUNT(DISTINCT CONCAT(chain, b_name)) DESC) as rank_by_locations
-                FROM `merchant_portal_export.chargeback_orders_enriched`
-                WHERE order_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-                    AND is_loop_enabled = true
-                    AND loop_raised_timestamp IS NOT NULL
-                    AND chain IS NOT NULL
-                    AND chain != ''
-                GROUP BY chain
-            ),
-            segmented_chains AS (
-                SELECT
-                    chain,
-                    CASE
-                        WHEN rank_by_locations <= 15 THEN 'P0'
-                        WHEN rank_by_locations <= 40 THEN 'P1'
-                        WHEN rank_by_locations <= 70 THEN 'P2'
-                        WHEN rank_by_locations <= 132 THEN 'P3'
-                        ELSE 'P4'
-                    END as segment
-                FROM chain_segments
-            ),
-            chain_monthly_data AS (
-                SELECT 
-                    sm.chain,
-                    sm.slug,
-                    cs.platform,
-                    cs.chargeback_date,
-                    cs.external_status,
-                    COALESCE(cs.enabled_won_disputes, 0) as won_amount,
-                    CASE
-                        WHEN cs.external_status IN ('ACCEPTED', 'DENIED')
-                            AND UPPER(COALESCE(cs.error_category, '')) LIKE '%INACCURATE%'
-                        THEN COALESCE(cs.enabled_customer_refunds, 0)
-                        ELSE 0
-                    END as settled_amount,
-                    CASE
-                        WHEN cs.external_status = 'ACCEPTED' THEN 'won'
-                        WHEN cs.external_status = 'DENIED' THEN 'lost'
-                        WHEN cs.external_status IN ('IN_PROGRESS', 'TO_BE_RAISED') THEN 'pending'
-                        ELSE 'other'
-                    END as dispute_status
-                FROM `merchant_portal_export.chargeback_split_summary` cs
-                JOIN `restaurant_aggregate_metrics.slug_am_mapping` sm ON cs.slug = sm.slug
-                JOIN segmented_chains sc ON sm.chain = sc.chain
-                WHERE sc.segment = '{segment}'
-            ),
-            chain_metrics AS (
-                SELECT 
-                    chain,
-                    -- MTD metrics
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}' AND TRIM(platform) = 'Doordash' THEN slug END) as mtd_dd,
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}' AND TRIM(platform) = 'UberEats' THEN slug END) as mtd_ue,
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}' AND TRIM(platform) = 'Grubhub' THEN slug END) as mtd_gh,
-                    COUNT(CASE WHEN chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}' THEN 1 END) as mtd_disputes,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}' AND dispute_status = 'won' THEN 1 ELSE 0 END) as mtd_won,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}' AND dispute_status = 'lost' THEN 1 ELSE 0 END) as mtd_lost,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}' AND dispute_status = 'pending' THEN 1 ELSE 0 END) as mtd_pending,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}' THEN won_amount ELSE 0 END) as mtd_recovered,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{current_month_start}' AND '{current_month_end}' THEN settled_amount ELSE 0 END) as mtd_settled,
-                    -- Last month metrics
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{last_month_start}' AND '{last_month_end}' AND TRIM(platform) = 'Doordash' THEN slug END) as m1_dd,
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{last_month_start}' AND '{last_month_end}' AND TRIM(platform) = 'UberEats' THEN slug END) as m1_ue,
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{last_month_start}' AND '{last_month_end}' AND TRIM(platform) = 'Grubhub' THEN slug END) as m1_gh,
-                    COUNT(CASE WHEN chargeback_date BETWEEN '{last_month_start}' AND '{last_month_end}' THEN 1 END) as m1_disputes,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{last_month_start}' AND '{last_month_end}' AND dispute_status = 'won' THEN 1 ELSE 0 END) as m1_won,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{last_month_start}' AND '{last_month_end}' AND dispute_status = 'lost' THEN 1 ELSE 0 END) as m1_lost,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{last_month_start}' AND '{last_month_end}' AND dispute_status = 'pending' THEN 1 ELSE 0 END) as m1_pending,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{last_month_start}' AND '{last_month_end}' THEN won_amount ELSE 0 END) as m1_recovered,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{last_month_start}' AND '{last_month_end}' THEN settled_amount ELSE 0 END) as m1_settled,
-                    -- Month-2 metrics
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{month_2_start}' AND '{month_2_end}' AND TRIM(platform) = 'Doordash' THEN slug END) as m2_dd,
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{month_2_start}' AND '{month_2_end}' AND TRIM(platform) = 'UberEats' THEN slug END) as m2_ue,
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{month_2_start}' AND '{month_2_end}' AND TRIM(platform) = 'Grubhub' THEN slug END) as m2_gh,
-                    COUNT(CASE WHEN chargeback_date BETWEEN '{month_2_start}' AND '{month_2_end}' THEN 1 END) as m2_disputes,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_2_start}' AND '{month_2_end}' AND dispute_status = 'won' THEN 1 ELSE 0 END) as m2_won,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_2_start}' AND '{month_2_end}' AND dispute_status = 'lost' THEN 1 ELSE 0 END) as m2_lost,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_2_start}' AND '{month_2_end}' AND dispute_status = 'pending' THEN 1 ELSE 0 END) as m2_pending,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_2_start}' AND '{month_2_end}' THEN won_amount ELSE 0 END) as m2_recovered,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_2_start}' AND '{month_2_end}' THEN settled_amount ELSE 0 END) as m2_settled,
-                    -- Month-3 metrics
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{month_3_start}' AND '{month_3_end}' AND TRIM(platform) = 'Doordash' THEN slug END) as m3_dd,
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{month_3_start}' AND '{month_3_end}' AND TRIM(platform) = 'UberEats' THEN slug END) as m3_ue,
-                    COUNT(DISTINCT CASE WHEN chargeback_date BETWEEN '{month_3_start}' AND '{month_3_end}' AND TRIM(platform) = 'Grubhub' THEN slug END) as m3_gh,
-                    COUNT(CASE WHEN chargeback_date BETWEEN '{month_3_start}' AND '{month_3_end}' THEN 1 END) as m3_disputes,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_3_start}' AND '{month_3_end}' AND dispute_status = 'won' THEN 1 ELSE 0 END) as m3_won,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_3_start}' AND '{month_3_end}' AND dispute_status = 'lost' THEN 1 ELSE 0 END) as m3_lost,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_3_start}' AND '{month_3_end}' AND dispute_status = 'pending' THEN 1 ELSE 0 END) as m3_pending,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_3_start}' AND '{month_3_end}' THEN won_amount ELSE 0 END) as m3_recovered,
-                    SUM(CASE WHEN chargeback_date BETWEEN '{month_3_start}' AND '{month_3_end}' THEN settled_amount ELSE 0 END) as m3_settled
-                FROM chain_monthly_data
-                GROUP BY chain
-            )
-            SELECT 
-                chain,
-                -- MTD
-                mtd_dd, mtd_ue, mtd_gh, mtd_disputes, mtd_won, mtd_lost, mtd_pending, mtd_recovered, mtd_settled,
-                ROUND(SAFE_DIVIDE(mtd_recovered, NULLIF(mtd_settled, 0)) * 100, 2) as mtd_win_rate,
-                -- M1
-                m1_dd, m1_ue, m1_gh, m1_disputes, m1_won, m1_lost, m1_pending, m1_recovered, m1_settled,
-                ROUND(SAFE_DIVIDE(m1_recovered, NULLIF(m1_settled, 0)) * 100, 2) as m1_win_rate,
-                -- M2
-                m2_dd, m2_ue, m2_gh, m2_disputes, m2_won, m2_lost, m2_pending, m2_recovered, m2_settled,
-                ROUND(SAFE_DIVIDE(m2_recovered, NULLIF(m2_settled, 0)) * 100, 2) as m2_win_rate,
-                -- M3
-                m3_dd, m3_ue, m3_gh, m3_disputes, m3_won, m3_lost, m3_pending, m3_recovered, m3_settled,
-                ROUND(SAFE_DIVIDE(m3_recovered, NULLIF(m3_settled, 0)) * 100, 2) as m3_win_rate
-            FROM chain_metrics
-            ORDER BY mtd_recovered DESC
-            """
-            
             try:
-                chain_df = pandas_gbq.read_gbq(chain_query, project_id=PROJECT_ID, credentials=credentials, auth_local_webserver=False)
-                
-                if not chain_df.empty:
-                    # Create tabs for each period
-                    tab1, tab2, tab3, tab4 = st.tabs(["Last 30 Days",
-                                                      last_month_start.strftime('%B'),
-                                                      month_2_start.strftime('%B'),
-                                                      month_3_start.strftime('%B')])
-                    
-                    with tab1:
-                        mtd_display = pd.DataFrame({
-                            'Chain': chain_df['chain'],
-                            'DoorDash': chain_df['mtd_dd'],
-                            'UberEats': chain_df['mtd_ue'],
-                            'Grubhub': chain_df['mtd_gh'],
-                            'Disputed': chain_df['mtd_disputes'],
-                            'Won': chain_df['mtd_won'],
-                            'Lost': chain_df['mtd_lost'],
-                            'Pending': chain_df['mtd_pending'],
-                            'Recovered': chain_df['mtd_recovered'].apply(lambda x: f"${x:,.0f}"),
-                            'Win Rate': chain_df['mtd_win_rate'].apply(lambda x: f"{x:.1f}%" if pd.notna(x) else "0.0%")
-                        })
-                        st.dataframe(mtd_display, use_container_width=True, hide_index=True)
-                    
-                    with tab2:
-                        m1_display = pd.DataFrame({
-                            'Chain': chain_df['chain'],
-                            'DoorDash': chain_df['m1_dd'],
-                            'UberEats': chain_df['m1_ue'],
-                            'Grubhub': chain_df['m1_gh'],
-                            'Disputed': chain_df['m1_disputes'],
-                            'Won': chain_df['m1_won'],
-                            'Lost': chain_df['m1_lost'],
-                            'Pending': chain_df['m1_pending'],
-                            'Recovered': chain_df['m1_recovered'].apply(lambda x: f"${x:,.0f}"),
-                            'Win Rate': chain_df['m1_win_rate'].apply(lambda x: f"{x:.1f}%" if pd.notna(x) else "0.0%")
-                        })
-                        st.dataframe(m1_display, use_container_width=True, hide_index=True)
-                    
-                    with tab3:
-                        m2_display = pd.DataFrame({
-                            'Chain': chain_df['chain'],
-                            'DoorDash': chain_df['m2_dd'],
-                            'UberEats': chain_df['m2_ue'],
-                            'Grubhub': chain_df['m2_gh'],
-                            'Disputed': chain_df['m2_disputes'],
-                            'Won': chain_df['m2_won'],
-                            'Lost': chain_df['m2_lost'],
-                            'Pending': chain_df['m2_pending'],
-                            'Recovered': chain_df['m2_recovered'].apply(lambda x: f"${x:,.0f}"),
-                            'Win Rate': chain_df['m2_win_rate'].apply(lambda x: f"{x:.1f}%" if pd.notna(x) else "0.0%")
-                        })
-                        st.dataframe(m2_display, use_container_width=True, hide_index=True)
-                    
-                    with tab4:
-                        m3_display = pd.DataFrame({
-                            'Chain': chain_df['chain'],
-                            'DoorDash': chain_df['m3_dd'],
-                            'UberEats': chain_df['m3_ue'],
-                            'Grubhub': chain_df['m3_gh'],
-                            'Disputed': chain_df['m3_disputes'],
-                            'Won': chain_df['m3_won'],
-                            'Lost': chain_df['m3_lost'],
-                            'Pending': chain_df['m3_pending'],
-                            'Recovered': chain_df['m3_recovered'].apply(lambda x: f"${x:,.0f}"),
-                            'Win Rate': chain_df['m3_win_rate'].apply(lambda x: f"{x:.1f}%" if pd.notna(x) else "0.0%")
-                        })
-                        st.dataframe(m3_display, use_container_width=True, hide_index=True)
+                total_chains, chain_tables = get_segment_chain_tables(segment, segment_periods, page)
+                if chain_tables:
+                    first_chain = (page - 1) * CHAIN_PAGE_SIZE + 1
+                    st.caption(f"Chains {first_chain:,}–{first_chain + len(chain_tables['mtd']) - 1:,} of {total_chains:,}")
+                    # One tab per period, each built from the same mtd_/m1_/m2_/m3_ column set
+                    chain_tabs = st.tabs(["Last 30 Days",
+                                          last_month_start.strftime('%B'),
+                                          month_2_start.strftime('%B'),
+                                          month_3_start.strftime('%B')])
+                    for chain_tab, prefix in zip(chain_tabs, CHAIN_PERIOD_PREFIXES):
+                        with chain_tab:
+                            st.dataframe(chain_tables[prefix], use_container_width=True, hide_index=True)
+                elif page > 1:
+                    st.info(f"No chains on page {page}")
                 else:
                     st.info("No chain data available for this segment")
-                    
+                
             except Exception as e:
                 st.error(f"Error loading chain breakdown: {e}")
+    
+    # Add chain movement expander
+    with st.expander(f"View {segment} chain movement (entered/exited)"):
+        # Filter chain movement data for this segment
+        segment_movement = chains_movement[chains_movement['segment'] == segment] if not chains_movement.empty else pd.DataFrame()
         
-        # Add chain movement expander
-        with st.expander(f"View {segment} chain movement (entered/exited)"):
-            # Filter chain movement data for this segment
-            segment_movement = chains_movement[chains_movement['segment'] == segment] if not chains_movement.empty else pd.DataFrame()
+        if not segment_movement.empty:
+            # Separate entered and exited chains
+            entered_chains = segment_movement[segment_movement['movement_type'] == 'entered']
+            exited_chains = segment_movement[segment_movement['movement_type'] == 'exited']
             
-            if not segment_movement.empty:
-                # Separate entered and exited chains
-                entered_chains = segment_movement[segment_movement['movement_type'] == 'entered']
-                exited_chains = segment_movement[segment_movement['movement_type'] == 'exited']
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown(f"**📈 Chains that Entered {segment}**")
-                    if not entered_chains.empty:
-                        entered_display = pd.DataFrame({
-                            'Chain': entered_chains['chain'].values,
-                            'Locations': entered_chains['location_count'].values
-                        })
-                        st.dataframe(entered_display, use_container_width=True, hide_index=True)
-                    else:
-                        st.info(f"No chains entered {segment} this month")
-                
-                with col2:
-                    st.markdown(f"**📉 Chains that Exited {segment}**")
-                    if not exited_chains.empty:
-                        exited_display = pd.DataFrame({
-                            'Chain': exited_chains['chain'].values,
-                            'Locations': exited_chains['location_count'].values
-                        })
-                        st.dataframe(exited_display, use_container_width=True, hide_index=True)
-                    else:
-                        st.info(f"No chains exited {segment} this month")
-            else:
-                st.info(f"No chain movement detected for {segment}")
-    else:
-        st.info(f"No data available for {segment}")
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown(f"**📈 Chains that Entered {segment}**")
+                if not entered_chains.empty:
+                    entered_display = pd.DataFrame({
+                        'Chain': entered_chains['chain'].values,
+                        'Locations': entered_chains['location_count'].values
+                    })
+                    st.dataframe(entered_display, use_container_width=True, hide_index=True)
+                else:
+                    st.info(f"No chains entered {segment} this month")
+            
+            with col2:
+                st.markdown(f"**📉 Chains that Exited {segment}**")
+                if not exited_chains.empty:
+                    exited_display = pd.DataFrame({
+                        'Chain': exited_chains['chain'].values,
+                        'Locations': exited_chains['location_count'].values
+                    })
+                    st.dataframe(exited_display, use_container_width=True, hide_index=True)
+                else:
+                    st.info(f"No chains exited {segment} this month")
+        else:
+            st.info(f"No chain movement detected for {segment}")
+
+for segment in segments:
+    if segment in segments_present:
+        render_segment(segment)
 
 # Footer
 st.markdown("---")
@@ -13,16 +13,20 @@ import json
 from google.oauth2 import service_account
 
 # Handle authentication for both local and Streamlit Cloud
-if 'gcp_service_account' in st.secrets:
-    # Running on Streamlit Cloud - use secrets
-    credentials = service_account.Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"]
-    )
-else:
+@st.cache_resource
+def load_credentials():
+    """Service account credentials, parsed once per process rather than on every rerun"""
+    if 'gcp_service_account' in st.secrets:
+        # Running on Streamlit Cloud - use secrets
+        return service_account.Credentials.from_service_account_info(
+            st.secrets["gcp_service_account"]
+        )
     # Running locally - disable metadata server
     os.environ['GOOGLE_AUTH_DISABLE_METADATA_SERVER'] = 'True'
     os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = ''
-    credentials = None
+    return None
+
+credentials = load_credentials()
 
 from google.cloud import bigquery
 import pandas_gbq
@@ -136,7 +140,7 @@ def get_chains_list():
     LIMIT 500
     """
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         return df['chain'].tolist()
     except:
         return []
@@ -179,7 +183,7 @@ def get_category_subcategory_breakdown(start_date, end_date, platforms, chain_se
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error: {e}")
@@ -245,7 +249,7 @@ def get_win_rate_trend(start_date, end_date, aggregation, platforms, chain_searc
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         df['period'] = pd.to_datetime(df['period'])
         return df
     except Exception as e:
@@ -296,7 +300,7 @@ def get_platform_trend(start_date, end_date, aggregation, platforms, chain_searc
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         df['period'] = pd.to_datetime(df['period'])
         return df
     except Exception as e:
@@ -358,7 +362,7 @@ def get_issue_type_trend(start_date, end_date, aggregation, platforms, chain_sea
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         df['period'] = pd.to_datetime(df['period'])
         return df
     except Exception as e:
@@ -398,7 +402,7 @@ def get_summary_metrics(start_date, end_date, platforms, chain_search, categorie
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error: {e}")
@@ -442,7 +446,7 @@ def get_chain_win_rates(start_date, end_date, platforms=None, categories=None, m
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading chain data: {e}")
@@ -485,7 +489,7 @@ def get_chain_platform_matrix(start_date, end_date, top_n_chains=15):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading chain-platform data: {e}")
@@ -539,7 +543,7 @@ def get_chain_issue_type_breakdown(start_date, end_date, top_n_chains=15):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         return df
     except Exception as e:
         st.error(f"Error loading chain-issue data: {e}")
@@ -586,7 +590,7 @@ def get_chain_recovery_per_location(start_date, end_date, top_n_chains=10):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         df['month'] = pd.to_datetime(df['month'])
         return df
     except Exception as e:
@@ -626,7 +630,7 @@ def get_chain_trend(start_date, end_date, selected_chains, aggregation="Daily"):
     """
     
     try:
-        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials)
+        df = pandas_gbq.read_gbq(query, project_id=PROJECT_ID, credentials=credentials, use_bqstorage_api=True)
         df['period'] = pd.to_datetime(df['period'])
         return df
     except Exception as e: